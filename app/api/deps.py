@@ -1,17 +1,29 @@
-from fastapi import Depends, HTTPException, status
+import hmac
+import math
+from typing import List, Optional
+from fastapi import Depends, Header, HTTPException, Query, Request, status
+from pydantic import BaseModel
 from fastapi.security import OAuth2PasswordBearer
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, make_transient_to_detached
 from jose import JWTError, jwt
-from app.core.database import get_db
-from app.core.config import SECRET_KEY, ALGORITHM
+from app.core.cache import user_cache
+from app.core.database import attach, get_session, run_db
+from app.core.config import SECRET_KEY, ALGORITHM, INTERNAL_API_TOKEN, AUTH_RATE_LIMIT_EMAIL_CAPACITY, AUTH_RATE_LIMIT_EMAIL_PER_MINUTE, AUTH_RATE_LIMIT_IP_CAPACITY, AUTH_RATE_LIMIT_IP_PER_MINUTE
+from app.core.rate_limit import rate_limit_backend
 from app.models import User
 from app.schemas import TokenData
+from app.services import get_user_by_email
 
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 
 security = HTTPBearer(scheme_name="BearerAuth")
 
-async def get_current_user(db: Session = Depends(get_db), token: HTTPAuthorizationCredentials = Depends(security)) -> User:
+def _detached_copy(user: User) -> User:
+    copy = User(**{column.key: getattr(user, column.key) for column in User.__table__.columns})
+    make_transient_to_detached(copy)
+    return copy
+
+async def get_current_user(db: Session = Depends(get_session), token: HTTPAuthorizationCredentials = Depends(security)) -> User:
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
@@ -25,7 +37,73 @@ async def get_current_user(db: Session = Depends(get_db), token: HTTPAuthorizati
         token_data = TokenData(email=email)
     except JWTError:
         raise credentials_exception
-    user = db.query(User).filter(User.email == token_data.email).first()
+    # Lets the session pin this user to the primary after their own writes.
+    db.info["subject"] = token_data.email
+    cached = user_cache.get(token_data.email)
+    if cached is not None:
+        return attach(db, cached)
+    user = await run_db(db, get_user_by_email, token_data.email)
     if user is None:
         raise credentials_exception
+    user_cache.set(token_data.email, _detached_copy(user))
     return user
+
+def require_internal_token(authorization: Optional[str] = Header(None)) -> None:
+    # Without a configured token the operational endpoints behave as if they were not mounted.
+    if not INTERNAL_API_TOKEN:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not Found")
+    expected = f"Bearer {INTERNAL_API_TOKEN}"
+    if authorization is None or not hmac.compare_digest(authorization.encode(), expected.encode()):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid internal token",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+
+def sparse_fields(schema: type[BaseModel]):
+    allowed = list(schema.model_fields)
+
+    def parse_fields(fields: Optional[str] = Query(None, description=f"Comma-separated subset of: {', '.join(allowed)}")) -> Optional[List[str]]:
+        if fields is None:
+            return None
+        requested = list(dict.fromkeys(name.strip() for name in fields.split(",") if name.strip()))
+        unknown = [name for name in requested if name not in allowed]
+        if unknown:
+            raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(unknown)}")
+        return requested or None
+
+    return parse_fields
+
+async def _request_email(request: Request) -> Optional[str]:
+    email = request.query_params.get("email")
+    if email is None:
+        try:
+            # FastAPI has already read the body for the route, so this is served from memory.
+            body = await request.json()
+        except ValueError:
+            return None
+        email = body.get("email") if isinstance(body, dict) else None
+    return email.strip().lower() if isinstance(email, str) else None
+
+def rate_limit(scope: str):
+    """Token-bucket limit per client IP and per submitted email. It runs before any
+    database or password-hashing work, so a rejected request costs almost nothing."""
+
+    async def check(request: Request) -> None:
+        if rate_limit_backend is None:
+            return
+        host = request.client.host if request.client else "unknown"
+        buckets = [(f"{scope}:ip:{host}", AUTH_RATE_LIMIT_IP_CAPACITY, AUTH_RATE_LIMIT_IP_PER_MINUTE / 60)]
+        email = await _request_email(request)
+        if email:
+            buckets.append((f"{scope}:email:{email}", AUTH_RATE_LIMIT_EMAIL_CAPACITY, AUTH_RATE_LIMIT_EMAIL_PER_MINUTE / 60))
+        for key, capacity, rate in buckets:
+            retry_after = await rate_limit_backend.acquire(key, capacity, rate)
+            if retry_after:
+                raise HTTPException(
+                    status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                    detail="Too many requests",
+                    headers={"Retry-After": str(math.ceil(retry_after))},
+                )
+
+    return check
@@ -0,0 +1,17 @@
+from fastapi import APIRouter, Depends
+from app.api.deps import require_internal_token
+from app.core.database import async_engine, async_replica_engines, engine, pool_stats, replica_engines
+
+# Operational endpoints, served only with INTERNAL_API_TOKEN; still keep /internal off the public ingress.
+router = APIRouter(prefix="/internal", tags=["Internal"], include_in_schema=False, dependencies=[Depends(require_internal_token)])
+
+@router.get("/db-pool", summary="Database connection pool statistics")
+def read_pool_stats():
+    stats = {"sync": pool_stats(engine)}
+    if async_engine is not None:
+        stats["async"] = pool_stats(async_engine)
+    if replica_engines:
+        stats["sync_replicas"] = [pool_stats(replica) for replica in replica_engines]
+    if async_replica_engines:
+        stats["async_replicas"] = [pool_stats(replica) for replica in async_replica_engines]
+    return stats
@@ -0,0 +1,54 @@
+import asyncio
+from fastapi import APIRouter, Depends
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import PlainTextResponse
+from app.api.deps import require_internal_token
+from app.core.cache import todo_cache, user_cache
+from app.core.config import METRICS_FLUSH_SECONDS
+from app.core.database import async_engine, async_replica_engines, engine, pool_stats, replica_engines
+from app.core.events import todo_events
+from app.core.metrics import merge_requests, multiprocess_store, render_gauges, render_requests, request_metrics, stat_samples
+from app.core.notifications import outbox
+from app.core.security import hash_executor_stats
+
+# Prometheus scrape target. Like /internal it needs INTERNAL_API_TOKEN, sent by Prometheus
+# as a bearer token, and should still be kept off the public ingress.
+router = APIRouter(tags=["Metrics"], include_in_schema=False, dependencies=[Depends(require_internal_token)])
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+def runtime_samples() -> list:
+    samples = stat_samples("hash_executor", hash_executor_stats())
+    samples += stat_samples("user_cache", user_cache.stats())
+    if todo_cache is not None:
+        samples += stat_samples("todo_cache", todo_cache.stats())
+    samples += stat_samples("outbox", outbox.stats())
+    samples += stat_samples("todo_events", todo_events.stats())
+    engines = [("sync", engine)]
+    if async_engine is not None:
+        engines.append(("async", async_engine))
+    engines += [(f"replica{n}", replica) for n, replica in enumerate(replica_engines)]
+    engines += [(f"async_replica{n}", replica) for n, replica in enumerate(async_replica_engines)]
+    for name, pool_engine in engines:
+        samples += stat_samples("db_pool", pool_stats(pool_engine), {"engine": name})
+    return samples
+
+async def flush_metrics() -> None:
+    await run_in_threadpool(multiprocess_store.write, request_metrics.snapshot(), runtime_samples())
+
+async def flush_metrics_periodically() -> None:
+    while True:
+        await asyncio.sleep(METRICS_FLUSH_SECONDS)
+        await flush_metrics()
+
+@router.get("/metrics", summary="Prometheus metrics")
+async def read_metrics():
+    if multiprocess_store is None:
+        requests = merge_requests([request_metrics.snapshot()])
+        samples = runtime_samples()
+    else:
+        # Publish this worker's latest numbers before merging every worker's snapshot.
+        await flush_metrics()
+        requests, samples = await run_in_threadpool(multiprocess_store.read)
+    lines = render_requests(requests) + render_gauges(samples)
+    return PlainTextResponse("\n".join(lines) + "\n", media_type=CONTENT_TYPE)
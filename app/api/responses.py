@@ -0,0 +1,18 @@
+import json
+from typing import Any
+from fastapi.responses import JSONResponse
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson is optional
+    orjson = None
+
+class FastJSONResponse(JSONResponse):
+    """JSON response for content that is already JSON-ready (plain dicts, lists, str,
+    numbers). It is rendered as-is, without response_model validation, using orjson
+    when it is installed."""
+
+    def render(self, content: Any) -> bytes:
+        if orjson is not None:
+            return orjson.dumps(content)
+        return json.dumps(content, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
@@ -1,77 +1,93 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.orm import Session
 from jose import JWTError, jwt
-from app.core.database import get_db
+from app.core.database import attach, get_session, release_db, run_db, run_db_and_release
 from app.core.config import SECRET_KEY, ALGORITHM
-from app.api.deps import get_current_user
+from app.core.security import PasswordHashingBusy, hash_password, password_needs_rehash, verify_password_async
+from app.api.deps import get_current_user, rate_limit
 from app.models import User
 from app.schemas import Token, PasswordChange, PasswordResetRequest, PasswordResetConfirm, User, UserCreate, UserVerify, LoginRequest
-from app.services import authenticate_user, create_tokens, verify_otp, regenerate_otp, change_password, reset_password, create_user, get_user_by_email
+from app.services import check_reset_otp, create_tokens, verify_otp, regenerate_otp, reset_password, create_user, get_user_by_email, send_otp, set_password_hash
 
 router = APIRouter(tags=["Auth"])
 
+# Password hashing in these routes is awaited on the hash executor rather than run inside
+# run_db, and the session's connection is released first, so a burst of logins holds
+# neither request threads nor pooled connections while bcrypt runs.
+
 @router.post("/register", response_model=User, summary="Register new user")
-def register(user: UserCreate, db: Session = Depends(get_db)):
+async def register(user: UserCreate, db: Session = Depends(get_session)):
+    if await run_db_and_release(db, get_user_by_email, email=user.email):
+        raise HTTPException(status_code=400, detail="Email already registered")
+    hashed_password = await hash_password(user.password)
     try:
-        new_user = create_user(db, user)
-        print(f"DEBUG: OTP for {new_user.email} is {new_user.otp_code}")
+        new_user = await run_db(db, create_user, user, hashed_password)
+        send_otp(new_user.email, new_user.otp_code)
         return new_user
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
 
-@router.post("/login", response_model=Token, summary="Login with email and password")
-def login(
-    login_data: LoginRequest, 
-    db: Session = Depends(get_db)
+@router.post("/login", response_model=Token, summary="Login with email and password", dependencies=[Depends(rate_limit("login"))])
+async def login(
+    login_data: LoginRequest,
+    db: Session = Depends(get_session)
 ):
-    user = authenticate_user(db, email=login_data.email, password=login_data.password)
-    if not user:
+    user = await run_db_and_release(db, get_user_by_email, email=login_data.email)
+    if not user or not await verify_password_async(login_data.password, user.hashed_password):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect email or password",
             headers={"WWW-Authenticate": "Bearer"},
         )
-    
+
     if not user.is_verified:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Account not verified. Please verify your OTP."
         )
-    
+
+    if password_needs_rehash(user.hashed_password):
+        try:
+            hashed_password = await hash_password(login_data.password)
+            await run_db(db, set_password_hash, attach(db, user), hashed_password)
+        except PasswordHashingBusy:
+            # The login already succeeded; the upgrade is retried on a later one.
+            pass
+
     return create_tokens(user)
 
-@router.post("/verify-otp", summary="Verify email with OTP")
-def verify_otp_endpoint(verification: UserVerify, db: Session = Depends(get_db)):
-    user = get_user_by_email(db, email=verification.email)
-    
+@router.post("/verify-otp", summary="Verify email with OTP", dependencies=[Depends(rate_limit("verify_otp"))])
+async def verify_otp_endpoint(verification: UserVerify, db: Session = Depends(get_session)):
+    user = await run_db(db, get_user_by_email, email=verification.email)
+
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
-    
+
     if user.is_verified:
         return {"message": "User already verified"}
-    
-    if verify_otp(db, email=verification.email, otp=verification.otp):
+
+    if await run_db(db, verify_otp, email=verification.email, otp=verification.otp):
         return {"message": "Account verified successfully"}
     else:
         raise HTTPException(status_code=400, detail="Invalid or expired OTP")
 
-@router.post("/resend-otp", summary="Resend verification OTP")
-def resend_otp(email: str, db: Session = Depends(get_db)):
-    user = get_user_by_email(db, email=email)
-    
+@router.post("/resend-otp", summary="Resend verification OTP", dependencies=[Depends(rate_limit("resend_otp"))])
+async def resend_otp(email: str, db: Session = Depends(get_session)):
+    user = await run_db(db, get_user_by_email, email=email)
+
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
-    
+
     if user.is_verified:
         return {"message": "User already verified"}
-    
-    otp = regenerate_otp(db, email=email)
-    print(f"DEBUG: Resent OTP for {user.email} is {otp}")
-    
+
+    otp = await run_db(db, regenerate_otp, email=email)
+    send_otp(email, otp)
+
     return {"message": "OTP resent successfully"}
 
 @router.post("/refresh", response_model=Token, summary="Refresh access token")
-def refresh_token(token: str, db: Session = Depends(get_db)):
+async def refresh_token(token: str, db: Session = Depends(get_session)):
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
         email: str = payload.get("sub")
@@ -80,47 +96,49 @@ def refresh_token(token: str, db: Session = Depends(get_db)):
             raise HTTPException(status_code=401, detail="Invalid refresh token")
     except JWTError:
         raise HTTPException(status_code=401, detail="Invalid refresh token")
-    
-    from app.services import get_user_by_email
-    user = get_user_by_email(db, email=email)
+
+    user = await run_db(db, get_user_by_email, email=email)
     if user is None:
         raise HTTPException(status_code=401, detail="User not found")
-    
+
     return create_tokens(user)
 
 @router.post("/change-password", summary="Change password")
 async def change_password_endpoint(
-    password_data: PasswordChange, 
-    db: Session = Depends(get_db),
+    password_data: PasswordChange,
+    db: Session = Depends(get_session),
     current_user: User = Depends(get_current_user)
 ):
-    try:
-        change_password(db, current_user, password_data.old_password, password_data.new_password)
-        return {"message": "Password changed successfully"}
-    except ValueError as e:
-        raise HTTPException(status_code=400, detail=str(e))
+    await release_db(db, current_user)
+    if not await verify_password_async(password_data.old_password, current_user.hashed_password):
+        raise HTTPException(status_code=400, detail="Incorrect old password")
+    hashed_password = await hash_password(password_data.new_password)
+    await run_db(db, set_password_hash, attach(db, current_user), hashed_password)
+    return {"message": "Password changed successfully"}
 
-@router.post("/forgot-password", summary="Request password reset")
+@router.post("/forgot-password", summary="Request password reset", dependencies=[Depends(rate_limit("forgot_password"))])
 async def forgot_password(
     request: PasswordResetRequest,
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_session)
 ):
-    from app.services import get_user_by_email
-    user = get_user_by_email(db, email=request.email)
+    user = await run_db(db, get_user_by_email, email=request.email)
     if not user:
         return {"message": "If this email exists, an OTP has been sent."}
-    
-    otp = regenerate_otp(db, email=request.email)
-    print(f"DEBUG: Password Reset OTP for {user.email} is {otp}")
+
+    otp = await run_db(db, regenerate_otp, email=request.email)
+    send_otp(request.email, otp, "reset")
     return {"message": "If this email exists, an OTP has been sent."}
 
-@router.post("/reset-password", summary="Reset password with OTP")
+@router.post("/reset-password", summary="Reset password with OTP", dependencies=[Depends(rate_limit("reset_password"))])
 async def reset_password_endpoint(
     reset_data: PasswordResetConfirm,
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_session)
 ):
     try:
-        reset_password(db, email=reset_data.email, otp=reset_data.otp, new_password=reset_data.new_password)
+        # Checked before hashing, so a wrong email or code never costs a bcrypt round.
+        await run_db_and_release(db, check_reset_otp, email=reset_data.email, otp=reset_data.otp)
+        hashed_password = await hash_password(reset_data.new_password)
+        await run_db(db, reset_password, email=reset_data.email, otp=reset_data.otp, new_password=reset_data.new_password, hashed_password=hashed_password)
         return {"message": "Password reset successfully"}
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
@@ -1,89 +1,272 @@
-from fastapi import APIRouter, Depends, HTTPException
+import json
+from fastapi import APIRouter, Body, Depends, File, Header, HTTPException, Query, Response, UploadFile
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
-from typing import List, Optional
-from app.core.database import get_db
-from app.api.deps import get_current_user
+from typing import List, Literal, Optional
+from app.core.config import TODO_BULK_MAX_ITEMS, TODO_CHANGES_PAGE_SIZE, TODO_EVENTS_HEARTBEAT_SECONDS, TODO_FAST_SERIALIZATION
+from app.core.database import get_session, run_db, stream_db
+from app.core.events import HEARTBEAT, todo_events
+from app.api.deps import get_current_user, sparse_fields
+from app.api.responses import FastJSONResponse
 from app.models import User
-from app.schemas import Todo, TodoCreate, TodoUpdate
-from app.services import create_todo, delete_todo, get_todo_by_id, get_todos_by_user, toggle_todo_archive, toggle_todo_complete, update_todo
+from app.schemas import Todo, TodoBulkResult, TodoBulkSelection, TodoBulkUpdate, TodoChanges, TodoCreate, TodoImportResult, TodoUpdate
+from app.services import TODO_FIELDS, ChangeCursorExpired, archive_todos, complete_todos, create_todo, create_todos, decode_change_cursor, decode_cursor, decode_search_cursor, delete_todo, delete_todos, encode_cursor, encode_search_cursor, export_todos_query, format_csv, format_ndjson, get_todo_by_id, get_todo_changes, get_todo_for_update, get_todo_json_by_id, get_todo_version, get_todo_versions_by_user, get_todos_by_user_cached, import_todos, parse_csv, parse_ndjson, search_todos, todos_etag, toggle_todo_archive, toggle_todo_complete, update_todo
 
 router = APIRouter(prefix="/todos", tags=["Todos"])
 
+def _etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    candidates = [tag.strip() for tag in if_none_match.split(",")]
+    return "*" in candidates or any(tag.removeprefix("W/") == etag.removeprefix("W/") for tag in candidates)
+
 @router.post("/", response_model=Todo, summary="Create new todo")
-def create_todo_endpoint(
-    todo: TodoCreate, 
-    db: Session = Depends(get_db),
+async def create_todo_endpoint(
+    todo: TodoCreate,
+    db: Session = Depends(get_session),
+    current_user: User = Depends(get_current_user)
+):
+    return await run_db(db, create_todo, todo, current_user.id)
+
+@router.post("/bulk", response_model=List[Todo], summary="Create many todos")
+async def create_todos_endpoint(
+    todos: List[TodoCreate] = Body(..., max_length=TODO_BULK_MAX_ITEMS),
+    db: Session = Depends(get_session),
     current_user: User = Depends(get_current_user)
 ):
-    return create_todo(db, todo, current_user.id)
+    return await run_db(db, create_todos, todos, current_user.id)
+
+@router.patch("/bulk/complete", response_model=TodoBulkResult, summary="Set completion on many todos")
+async def complete_todos_endpoint(
+    selection: TodoBulkUpdate,
+    db: Session = Depends(get_session),
+    current_user: User = Depends(get_current_user)
+):
+    ids = await run_db(db, complete_todos, current_user.id, selection, selection.value)
+    return TodoBulkResult(ids=ids, count=len(ids))
+
+@router.patch("/bulk/archive", response_model=TodoBulkResult, summary="Set archive state on many todos")
+async def archive_todos_endpoint(
+    selection: TodoBulkUpdate,
+    db: Session = Depends(get_session),
+    current_user: User = Depends(get_current_user)
+):
+    ids = await run_db(db, archive_todos, current_user.id, selection, selection.value)
+    return TodoBulkResult(ids=ids, count=len(ids))
+
+@router.post("/bulk/delete", response_model=TodoBulkResult, summary="Delete many todos")
+async def delete_todos_endpoint(
+    selection: TodoBulkSelection,
+    db: Session = Depends(get_session),
+    current_user: User = Depends(get_current_user)
+):
+    ids = await run_db(db, delete_todos, current_user.id, selection)
+    return TodoBulkResult(ids=ids, count=len(ids))
+
+@router.post("/import", response_model=TodoImportResult, summary="Import todos from an NDJSON or CSV upload")
+async def import_todos_endpoint(
+    file: UploadFile = File(...),
+    format: Optional[Literal["ndjson", "csv"]] = None,
+    db: Session = Depends(get_session),
+    current_user: User = Depends(get_current_user)
+):
+    if format is None:
+        format = "csv" if (file.filename or "").lower().endswith(".csv") else "ndjson"
+    # The upload is spooled to disk by the multipart parser; rows are read from it lazily.
+    rows = parse_csv(file.file) if format == "csv" else parse_ndjson(file.file)
+    return await run_db(db, import_todos, current_user.id, rows)
 
 @router.get("/", response_model=List[Todo], summary="List todos")
-def read_todos(
-    skip: int = 0, 
-    limit: int = 100, 
+async def read_todos(
+    response: Response,
+    skip: int = 0,
+    limit: int = 100,
     archived: Optional[bool] = None,
-    db: Session = Depends(get_db),
+    cursor: Optional[str] = None,
+    fields: Optional[List[str]] = Depends(sparse_fields(Todo)),
+    if_none_match: Optional[str] = Header(None),
+    db: Session = Depends(get_session),
     current_user: User = Depends(get_current_user)
 ):
-    return get_todos_by_user(db, current_user.id, skip, limit, archived)
+    after_id = None
+    if cursor is not None:
+        try:
+            after_id = decode_cursor(cursor)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+
+    if if_none_match:
+        # Revalidate against (id, updated_at) only; the full rows are loaded on a miss.
+        versions = await run_db(db, get_todo_versions_by_user, current_user.id, skip, limit, archived, after_id)
+        etag = todos_etag(versions, fields)
+        if _etag_matches(if_none_match, etag):
+            return Response(status_code=304, headers={"ETag": etag})
+
+    todos = await run_db(db, get_todos_by_user_cached, current_user.id, skip, limit, archived, after_id, fields)
+    headers = {"ETag": todos_etag(((todo["id"], todo["updated_at"]) for todo in todos), fields)}
+    if todos and len(todos) == limit:
+        headers["X-Next-Cursor"] = encode_cursor(todos[-1]["id"])
+    if fields:
+        return FastJSONResponse([{name: todo[name] for name in fields} for todo in todos], headers=headers)
+    if TODO_FAST_SERIALIZATION:
+        return FastJSONResponse(todos, headers=headers)
+    response.headers.update(headers)
+    return todos
+
+@router.get("/search", response_model=List[Todo], summary="Search todos by title and description")
+async def search_todos_endpoint(
+    response: Response,
+    q: str = Query(..., min_length=1),
+    limit: int = Query(20, ge=1, le=100),
+    archived: Optional[bool] = None,
+    cursor: Optional[str] = None,
+    db: Session = Depends(get_session),
+    current_user: User = Depends(get_current_user)
+):
+    after = None
+    if cursor is not None:
+        try:
+            after = decode_search_cursor(cursor)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+
+    rows = await run_db(db, search_todos, current_user.id, q, limit, archived, after)
+    if len(rows) == limit:
+        todo, score = rows[-1]
+        response.headers["X-Next-Cursor"] = encode_search_cursor(score, todo.id)
+    return [todo for todo, _ in rows]
+
+@router.get("/changes", response_model=TodoChanges, summary="List todos changed since a sync cursor")
+async def read_todo_changes(
+    since: Optional[str] = None,
+    limit: int = Query(TODO_CHANGES_PAGE_SIZE, ge=1, le=TODO_CHANGES_PAGE_SIZE),
+    db: Session = Depends(get_session),
+    current_user: User = Depends(get_current_user)
+):
+    try:
+        after, after_id = decode_change_cursor(since) if since else (None, None)
+        return await run_db(db, get_todo_changes, current_user.id, after, after_id, limit)
+    except ChangeCursorExpired as e:
+        raise HTTPException(status_code=410, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@router.get("/events", summary="Stream todo change events (Server-Sent Events)")
+async def todo_events_stream(
+    db: Session = Depends(get_session),
+    current_user: User = Depends(get_current_user)
+):
+    channel = str(current_user.id)
+    # Release the session's connection; the stream can stay open for hours.
+    await run_db(db, Session.rollback)
+
+    async def body():
+        with todo_events.subscribe(channel) as subscription:
+            yield "retry: 3000\n\n"
+            async for event in subscription.events(TODO_EVENTS_HEARTBEAT_SECONDS):
+                if event is HEARTBEAT:
+                    yield ": keepalive\n\n"
+                else:
+                    yield f"event: {event['type']}\ndata: {json.dumps(event)}\n\n"
+            if subscription.dropped:
+                # This client fell too far behind; it should catch up through /changes.
+                yield "event: reset\ndata: {}\n\n"
+
+    headers = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    return StreamingResponse(body(), media_type="text/event-stream", headers=headers)
+
+@router.get("/export", summary="Export all todos as NDJSON or CSV")
+async def export_todos(
+    format: Literal["ndjson", "csv"] = Query("ndjson"),
+    db: Session = Depends(get_session),
+    current_user: User = Depends(get_current_user)
+):
+    async def body():
+        first = True
+        async for rows in stream_db(db, export_todos_query(current_user.id)):
+            yield format_ndjson(rows) if format == "ndjson" else format_csv(rows, header=first)
+            first = False
+        if first and format == "csv":
+            yield format_csv([], header=True)
+
+    media_type = "application/x-ndjson" if format == "ndjson" else "text/csv"
+    headers = {"Content-Disposition": f'attachment; filename="todos.{format}"'}
+    return StreamingResponse(body(), media_type=media_type, headers=headers)
 
 @router.get("/{todo_id}", response_model=Todo, summary="Get single todo")
-def read_todo(
-    todo_id: int, 
-    db: Session = Depends(get_db),
+async def read_todo(
+    todo_id: int,
+    response: Response,
+    fields: Optional[List[str]] = Depends(sparse_fields(Todo)),
+    if_none_match: Optional[str] = Header(None),
+    db: Session = Depends(get_session),
     current_user: User = Depends(get_current_user)
 ):
-    todo = get_todo_by_id(db, todo_id, current_user.id)
+    if if_none_match:
+        version = await run_db(db, get_todo_version, todo_id, current_user.id)
+        if not version:
+            raise HTTPException(status_code=404, detail="Todo not found")
+        etag = todos_etag([version], fields)
+        if _etag_matches(if_none_match, etag):
+            return Response(status_code=304, headers={"ETag": etag})
+
+    if fields or TODO_FAST_SERIALIZATION:
+        todo = await run_db(db, get_todo_json_by_id, todo_id, current_user.id, fields)
+        if not todo:
+            raise HTTPException(status_code=404, detail="Todo not found")
+        headers = {"ETag": todos_etag([(todo["id"], todo["updated_at"])], fields)}
+        return FastJSONResponse({name: todo[name] for name in fields or TODO_FIELDS}, headers=headers)
+
+    todo = await run_db(db, get_todo_by_id, todo_id, current_user.id)
     if not todo:
         raise HTTPException(status_code=404, detail="Todo not found")
+    response.headers["ETag"] = todos_etag([(todo.id, todo.updated_at)])
     return todo
 
 @router.put("/{todo_id}", response_model=Todo, summary="Update todo")
-def update_todo_endpoint(
-    todo_id: int, 
-    todo_update: TodoUpdate, 
-    db: Session = Depends(get_db),
+async def update_todo_endpoint(
+    todo_id: int,
+    todo_update: TodoUpdate,
+    db: Session = Depends(get_session),
     current_user: User = Depends(get_current_user)
 ):
-    todo = get_todo_by_id(db, todo_id, current_user.id)
+    todo = await run_db(db, get_todo_for_update, todo_id, current_user.id)
     if not todo:
         raise HTTPException(status_code=404, detail="Todo not found")
-    
-    return update_todo(db, todo, todo_update)
+
+    return await run_db(db, update_todo, todo, todo_update)
 
 @router.patch("/{todo_id}/complete", response_model=Todo, summary="Toggle todo completion")
-def toggle_complete(
-    todo_id: int, 
-    db: Session = Depends(get_db),
+async def toggle_complete(
+    todo_id: int,
+    db: Session = Depends(get_session),
     current_user: User = Depends(get_current_user)
 ):
-    todo = get_todo_by_id(db, todo_id, current_user.id)
+    todo = await run_db(db, toggle_todo_complete, todo_id, current_user.id)
     if not todo:
         raise HTTPException(status_code=404, detail="Todo not found")
-    
-    return toggle_todo_complete(db, todo)
+    return todo
 
 @router.patch("/{todo_id}/archive", response_model=Todo, summary="Toggle todo archive")
-def toggle_archive(
-    todo_id: int, 
-    db: Session = Depends(get_db),
+async def toggle_archive(
+    todo_id: int,
+    db: Session = Depends(get_session),
     current_user: User = Depends(get_current_user)
 ):
-    todo = get_todo_by_id(db, todo_id, current_user.id)
+    todo = await run_db(db, toggle_todo_archive, todo_id, current_user.id)
     if not todo:
         raise HTTPException(status_code=404, detail="Todo not found")
-    
-    return toggle_todo_archive(db, todo)
+    return todo
 
 @router.delete("/{todo_id}", summary="Delete todo")
-def delete_todo_endpoint(
-    todo_id: int, 
-    db: Session = Depends(get_db),
+async def delete_todo_endpoint(
+    todo_id: int,
+    db: Session = Depends(get_session),
     current_user: User = Depends(get_current_user)
 ):
-    todo = get_todo_by_id(db, todo_id, current_user.id)
+    todo = await run_db(db, get_todo_for_update, todo_id, current_user.id)
     if not todo:
         raise HTTPException(status_code=404, detail="Todo not found")
-    
-    delete_todo(db, todo)
+
+    await run_db(db, delete_todo, todo)
     return {"message": "Todo deleted successfully"}
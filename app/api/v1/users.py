@@ -1,7 +1,10 @@
+from typing import List, Optional
 from fastapi import APIRouter, Depends
+from fastapi.responses import JSONResponse
 from sqlalchemy.orm import Session
-from app.core.database import get_db
-from app.api.deps import get_current_user
+from app.core.database import attach, get_session, release_db, run_db
+from app.core.security import hash_password
+from app.api.deps import get_current_user, sparse_fields
 from app.models import User
 from app.schemas import User, UserUpdate
 from app.services import update_user
@@ -9,13 +12,26 @@ from app.services import update_user
 router = APIRouter(prefix="/users", tags=["Users"])
 
 @router.get("/me", response_model=User, summary="Get current user")
-def read_users_me(current_user: User = Depends(get_current_user)):
+async def read_users_me(
+    fields: Optional[List[str]] = Depends(sparse_fields(User)),
+    current_user: User = Depends(get_current_user)
+):
+    if fields:
+        # The user row is already loaded (or cached) for authentication, so only the
+        # payload is narrowed.
+        return JSONResponse(User.model_validate(current_user).model_dump(mode="json", include=set(fields)))
     return current_user
 
 @router.put("/me", response_model=User, summary="Update current user")
-def update_user_me(
+async def update_user_me(
     user_update: UserUpdate,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_session),
     current_user: User = Depends(get_current_user)
 ):
-    return update_user(db, current_user, user_update)
+    hashed_password = None
+    if user_update.password:
+        # Hash with the connection released; see the note in auth.py.
+        await release_db(db, current_user)
+        hashed_password = await hash_password(user_update.password)
+        current_user = attach(db, current_user)
+    return await run_db(db, update_user, current_user, user_update, hashed_password)
@@ -0,0 +1,179 @@
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Hashable, Optional
+from app.core.config import USER_CACHE_SIZE, USER_CACHE_TTL_SECONDS, REDIS_URL, TODO_CACHE_BACKEND, TODO_CACHE_SIZE, TODO_CACHE_TTL_SECONDS, WEB_CONCURRENCY
+
+logger = logging.getLogger(__name__)
+
+class TTLCache:
+    """In-process LRU cache whose entries also expire after ``ttl`` seconds."""
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._data: "OrderedDict[Hashable, tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None or entry[0] < time.monotonic():
+                if entry is not None:
+                    del self._data[key]
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def set(self, key: Hashable, value: Any) -> None:
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def invalidate(self, key: Hashable) -> None:
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"size": len(self._data), "maxsize": self.maxsize, "hits": self.hits, "misses": self.misses}
+
+class MemoryCacheBackend:
+    """Versioned cache held in this process. Versions are never evicted, so a bumped
+    namespace can not fall back to an older version while its entries are still cached."""
+
+    def __init__(self, maxsize: int, ttl: float):
+        self._entries = TTLCache(maxsize, ttl)
+        self._versions: dict = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[Any]:
+        return self._entries.get(key)
+
+    def set(self, key: str, value: Any) -> None:
+        self._entries.set(key, value)
+
+    def get_version(self, namespace: str) -> int:
+        with self._lock:
+            return self._versions.get(namespace, 0)
+
+    def bump_version(self, namespace: str) -> int:
+        with self._lock:
+            version = self._versions.get(namespace, 0) + 1
+            self._versions[namespace] = version
+            return version
+
+    def clear(self) -> None:
+        self._entries.clear()
+        with self._lock:
+            self._versions.clear()
+
+    def stats(self) -> dict:
+        return self._entries.stats()
+
+class RedisCacheBackend:
+    """Versioned cache shared by all workers through any Redis-protocol server.
+
+    A Redis error never fails the request: it is logged and the cache is bypassed for one
+    TTL, so reads go to the database. That also covers a failed version bump, since pages
+    cached under the old version have expired by the time the bypass ends."""
+
+    def __init__(self, client, ttl: float, prefix: str = "cache:"):
+        from redis import RedisError
+        self._client = client
+        self._ttl = max(1, int(ttl))
+        self._prefix = prefix
+        self._errors = RedisError
+        self._bypass_until = 0.0
+        self.hits = 0
+        self.misses = 0
+        self.errors = 0
+
+    def _bypassed(self) -> bool:
+        return time.monotonic() < self._bypass_until
+
+    def _failed(self, operation: str, error: Exception) -> None:
+        self.errors += 1
+        self._bypass_until = time.monotonic() + self._ttl
+        logger.warning("Cache %s failed, bypassing the cache for %ds: %s", operation, self._ttl, error)
+
+    def get(self, key: str) -> Optional[bytes]:
+        value = None
+        if not self._bypassed():
+            try:
+                value = self._client.get(self._prefix + key)
+            except self._errors as e:
+                self._failed("get", e)
+        if value is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return value
+
+    def set(self, key: str, value: Any) -> None:
+        if self._bypassed():
+            return
+        try:
+            self._client.set(self._prefix + key, value, ex=self._ttl)
+        except self._errors as e:
+            self._failed("set", e)
+
+    def get_version(self, namespace: str) -> int:
+        try:
+            version = self._client.get(f"{self._prefix}version:{namespace}")
+        except self._errors as e:
+            # Keys built from a guessed version are never read or written while bypassed.
+            self._failed("version read", e)
+            return 0
+        return int(version) if version is not None else 0
+
+    def bump_version(self, namespace: str) -> Optional[int]:
+        try:
+            return self._client.incr(f"{self._prefix}version:{namespace}")
+        except self._errors as e:
+            self._failed("version bump", e)
+            return None
+
+    def clear(self) -> None:
+        keys = list(self._client.scan_iter(match=self._prefix + "*"))
+        if keys:
+            self._client.delete(*keys)
+        self.hits = 0
+        self.misses = 0
+        self.errors = 0
+
+    def stats(self) -> dict:
+        return {"hits": self.hits, "misses": self.misses, "errors": self.errors}
+
+def create_cache_backend(kind: str, maxsize: int, ttl: float, prefix: str = "cache:", workers: int = 1):
+    if kind == "none":
+        return None
+    if kind == "redis":
+        import redis
+        return RedisCacheBackend(redis.Redis.from_url(REDIS_URL), ttl, prefix)
+    if workers > 1:
+        # Versions live in each process, so other workers would keep serving stale pages.
+        logger.warning("The memory cache is per process; caching is off with %d workers. Use the redis backend.", workers)
+        return None
+    return MemoryCacheBackend(maxsize, ttl)
+
+# Resolved users for get_current_user, keyed by token subject (email).
+user_cache = TTLCache(USER_CACHE_SIZE, USER_CACHE_TTL_SECONDS)
+
+# Serialized todo list pages, namespaced by a per-user version (see todo_service).
+todo_cache = create_cache_backend(TODO_CACHE_BACKEND, TODO_CACHE_SIZE, TODO_CACHE_TTL_SECONDS, prefix="todos:", workers=WEB_CONCURRENCY)
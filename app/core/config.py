@@ -8,3 +8,100 @@ ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 30
 REFRESH_TOKEN_EXPIRE_DAYS = 7
 DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./sql_app.db")
+
+def _async_url(url: str) -> str:
+    if url.startswith("sqlite:"):
+        return url.replace("sqlite:", "sqlite+aiosqlite:", 1)
+    if url.startswith("postgresql:") or url.startswith("postgresql+psycopg2:"):
+        return "postgresql+asyncpg:" + url.split(":", 1)[1]
+    return url
+
+ASYNC_DATABASE = os.getenv("ASYNC_DATABASE", "false").lower() in ("1", "true", "yes")
+ASYNC_DATABASE_URL = os.getenv("ASYNC_DATABASE_URL", _async_url(DATABASE_URL))
+
+def _optional(name: str, cast):
+    value = os.getenv(name)
+    return cast(value) if value else None
+
+# Unset pool settings fall back to per-dialect defaults in app.core.database.
+DB_POOL_SIZE = _optional("DB_POOL_SIZE", int)
+DB_MAX_OVERFLOW = _optional("DB_MAX_OVERFLOW", int)
+DB_POOL_TIMEOUT = _optional("DB_POOL_TIMEOUT", float)
+DB_POOL_RECYCLE = _optional("DB_POOL_RECYCLE", int)
+DB_POOL_PRE_PING = _optional("DB_POOL_PRE_PING", lambda value: value.lower() in ("1", "true", "yes"))
+
+# Bearer token for the operational endpoints under /internal; they answer 404 while unset.
+INTERNAL_API_TOKEN = os.getenv("INTERNAL_API_TOKEN", "")
+
+# WAL journal, relaxed syncing and a single serialized writer for file-backed SQLite.
+SQLITE_PERFORMANCE_MODE = os.getenv("SQLITE_PERFORMANCE_MODE", "false").lower() in ("1", "true", "yes")
+SQLITE_BUSY_TIMEOUT_MS = int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000"))
+SQLITE_CACHE_SIZE_KB = int(os.getenv("SQLITE_CACHE_SIZE_KB", "65536"))
+SQLITE_MMAP_SIZE = int(os.getenv("SQLITE_MMAP_SIZE", "268435456"))
+
+# Comma-separated read replicas; read-only service calls are spread over them.
+DATABASE_REPLICA_URLS = [url.strip() for url in os.getenv("DATABASE_REPLICA_URLS", "").split(",") if url.strip()]
+DATABASE_REPLICA_SELECTION = os.getenv("DATABASE_REPLICA_SELECTION", "round_robin")
+REPLICA_PIN_BACKEND = os.getenv("REPLICA_PIN_BACKEND", "memory")
+REPLICA_PIN_SECONDS = float(os.getenv("REPLICA_PIN_SECONDS", "5"))
+REPLICA_PIN_MAX_KEYS = int(os.getenv("REPLICA_PIN_MAX_KEYS", "10000"))
+
+USER_CACHE_SIZE = int(os.getenv("USER_CACHE_SIZE", "1024"))
+USER_CACHE_TTL_SECONDS = float(os.getenv("USER_CACHE_TTL_SECONDS", "60"))
+
+PASSWORD_HASH_EXECUTOR = os.getenv("PASSWORD_HASH_EXECUTOR", "thread")
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", str(min(4, os.cpu_count() or 1))))
+PASSWORD_HASH_MAX_QUEUE = int(os.getenv("PASSWORD_HASH_MAX_QUEUE", "32"))
+
+PASSWORD_HASH_SCHEME = os.getenv("PASSWORD_HASH_SCHEME", "bcrypt")
+PASSWORD_HASH_ROUNDS = int(os.getenv("PASSWORD_HASH_ROUNDS")) if os.getenv("PASSWORD_HASH_ROUNDS") else None
+
+TODO_BULK_MAX_ITEMS = int(os.getenv("TODO_BULK_MAX_ITEMS", "500"))
+TODO_BULK_CHUNK_SIZE = int(os.getenv("TODO_BULK_CHUNK_SIZE", "100"))
+
+TODO_IMPORT_BATCH_SIZE = int(os.getenv("TODO_IMPORT_BATCH_SIZE", "500"))
+TODO_IMPORT_MAX_ERRORS = int(os.getenv("TODO_IMPORT_MAX_ERRORS", "100"))
+
+REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379/0")
+TODO_CACHE_BACKEND = os.getenv("TODO_CACHE_BACKEND", "memory")
+TODO_CACHE_SIZE = int(os.getenv("TODO_CACHE_SIZE", "4096"))
+TODO_CACHE_TTL_SECONDS = float(os.getenv("TODO_CACHE_TTL_SECONDS", "30"))
+# Worker processes, as read by uvicorn and gunicorn. The memory todo cache is disabled
+# when there are several, since a write on one worker can not retire another's pages.
+WEB_CONCURRENCY = int(os.getenv("WEB_CONCURRENCY", "1"))
+
+TODO_FAST_SERIALIZATION = os.getenv("TODO_FAST_SERIALIZATION", "false").lower() in ("1", "true", "yes")
+
+TODO_TOMBSTONE_RETENTION_DAYS = int(os.getenv("TODO_TOMBSTONE_RETENTION_DAYS", "30"))
+TODO_TOMBSTONE_COMPACT_SECONDS = float(os.getenv("TODO_TOMBSTONE_COMPACT_SECONDS", "3600"))
+TODO_CHANGES_PAGE_SIZE = int(os.getenv("TODO_CHANGES_PAGE_SIZE", "500"))
+
+TODO_EVENTS_BACKEND = os.getenv("TODO_EVENTS_BACKEND", "memory")
+TODO_EVENTS_QUEUE_SIZE = int(os.getenv("TODO_EVENTS_QUEUE_SIZE", "100"))
+TODO_EVENTS_HEARTBEAT_SECONDS = float(os.getenv("TODO_EVENTS_HEARTBEAT_SECONDS", "15"))
+
+RATE_LIMIT_BACKEND = os.getenv("RATE_LIMIT_BACKEND", "memory")
+RATE_LIMIT_MAX_KEYS = int(os.getenv("RATE_LIMIT_MAX_KEYS", "10000"))
+AUTH_RATE_LIMIT_IP_CAPACITY = int(os.getenv("AUTH_RATE_LIMIT_IP_CAPACITY", "20"))
+AUTH_RATE_LIMIT_IP_PER_MINUTE = float(os.getenv("AUTH_RATE_LIMIT_IP_PER_MINUTE", "10"))
+AUTH_RATE_LIMIT_EMAIL_CAPACITY = int(os.getenv("AUTH_RATE_LIMIT_EMAIL_CAPACITY", "5"))
+AUTH_RATE_LIMIT_EMAIL_PER_MINUTE = float(os.getenv("AUTH_RATE_LIMIT_EMAIL_PER_MINUTE", "2"))
+
+OTP_STORE = os.getenv("OTP_STORE", "table")
+OTP_TTL_SECONDS = float(os.getenv("OTP_TTL_SECONDS", "300"))
+OTP_MAX_ATTEMPTS = int(os.getenv("OTP_MAX_ATTEMPTS", "5"))
+
+NOTIFICATION_SINK = os.getenv("NOTIFICATION_SINK", "console")
+NOTIFICATION_FILE_PATH = os.getenv("NOTIFICATION_FILE_PATH", "notifications.log")
+NOTIFICATION_WORKERS = int(os.getenv("NOTIFICATION_WORKERS", "2"))
+NOTIFICATION_BATCH_SIZE = int(os.getenv("NOTIFICATION_BATCH_SIZE", "20"))
+NOTIFICATION_MAX_ATTEMPTS = int(os.getenv("NOTIFICATION_MAX_ATTEMPTS", "5"))
+NOTIFICATION_RETRY_SECONDS = float(os.getenv("NOTIFICATION_RETRY_SECONDS", "1"))
+SMTP_HOST = os.getenv("SMTP_HOST", "localhost")
+SMTP_PORT = int(os.getenv("SMTP_PORT", "25"))
+SMTP_SENDER = os.getenv("SMTP_SENDER", "no-reply@example.com")
+
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "true").lower() in ("1", "true", "yes")
+# Shared directory for per-worker snapshots; set it when running several workers.
+METRICS_MULTIPROC_DIR = os.getenv("METRICS_MULTIPROC_DIR", "")
+METRICS_FLUSH_SECONDS = float(os.getenv("METRICS_FLUSH_SECONDS", "5"))
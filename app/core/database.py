@@ -1,16 +1,139 @@
+import threading
+import time
 from sqlalchemy import create_engine
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
-from app.core.config import DATABASE_URL
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+from fastapi.concurrency import iterate_in_threadpool, run_in_threadpool
+from app.core.config import DATABASE_URL, ASYNC_DATABASE, ASYNC_DATABASE_URL, DATABASE_REPLICA_SELECTION, DATABASE_REPLICA_URLS, DB_POOL_SIZE, DB_MAX_OVERFLOW, DB_POOL_TIMEOUT, DB_POOL_RECYCLE, DB_POOL_PRE_PING, SQLITE_PERFORMANCE_MODE, _async_url
+from app.core.replicas import ReplicaRouter, RoutingSession, choose_replica
+from app.core.sqlite import configure_sqlite
 
-if DATABASE_URL.startswith("sqlite"):
-    engine = create_engine(
-        DATABASE_URL, connect_args={"check_same_thread": False}
+class PoolWaitStats:
+    def __init__(self):
+        self.checkouts = 0
+        self.timeouts = 0
+        self.wait_seconds_total = 0.0
+        self.wait_seconds_max = 0.0
+        self._lock = threading.Lock()
+
+    def record(self, wait: float, timed_out: bool) -> None:
+        with self._lock:
+            if timed_out:
+                self.timeouts += 1
+            else:
+                self.checkouts += 1
+            self.wait_seconds_total += wait
+            self.wait_seconds_max = max(self.wait_seconds_max, wait)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "checkouts": self.checkouts,
+                "timeouts": self.timeouts,
+                "wait_seconds_total": self.wait_seconds_total,
+                "wait_seconds_max": self.wait_seconds_max,
+            }
+
+class _TimedPool:
+    # Times how long each checkout waits for a free connection. The stats live on the
+    # class so they survive Pool.recreate() after engine.dispose().
+    wait_stats: PoolWaitStats
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except PoolTimeoutError:
+            self.wait_stats.record(time.perf_counter() - start, timed_out=True)
+            raise
+        self.wait_stats.record(time.perf_counter() - start, timed_out=False)
+        return connection
+
+class TimedQueuePool(_TimedPool, QueuePool):
+    wait_stats = PoolWaitStats()
+
+class TimedAsyncQueuePool(_TimedPool, AsyncAdaptedQueuePool):
+    wait_stats = PoolWaitStats()
+
+def _is_memory_sqlite(url: str) -> bool:
+    return url.split("?")[0].rstrip("/").endswith((":", ":memory:")) or "mode=memory" in url
+
+def pool_options(url: str, poolclass) -> dict:
+    if url.startswith("sqlite") and _is_memory_sqlite(url):
+        # In-memory SQLite needs its single static connection.
+        return {}
+    if url.startswith("sqlite"):
+        # A local file: connections are cheap and never go stale.
+        defaults = {"pool_size": 5, "max_overflow": 10, "pool_timeout": 30, "pool_recycle": -1, "pool_pre_ping": False}
+    else:
+        # A network server: recycle before common idle timeouts and check connections on checkout.
+        defaults = {"pool_size": 10, "max_overflow": 20, "pool_timeout": 30, "pool_recycle": 1800, "pool_pre_ping": True}
+    configured = {
+        "pool_size": DB_POOL_SIZE,
+        "max_overflow": DB_MAX_OVERFLOW,
+        "pool_timeout": DB_POOL_TIMEOUT,
+        "pool_recycle": DB_POOL_RECYCLE,
+        "pool_pre_ping": DB_POOL_PRE_PING,
+    }
+    options = {key: value if value is not None else defaults[key] for key, value in configured.items()}
+    return {"poolclass": poolclass, **options}
+
+def _timed(poolclass):
+    # Each replica gets its own subclass so its wait stats are not merged with the primary's.
+    return type(poolclass.__name__, (poolclass,), {"wait_stats": PoolWaitStats()})
+
+def _tuned(url: str) -> bool:
+    return SQLITE_PERFORMANCE_MODE and url.startswith("sqlite") and not _is_memory_sqlite(url)
+
+def _create_engine(url: str, poolclass=TimedQueuePool):
+    connect_args = {"check_same_thread": False} if url.startswith("sqlite") else {}
+    created = create_engine(url, connect_args=connect_args, **pool_options(url, poolclass))
+    if _tuned(url):
+        configure_sqlite(created)
+    return created
+
+def _create_async_engine(url: str, poolclass=TimedAsyncQueuePool):
+    created = create_async_engine(url, **pool_options(url, poolclass))
+    if _tuned(url):
+        configure_sqlite(created, is_async=True)
+    return created
+
+engine = _create_engine(DATABASE_URL)
+replica_engines = [_create_engine(url, _timed(TimedQueuePool)) for url in DATABASE_REPLICA_URLS]
+replica_router = ReplicaRouter(replica_engines, DATABASE_REPLICA_SELECTION) if replica_engines else None
+
+SessionLocal = sessionmaker(class_=RoutingSession, autocommit=False, autoflush=False, bind=engine, info={"replicas": replica_router})
+
+async_engine = None
+async_replica_engines = []
+AsyncSessionLocal = None
+if ASYNC_DATABASE:
+    async_engine = _create_async_engine(ASYNC_DATABASE_URL)
+    async_replica_engines = [_create_async_engine(_async_url(url), _timed(TimedAsyncQueuePool)) for url in DATABASE_REPLICA_URLS]
+    # RoutingSession binds sync engines, so the async router holds each replica's sync_engine.
+    async_replica_router = ReplicaRouter([replica.sync_engine for replica in async_replica_engines], DATABASE_REPLICA_SELECTION) if async_replica_engines else None
+    AsyncSessionLocal = async_sessionmaker(
+        async_engine, sync_session_class=RoutingSession, autoflush=False, expire_on_commit=False, info={"replicas": async_replica_router}
     )
-else:
-    engine = create_engine(DATABASE_URL)
 
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+def pool_stats(engine) -> dict:
+    pool = engine.pool
+    stats = {"pool": type(pool).__name__}
+    if isinstance(pool, QueuePool):
+        stats.update({
+            "size": pool.size(),
+            "checked_in": pool.checkedin(),
+            "checked_out": pool.checkedout(),
+            "overflow": max(0, pool.overflow()),
+            "max_overflow": pool._max_overflow,
+            "timeout": pool.timeout(),
+        })
+    if isinstance(pool, _TimedPool):
+        stats.update(pool.wait_stats.snapshot())
+    return stats
 
 Base = declarative_base()
 
@@ -20,3 +143,70 @@ def get_db():
         yield db
     finally:
         db.close()
+
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
+
+# Routes depend on get_session; it resolves to the async or sync session factory
+# depending on ASYNC_DATABASE.
+get_session = get_async_db if ASYNC_DATABASE else get_db
+
+async def run_db(db, fn, *args, **kwargs):
+    # Services are written against a sync Session. On an AsyncSession they run through
+    # run_sync, so their I/O is awaited on the event loop; a sync Session is handed to
+    # the threadpool instead. Functions marked read_only run against a replica when the
+    # session routes reads (see app.core.replicas).
+    replica = choose_replica(db, fn)
+    if replica is not None:
+        db.info["replica"] = replica
+    try:
+        if isinstance(db, AsyncSession):
+            return await db.run_sync(lambda session: fn(session, *args, **kwargs))
+        return await run_in_threadpool(fn, db, *args, **kwargs)
+    finally:
+        db.info.pop("replica", None)
+
+def attach(db, instance):
+    # merge(load=False) adopts a detached instance into this session without a SELECT.
+    session = db.sync_session if isinstance(db, AsyncSession) else db
+    return session.merge(instance, load=False)
+
+async def release_db(db, *instances) -> None:
+    """Return db's connection to the pool before a long wait that needs no database, such as
+    password hashing. instances are detached first, so the rollback does not expire them;
+    re-attach them with attach() before writing."""
+
+    def release(session):
+        for instance in instances:
+            session.expunge(instance)
+        session.rollback()
+
+    await run_db(db, release)
+
+async def run_db_and_release(db, fn, *args, **kwargs):
+    """run_db, then detach everything the session loaded and return its connection to the
+    pool within the same call, so waiting for a free thread can never pin a connection."""
+
+    def call(session):
+        try:
+            return fn(session, *args, **kwargs)
+        finally:
+            session.expunge_all()
+            session.rollback()
+
+    call.read_only = getattr(fn, "read_only", False)
+    return await run_db(db, call)
+
+async def stream_db(db, stmt, batch_size: int = 500):
+    # Yields result rows in batches of batch_size. yield_per turns on server-side
+    # cursors where the driver supports them, so the full result is never buffered.
+    stmt = stmt.execution_options(yield_per=batch_size)
+    if isinstance(db, AsyncSession):
+        result = await db.stream(stmt)
+        async for rows in result.partitions():
+            yield rows
+    else:
+        result = await run_in_threadpool(db.execute, stmt)
+        async for rows in iterate_in_threadpool(result.partitions()):
+            yield rows
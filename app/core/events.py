@@ -0,0 +1,147 @@
+import asyncio
+import json
+import threading
+from typing import Any, AsyncIterator, Optional
+from app.core.config import REDIS_URL, TODO_EVENTS_BACKEND, TODO_EVENTS_QUEUE_SIZE
+
+# Yielded by Subscription.events when nothing arrived within the heartbeat interval.
+HEARTBEAT = object()
+
+class Subscription:
+    """A bounded event queue owned by one consumer on one event loop. A consumer that
+    falls ``maxsize`` events behind is dropped rather than buffered further."""
+
+    def __init__(self, bus: "EventBus", channel: str, maxsize: int):
+        self.channel = channel
+        self.dropped = False
+        self._bus = bus
+        self._loop = asyncio.get_running_loop()
+        self._queue: asyncio.Queue = asyncio.Queue(maxsize)
+
+    def offer(self, event: Any) -> None:
+        # May be called from any thread; the queue is only touched on the owner's loop.
+        try:
+            self._loop.call_soon_threadsafe(self._put, event)
+        except RuntimeError:
+            self._bus.unsubscribe(self)
+
+    def _put(self, event: Any) -> None:
+        if self.dropped:
+            return
+        try:
+            self._queue.put_nowait(event)
+        except asyncio.QueueFull:
+            self.dropped = True
+            self._bus.unsubscribe(self, dropped=True)
+            while not self._queue.empty():
+                self._queue.get_nowait()
+            self._queue.put_nowait(None)
+
+    async def events(self, heartbeat: Optional[float] = None) -> AsyncIterator[Any]:
+        while True:
+            try:
+                event = await asyncio.wait_for(self._queue.get(), heartbeat)
+            except asyncio.TimeoutError:
+                yield HEARTBEAT
+                continue
+            if event is None:
+                return
+            yield event
+
+    def close(self) -> None:
+        self._bus.unsubscribe(self)
+
+    def __enter__(self) -> "Subscription":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+class EventBus:
+    """Fans events out to subscribers of a channel in this process. With a backend,
+    publish goes through it and every worker's bus delivers what the backend relays."""
+
+    def __init__(self, queue_size: int, backend=None):
+        self.queue_size = queue_size
+        self.backend = backend
+        self.dropped = 0
+        self._subscribers: dict = {}
+        self._lock = threading.Lock()
+
+    def publish(self, channel: str, event: Any) -> None:
+        if self.backend is not None:
+            self.backend.publish(channel, event)
+        else:
+            self.deliver(channel, event)
+
+    def deliver(self, channel: str, event: Any) -> None:
+        with self._lock:
+            subscribers = list(self._subscribers.get(channel, ()))
+        for subscription in subscribers:
+            subscription.offer(event)
+
+    def subscribe(self, channel: str) -> Subscription:
+        if self.backend is not None:
+            self.backend.start(self)
+        subscription = Subscription(self, channel, self.queue_size)
+        with self._lock:
+            self._subscribers.setdefault(channel, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription, dropped: bool = False) -> None:
+        with self._lock:
+            subscribers = self._subscribers.get(subscription.channel)
+            if subscribers is None or subscription not in subscribers:
+                return
+            subscribers.discard(subscription)
+            if not subscribers:
+                del self._subscribers[subscription.channel]
+            if dropped:
+                self.dropped += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"subscribers": sum(len(subs) for subs in self._subscribers.values()), "dropped": self.dropped}
+
+class RedisEventBackend:
+    """Relays events between workers over Redis pub/sub. The listener thread starts with
+    the first local subscriber."""
+
+    def __init__(self, client, prefix: str = "events:"):
+        self._client = client
+        self._prefix = prefix
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def publish(self, channel: str, event: Any) -> None:
+        self._client.publish(self._prefix + channel, json.dumps(event))
+
+    def start(self, bus: EventBus) -> None:
+        with self._lock:
+            if self._thread is not None:
+                return
+
+            def handle(message):
+                channel = message["channel"]
+                if isinstance(channel, bytes):
+                    channel = channel.decode()
+                bus.deliver(channel[len(self._prefix):], json.loads(message["data"]))
+
+            pubsub = self._client.pubsub(ignore_subscribe_messages=True)
+            pubsub.psubscribe(**{self._prefix + "*": handle})
+            self._thread = pubsub.run_in_thread(sleep_time=1, daemon=True)
+
+    def stop(self) -> None:
+        with self._lock:
+            if self._thread is not None:
+                self._thread.stop()
+                self._thread = None
+
+def create_event_bus(kind: str, queue_size: int, prefix: str = "events:") -> EventBus:
+    if kind == "redis":
+        import redis
+        return EventBus(queue_size, RedisEventBackend(redis.Redis.from_url(REDIS_URL), prefix))
+    return EventBus(queue_size)
+
+# Todo change notifications, one channel per user id (see todo_service).
+todo_events = create_event_bus(TODO_EVENTS_BACKEND, TODO_EVENTS_QUEUE_SIZE, prefix="todos:events:")
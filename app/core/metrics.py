@@ -0,0 +1,266 @@
+import fcntl
+import glob
+import json
+import math
+import os
+import time
+import uuid
+from bisect import bisect_left
+from contextlib import contextmanager
+from typing import Dict, Iterable, List, Optional, Tuple
+from starlette.routing import get_route_path
+from app.core.config import METRICS_ENABLED, METRICS_FLUSH_SECONDS, METRICS_MULTIPROC_DIR
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Requests that matched no route share one label, so raw paths never become series.
+UNMATCHED_ROUTE = "<unmatched>"
+
+class RequestMetrics:
+    """Request latency histograms for this worker, keyed by (method, route, status).
+    Only the event loop thread records, so the counters are plain lists and need no lock."""
+
+    def __init__(self, buckets: Tuple[float, ...] = LATENCY_BUCKETS):
+        self.buckets = buckets
+        # Per-bucket counts (the last one is +Inf) followed by the sum of observed seconds.
+        self._series: Dict[Tuple[str, str, str], list] = {}
+
+    def observe(self, method: str, route: str, status: int, seconds: float) -> None:
+        key = (method, route, str(status))
+        series = self._series.get(key)
+        if series is None:
+            series = self._series[key] = [0] * (len(self.buckets) + 1) + [0.0]
+        series[bisect_left(self.buckets, seconds)] += 1
+        series[-1] += seconds
+
+    def snapshot(self) -> List[list]:
+        return [[*key, list(series)] for key, series in list(self._series.items())]
+
+    def clear(self) -> None:
+        self._series.clear()
+
+def route_template(scope) -> str:
+    route = scope.get("route")
+    template = getattr(route, "path", None)
+    if template is None:
+        return UNMATCHED_ROUTE
+    # Routes of an included router may only know their own part of the template; the
+    # router prefix in front of the part they matched is static, so it is kept verbatim.
+    path = get_route_path(scope)
+    regex = getattr(route, "path_regex", None)
+    if regex is not None and not regex.match(path):
+        for index in range(1, len(path)):
+            if path[index] == "/" and regex.match(path[index:]):
+                return path[:index] + template
+    return template
+
+class MetricsMiddleware:
+    """Pure ASGI middleware; it times each HTTP request and labels it with the matched
+    route template rather than the raw path. Streaming responses (server-sent events,
+    exports) can stay open for hours, so they are timed to the response start instead."""
+
+    def __init__(self, app, metrics: RequestMetrics):
+        self.app = app
+        self.metrics = metrics
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        start = time.perf_counter()
+        status = 500
+        started = None
+        streaming = None
+
+        async def send_wrapper(message):
+            nonlocal status, started, streaming
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                started = time.perf_counter()
+                headers = dict(message.get("headers") or ())
+                if headers.get(b"content-type", b"").startswith(b"text/event-stream"):
+                    streaming = True
+            elif message["type"] == "http.response.body" and streaming is None:
+                # A body sent in several chunks is streamed.
+                streaming = message.get("more_body", False)
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            end = started if streaming and started is not None else time.perf_counter()
+            # The router stores the matched route in the scope it was given, which is this one.
+            self.metrics.observe(scope["method"], route_template(scope), status, end - start)
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+def _labels(labels: dict) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in labels.items()) + "}"
+
+def _value(value: float) -> str:
+    return "+Inf" if value == math.inf else repr(value)
+
+def merge_requests(snapshots: Iterable[List[list]]) -> Dict[Tuple[str, str, str], list]:
+    merged: Dict[Tuple[str, str, str], list] = {}
+    for snapshot in snapshots:
+        for method, route, status, series in snapshot:
+            key = (method, route, status)
+            total = merged.get(key)
+            merged[key] = list(series) if total is None else [a + b for a, b in zip(total, series)]
+    return merged
+
+def render_requests(series: Dict[Tuple[str, str, str], list], buckets: Tuple[float, ...] = LATENCY_BUCKETS) -> List[str]:
+    name = "http_request_duration_seconds"
+    lines = [f"# HELP {name} HTTP request latency by route template, method and status.", f"# TYPE {name} histogram"]
+    for (method, route, status), counts in sorted(series.items()):
+        labels = {"method": method, "route": route, "status": status}
+        cumulative = 0
+        for bound, count in zip((*buckets, math.inf), counts):
+            cumulative += count
+            lines.append(f"{name}_bucket{_labels({**labels, 'le': _value(bound)})} {cumulative}")
+        lines.append(f"{name}_sum{_labels(labels)} {_value(counts[-1])}")
+        lines.append(f"{name}_count{_labels(labels)} {cumulative}")
+    return lines
+
+def render_gauges(samples: Iterable[Tuple[str, dict, float]]) -> List[str]:
+    """Render (name, labels, value) samples as gauges, grouped under one TYPE line per name."""
+    by_name: Dict[str, list] = {}
+    for name, labels, value in samples:
+        by_name.setdefault(name, []).append((labels, value))
+    lines = []
+    for name in sorted(by_name):
+        lines.append(f"# TYPE {name} gauge")
+        lines.extend(f"{name}{_labels(labels)} {_value(value)}" for labels, value in by_name[name])
+    return lines
+
+def stat_samples(component: str, stats: dict, labels: Optional[dict] = None) -> List[Tuple[str, dict, float]]:
+    # Only numeric stats become samples; descriptive values such as a pool class name are skipped.
+    return [
+        (f"app_{component}_{key}", labels or {}, value)
+        for key, value in stats.items()
+        if isinstance(value, (int, float)) and not isinstance(value, bool)
+    ]
+
+class MultiprocessStore:
+    """One JSON snapshot file per worker in a shared directory. A scrape may land on any
+    worker; it merges every file, summing request histograms across workers and labelling
+    runtime gauges with the worker pid. Files are named by pid and a token drawn when the
+    worker first writes, so a new worker that reuses a pid never overwrites a dead one's
+    counts. Gauges from files not refreshed within three flush intervals are left out.
+    Once such a file's worker is gone, its request counts are folded into an archive
+    file and the file is removed, so totals never go backwards."""
+
+    ARCHIVE = "archive.json"
+
+    def __init__(self, directory: str, flush_seconds: float):
+        self.directory = directory
+        self.flush_seconds = flush_seconds
+        self._pid = None
+        self._token = None
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self) -> str:
+        # Drawn per process: workers forked from one parent must not share a token.
+        if self._pid != os.getpid():
+            self._pid = os.getpid()
+            self._token = uuid.uuid4().hex[:12]
+        return os.path.join(self.directory, f"worker-{self._pid}-{self._token}.json")
+
+    def write(self, requests: List[list], samples: List[Tuple[str, dict, float]]) -> None:
+        path = self._path()
+        temporary = f"{path}.tmp"
+        with open(temporary, "w", encoding="utf-8") as file:
+            json.dump({"requests": requests, "samples": samples}, file)
+        os.replace(temporary, path)
+
+    def _workers(self) -> List[Tuple[str, str, float]]:
+        workers = []
+        for path in glob.glob(os.path.join(self.directory, "worker-*.json")):
+            try:
+                modified = os.path.getmtime(path)
+            except OSError:
+                continue
+            pid = os.path.basename(path)[len("worker-"):].split("-", 1)[0]
+            workers.append((path, pid, modified))
+        return workers
+
+    @staticmethod
+    def _alive(pid: str) -> bool:
+        try:
+            os.kill(int(pid), 0)
+        except ProcessLookupError:
+            return False
+        except (PermissionError, ValueError):
+            return True
+        return True
+
+    @contextmanager
+    def _locked(self, operation: int):
+        # Scrapes on several workers may archive at once; the lock keeps a file from being
+        # folded in twice, and keeps readers from seeing it in neither place.
+        with open(os.path.join(self.directory, f"{self.ARCHIVE}.lock"), "a") as lock:
+            fcntl.flock(lock, operation)
+            yield
+
+    def _archive(self, paths: List[str]) -> None:
+        archive = os.path.join(self.directory, self.ARCHIVE)
+        with self._locked(fcntl.LOCK_EX):
+            snapshots, archived = [self._load(archive)], []
+            for path in paths:
+                data = self._load(path, None)
+                if data is not None:
+                    snapshots.append(data)
+                    archived.append(path)
+            if not archived:
+                return
+            temporary = f"{archive}.tmp"
+            with open(temporary, "w", encoding="utf-8") as file:
+                json.dump([[*key, series] for key, series in merge_requests(snapshots).items()], file)
+            os.replace(temporary, archive)
+            for path in archived:
+                os.remove(path)
+
+    @staticmethod
+    def _load(path: str, default=()):
+        try:
+            with open(path, encoding="utf-8") as file:
+                data = json.load(file)
+        except (OSError, ValueError):
+            return default
+        return data["requests"] if isinstance(data, dict) else data
+
+    def read(self) -> Tuple[Dict[Tuple[str, str, str], list], List[Tuple[str, dict, float]]]:
+        stale_before = time.time() - 3 * self.flush_seconds
+        workers = self._workers()
+        newest: Dict[str, float] = {}
+        for _, pid, modified in workers:
+            newest[pid] = max(newest.get(pid, 0.0), modified)
+        # A stale file is dead once its pid has exited or been reused by a newer worker.
+        dead = [
+            path for path, pid, modified in workers
+            if modified < stale_before and (newest[pid] > modified or not self._alive(pid))
+        ]
+        if dead:
+            self._archive(dead)
+
+        snapshots, samples = [], []
+        with self._locked(fcntl.LOCK_SH):
+            snapshots.append(self._load(os.path.join(self.directory, self.ARCHIVE)))
+            for path, pid, modified in workers:
+                if path in dead:
+                    continue
+                try:
+                    with open(path, encoding="utf-8") as file:
+                        data = json.load(file)
+                except (OSError, ValueError):
+                    continue
+                snapshots.append(data["requests"])
+                if modified >= stale_before:
+                    samples.extend((name, {**labels, "pid": pid}, value) for name, labels, value in data["samples"])
+        return merge_requests(snapshots), samples
+
+request_metrics = RequestMetrics()
+multiprocess_store = MultiprocessStore(METRICS_MULTIPROC_DIR, METRICS_FLUSH_SECONDS) if METRICS_ENABLED and METRICS_MULTIPROC_DIR else None
@@ -0,0 +1,218 @@
+import asyncio
+import json
+import logging
+import smtplib
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from email.message import EmailMessage
+from typing import List
+from fastapi.concurrency import run_in_threadpool
+from app.core.config import NOTIFICATION_BATCH_SIZE, NOTIFICATION_FILE_PATH, NOTIFICATION_MAX_ATTEMPTS, NOTIFICATION_RETRY_SECONDS, NOTIFICATION_SINK, NOTIFICATION_WORKERS, SMTP_HOST, SMTP_PORT, SMTP_SENDER
+
+logger = logging.getLogger(__name__)
+
+@dataclass
+class Notification:
+    to: str
+    subject: str
+    body: str
+    attempts: int = 0
+    enqueued_at: float = field(default_factory=time.monotonic)
+
+# Sinks return the messages they could not deliver. An exception means none of the batch
+# was delivered.
+
+class ConsoleSink:
+    """Logs that a message would be sent. Bodies carry one-time codes, so they are never
+    logged; use the file sink to read them in development."""
+
+    def send(self, messages: List[Notification]) -> List[Notification]:
+        for message in messages:
+            logger.info("Notification %r for %s", message.subject, message.to)
+        return []
+
+class FileSink:
+    """Appends one JSON line per message; a stand-in for a mail server in tests and development."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+
+    def send(self, messages: List[Notification]) -> List[Notification]:
+        lines = "".join(json.dumps({"to": m.to, "subject": m.subject, "body": m.body}) + "\n" for m in messages)
+        with self._lock, open(self.path, "a", encoding="utf-8") as file:
+            file.write(lines)
+        return []
+
+class SMTPSink:
+    """Sends each batch over a single SMTP connection. Messages the server rejects, and
+    those not reached before the connection failed, are returned for a retry; the ones
+    already accepted are not sent again."""
+
+    def __init__(self, host: str, port: int, sender: str):
+        self.host = host
+        self.port = port
+        self.sender = sender
+
+    def send(self, messages: List[Notification]) -> List[Notification]:
+        delivered = set()
+        try:
+            with smtplib.SMTP(self.host, self.port, timeout=30) as smtp:
+                for index, message in enumerate(messages):
+                    email = EmailMessage()
+                    email["From"] = self.sender
+                    email["To"] = message.to
+                    email["Subject"] = message.subject
+                    email.set_content(message.body)
+                    try:
+                        smtp.send_message(email)
+                    except (smtplib.SMTPRecipientsRefused, smtplib.SMTPResponseException):
+                        logger.warning("SMTP server rejected notification to %s", message.to)
+                        continue
+                    delivered.add(index)
+        except (smtplib.SMTPException, OSError):
+            logger.exception("SMTP delivery failed after %d of %d message(s)", len(delivered), len(messages))
+        return [message for index, message in enumerate(messages) if index not in delivered]
+
+class NotificationOutbox:
+    """Queue of outgoing messages, delivered in batches by worker tasks on the event loop
+    that called start(). enqueue is thread-safe and never waits on delivery. Messages the
+    sink could not deliver are retried with exponential backoff, up to max_attempts each;
+    the rest of their batch is not sent again."""
+
+    def __init__(self, sink, workers: int, batch_size: int, max_attempts: int, retry_delay: float):
+        self.sink = sink
+        self.workers = workers
+        self.batch_size = batch_size
+        self.max_attempts = max_attempts
+        self.retry_delay = retry_delay
+        self.sent = 0
+        self.failed = 0
+        self.retries = 0
+        self.in_flight = 0
+        self.latency_seconds_total = 0.0
+        self.latency_seconds_max = 0.0
+        self._pending: deque = deque()
+        self._lock = threading.Lock()
+        self._loop = None
+        self._wakeup = None
+        self._tasks: list = []
+        # Retries waiting out their backoff, by message id. Only touched on the loop thread.
+        self._scheduled: dict = {}
+        self._stopping = False
+
+    def enqueue(self, message: Notification) -> None:
+        with self._lock:
+            self._pending.append(message)
+        loop = self._loop
+        if loop is not None:
+            try:
+                loop.call_soon_threadsafe(self._wakeup.set)
+            except RuntimeError:
+                pass
+
+    async def start(self) -> None:
+        self._loop = asyncio.get_running_loop()
+        self._wakeup = asyncio.Event()
+        self._tasks = [asyncio.create_task(self._work()) for _ in range(self.workers)]
+        if self._pending:
+            self._wakeup.set()
+
+    async def stop(self, timeout: float = 5.0) -> None:
+        # Give queued messages a chance to go out before the workers are cancelled. Retries
+        # still waiting out their backoff are queued now instead of being dropped with the loop.
+        self._stopping = True
+        for handle, message in list(self._scheduled.values()):
+            handle.cancel()
+            self._requeue(message)
+        deadline = time.monotonic() + timeout
+        while (self._pending or self.in_flight) and time.monotonic() < deadline:
+            await asyncio.sleep(0.05)
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        if self._pending:
+            # They stay queued for a later start(); a process that exits here loses them.
+            logger.error("Outbox stopped with %d undelivered notification(s)", len(self._pending))
+        self._tasks = []
+        self._loop = None
+        self._stopping = False
+
+    def _take(self) -> List[Notification]:
+        with self._lock:
+            batch = [self._pending.popleft() for _ in range(min(self.batch_size, len(self._pending)))]
+            self.in_flight += len(batch)
+            return batch
+
+    async def _work(self) -> None:
+        while True:
+            batch = self._take()
+            if not batch:
+                self._wakeup.clear()
+                # Re-check after clearing so a message enqueued in between is not missed.
+                batch = self._take()
+                if not batch:
+                    await self._wakeup.wait()
+                    continue
+            try:
+                undelivered = await run_in_threadpool(self.sink.send, batch) or []
+            except Exception:
+                logger.exception("Notification delivery failed for %d message(s)", len(batch))
+                undelivered = batch
+            try:
+                now = time.monotonic()
+                failed = {id(message) for message in undelivered}
+                for message in batch:
+                    if id(message) in failed:
+                        continue
+                    self.sent += 1
+                    latency = now - message.enqueued_at
+                    self.latency_seconds_total += latency
+                    self.latency_seconds_max = max(self.latency_seconds_max, latency)
+                self._retry(undelivered)
+            finally:
+                with self._lock:
+                    self.in_flight -= len(batch)
+
+    def _requeue(self, message: Notification) -> None:
+        self._scheduled.pop(id(message), None)
+        self.enqueue(message)
+
+    def _retry(self, messages: List[Notification]) -> None:
+        for message in messages:
+            message.attempts += 1
+            if message.attempts >= self.max_attempts:
+                self.failed += 1
+                logger.error("Dropping notification to %s after %d attempts", message.to, message.attempts)
+                continue
+            self.retries += 1
+            if self._stopping:
+                # Shutting down: retry within stop()'s timeout rather than after the backoff.
+                self._requeue(message)
+                continue
+            delay = self.retry_delay * 2 ** (message.attempts - 1)
+            self._scheduled[id(message)] = (self._loop.call_later(delay, self._requeue, message), message)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "queue_depth": len(self._pending),
+                "in_flight": self.in_flight,
+                "scheduled_retries": len(self._scheduled),
+                "sent": self.sent,
+                "failed": self.failed,
+                "retries": self.retries,
+                "latency_seconds_total": self.latency_seconds_total,
+                "latency_seconds_max": self.latency_seconds_max,
+            }
+
+def create_sink(kind: str):
+    if kind == "file":
+        return FileSink(NOTIFICATION_FILE_PATH)
+    if kind == "smtp":
+        return SMTPSink(SMTP_HOST, SMTP_PORT, SMTP_SENDER)
+    return ConsoleSink()
+
+outbox = NotificationOutbox(create_sink(NOTIFICATION_SINK), NOTIFICATION_WORKERS, NOTIFICATION_BATCH_SIZE, NOTIFICATION_MAX_ATTEMPTS, NOTIFICATION_RETRY_SECONDS)
@@ -0,0 +1,151 @@
+import datetime
+import heapq
+import hmac
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+from sqlalchemy import delete
+from sqlalchemy.orm import Session
+from app.core.config import OTP_MAX_ATTEMPTS, OTP_STORE, OTP_TTL_SECONDS, REDIS_URL
+from app.models import OTPCode
+
+# Stores hold at most one pending code per email. verify consumes the code on success,
+# counts a failed attempt otherwise, and discards the code after max_attempts failures.
+# check is verify without consuming a valid code, for callers with expensive work to do
+# before they consume it.
+# The db argument is only used by TableOTPStore; its changes are committed by the caller.
+
+class MemoryOTPStore:
+    """Codes held in this process; only suitable for a single worker."""
+
+    def __init__(self, ttl: float, max_attempts: int):
+        self.ttl = ttl
+        self.max_attempts = max_attempts
+        self._codes: Dict[str, list] = {}
+        # (expires_at, email) min-heap. Entries of replaced or consumed codes are left in
+        # place and skipped when they surface, since the heap can not remove from the middle.
+        self._expiry: List[Tuple[float, str]] = []
+        self._lock = threading.Lock()
+
+    def issue(self, db: Session, email: str, code: str, ttl: Optional[float] = None) -> None:
+        now = time.monotonic()
+        with self._lock:
+            while self._expiry and self._expiry[0][0] <= now:
+                _, expired = heapq.heappop(self._expiry)
+                entry = self._codes.get(expired)
+                if entry is not None and entry[1] <= now:
+                    del self._codes[expired]
+            self._codes.pop(email, None)
+            if ttl is None or ttl > 0:
+                expires_at = now + (self.ttl if ttl is None else ttl)
+                self._codes[email] = [code, expires_at, 0]
+                heapq.heappush(self._expiry, (expires_at, email))
+
+    def check(self, db: Session, email: str, code: str) -> bool:
+        return self.verify(db, email, code, consume=False)
+
+    def verify(self, db: Session, email: str, code: str, consume: bool = True) -> bool:
+        with self._lock:
+            entry = self._codes.get(email)
+            if entry is None or entry[1] <= time.monotonic():
+                self._codes.pop(email, None)
+                return False
+            if not hmac.compare_digest(entry[0], code):
+                entry[2] += 1
+                if entry[2] >= self.max_attempts:
+                    del self._codes[email]
+                return False
+            if consume:
+                del self._codes[email]
+            return True
+
+    def clear(self) -> None:
+        with self._lock:
+            self._codes.clear()
+            self._expiry.clear()
+
+class TableOTPStore:
+    """Codes in the otp_codes table, so the users row is not written on every resend."""
+
+    def __init__(self, ttl: float, max_attempts: int):
+        self.ttl = ttl
+        self.max_attempts = max_attempts
+
+    def issue(self, db: Session, email: str, code: str, ttl: Optional[float] = None) -> None:
+        now = datetime.datetime.utcnow()
+        db.execute(delete(OTPCode).where(OTPCode.expires_at <= now))
+        expires_at = now + datetime.timedelta(seconds=self.ttl if ttl is None else ttl)
+        db.merge(OTPCode(email=email, code=code, expires_at=expires_at, attempts=0))
+        db.flush()
+
+    def check(self, db: Session, email: str, code: str) -> bool:
+        return self.verify(db, email, code, consume=False)
+
+    def verify(self, db: Session, email: str, code: str, consume: bool = True) -> bool:
+        entry = db.get(OTPCode, email)
+        if entry is None:
+            return False
+        expired = entry.expires_at <= datetime.datetime.utcnow()
+        valid = not expired and hmac.compare_digest(entry.code, code)
+        if not valid and not expired:
+            entry.attempts += 1
+        if (valid and consume) or expired or entry.attempts >= self.max_attempts:
+            db.delete(entry)
+        db.flush()
+        return valid
+
+    def clear(self) -> None:
+        pass
+
+class RedisOTPStore:
+    """Codes in a Redis hash per email, expired by Redis itself."""
+
+    def __init__(self, client, ttl: float, max_attempts: int, prefix: str = "otp:"):
+        self._client = client
+        self.ttl = ttl
+        self.max_attempts = max_attempts
+        self._prefix = prefix
+
+    def issue(self, db: Session, email: str, code: str, ttl: Optional[float] = None) -> None:
+        key = self._prefix + email
+        ttl = self.ttl if ttl is None else ttl
+        pipe = self._client.pipeline()
+        pipe.delete(key)
+        if ttl > 0:
+            pipe.hset(key, mapping={"code": code, "attempts": 0})
+            pipe.pexpire(key, int(ttl * 1000))
+        pipe.execute()
+
+    def check(self, db: Session, email: str, code: str) -> bool:
+        return self.verify(db, email, code, consume=False)
+
+    def verify(self, db: Session, email: str, code: str, consume: bool = True) -> bool:
+        key = self._prefix + email
+        stored = self._client.hget(key, "code")
+        if stored is None:
+            return False
+        if not hmac.compare_digest(stored.decode(), code):
+            attempts, ttl = self._client.pipeline().hincrby(key, "attempts", 1).pttl(key).execute()
+            # A negative ttl means the code expired meanwhile and hincrby recreated the key.
+            if attempts >= self.max_attempts or ttl < 0:
+                self._client.delete(key)
+            return False
+        if not consume:
+            return True
+        # Only the request that actually removes the key gets to use the code.
+        return self._client.delete(key) == 1
+
+    def clear(self) -> None:
+        keys = list(self._client.scan_iter(match=self._prefix + "*"))
+        if keys:
+            self._client.delete(*keys)
+
+def create_otp_store(kind: str, ttl: float, max_attempts: int):
+    if kind == "memory":
+        return MemoryOTPStore(ttl, max_attempts)
+    if kind == "redis":
+        import redis
+        return RedisOTPStore(redis.Redis.from_url(REDIS_URL), ttl, max_attempts)
+    return TableOTPStore(ttl, max_attempts)
+
+otp_store = create_otp_store(OTP_STORE, OTP_TTL_SECONDS, OTP_MAX_ATTEMPTS)
@@ -0,0 +1,80 @@
+import threading
+import time
+from collections import OrderedDict
+from app.core.config import RATE_LIMIT_BACKEND, RATE_LIMIT_MAX_KEYS, REDIS_URL
+
+class MemoryRateLimitBackend:
+    """Token buckets held in this process. At most ``maxsize`` buckets are kept; the least
+    recently used one is evicted first, which only ever refills it early."""
+
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self._buckets: "OrderedDict[str, tuple[float, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    async def acquire(self, key: str, capacity: int, rate: float) -> float:
+        now = time.monotonic()
+        with self._lock:
+            tokens, updated = self._buckets.get(key, (capacity, now))
+            tokens = min(capacity, tokens + (now - updated) * rate)
+            retry_after = 0.0
+            if tokens >= 1:
+                tokens -= 1
+            else:
+                retry_after = (1 - tokens) / rate
+            self._buckets[key] = (tokens, now)
+            self._buckets.move_to_end(key)
+            while len(self._buckets) > self.maxsize:
+                self._buckets.popitem(last=False)
+            return retry_after
+
+    async def clear(self) -> None:
+        with self._lock:
+            self._buckets.clear()
+
+class RedisRateLimitBackend:
+    """Token buckets shared by all workers. Each bucket is a hash updated in a WATCH/MULTI
+    transaction, so concurrent requests can not both take the last token."""
+
+    def __init__(self, client, prefix: str = "ratelimit:"):
+        self._client = client
+        self._prefix = prefix
+
+    async def acquire(self, key: str, capacity: int, rate: float) -> float:
+        key = self._prefix + key
+        retry_after = 0.0
+
+        async def take(pipe):
+            nonlocal retry_after
+            now = time.time()
+            state = await pipe.hmget(key, "tokens", "updated")
+            tokens = float(state[0]) if state[0] is not None else capacity
+            updated = float(state[1]) if state[1] is not None else now
+            tokens = min(capacity, tokens + max(0.0, now - updated) * rate)
+            retry_after = 0.0
+            if tokens >= 1:
+                tokens -= 1
+            else:
+                retry_after = (1 - tokens) / rate
+            pipe.multi()
+            pipe.hset(key, mapping={"tokens": tokens, "updated": now})
+            pipe.expire(key, int(capacity / rate) + 1)
+
+        await self._client.transaction(take, key)
+        return retry_after
+
+    async def clear(self) -> None:
+        keys = [key async for key in self._client.scan_iter(match=self._prefix + "*")]
+        if keys:
+            await self._client.delete(*keys)
+
+def create_rate_limit_backend(kind: str, maxsize: int):
+    if kind == "none":
+        return None
+    if kind == "redis":
+        import redis.asyncio
+        return RedisRateLimitBackend(redis.asyncio.Redis.from_url(REDIS_URL))
+    return MemoryRateLimitBackend(maxsize)
+
+# Buckets for the auth endpoints (see deps.rate_limit).
+rate_limit_backend = create_rate_limit_backend(RATE_LIMIT_BACKEND, RATE_LIMIT_MAX_KEYS)
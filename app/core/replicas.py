@@ -0,0 +1,107 @@
+import itertools
+import threading
+import time
+from collections import OrderedDict
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from app.core.config import REDIS_URL, REPLICA_PIN_BACKEND, REPLICA_PIN_MAX_KEYS, REPLICA_PIN_SECONDS
+
+def read_only(fn):
+    """Marks a service function that only reads, so run_db may send it to a replica."""
+    fn.read_only = True
+    return fn
+
+class ReplicaRouter:
+    """Picks a replica engine per read-only call, round-robin or by fewest checked-out connections."""
+
+    def __init__(self, engines: list, selection: str = "round_robin"):
+        self.engines = engines
+        self.selection = selection
+        self._counter = itertools.count()
+
+    def choose(self):
+        if self.selection == "least_connections":
+            return min(self.engines, key=lambda engine: getattr(engine.pool, "checkedout", lambda: 0)())
+        return self.engines[next(self._counter) % len(self.engines)]
+
+class RoutingSession(Session):
+    """Binds to the replica run_db selected for the current read-only call, and to the
+    primary otherwise. Flushes always go to the primary."""
+
+    def get_bind(self, mapper=None, clause=None, **kw):
+        replica = self.info.get("replica")
+        if replica is not None and not self._flushing:
+            return replica
+        return super().get_bind(mapper=mapper, clause=clause, **kw)
+
+class MemoryReplicaPins:
+    """Subjects recently written by this process; only suitable for a single worker."""
+
+    def __init__(self, seconds: float, maxsize: int):
+        self.seconds = seconds
+        self.maxsize = maxsize
+        self._pins: "OrderedDict[str, float]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def pin(self, subject: str) -> None:
+        with self._lock:
+            self._pins[subject] = time.monotonic() + self.seconds
+            self._pins.move_to_end(subject)
+            while len(self._pins) > self.maxsize:
+                self._pins.popitem(last=False)
+
+    def pinned(self, subject: str) -> bool:
+        now = time.monotonic()
+        with self._lock:
+            # Every pin lasts the same window, so expired ones are swept from the front.
+            while self._pins and next(iter(self._pins.values())) <= now:
+                self._pins.popitem(last=False)
+            return subject in self._pins
+
+    def clear(self) -> None:
+        with self._lock:
+            self._pins.clear()
+
+class RedisReplicaPins:
+    """Pins shared by all workers, expired by Redis itself."""
+
+    def __init__(self, client, seconds: float, prefix: str = "replica-pin:"):
+        self._client = client
+        self.seconds = seconds
+        self._prefix = prefix
+
+    def pin(self, subject: str) -> None:
+        self._client.set(self._prefix + subject, 1, px=int(self.seconds * 1000))
+
+    def pinned(self, subject: str) -> bool:
+        return bool(self._client.exists(self._prefix + subject))
+
+    def clear(self) -> None:
+        keys = list(self._client.scan_iter(match=self._prefix + "*"))
+        if keys:
+            self._client.delete(*keys)
+
+def create_replica_pins(kind: str, seconds: float, maxsize: int):
+    if kind == "redis":
+        import redis
+        return RedisReplicaPins(redis.Redis.from_url(REDIS_URL), seconds)
+    return MemoryReplicaPins(seconds, maxsize)
+
+# Read-your-writes: after a commit, the session's subject (the authenticated email, see
+# deps.get_current_user) reads from the primary for REPLICA_PIN_SECONDS.
+replica_pins = create_replica_pins(REPLICA_PIN_BACKEND, REPLICA_PIN_SECONDS, REPLICA_PIN_MAX_KEYS)
+
+@event.listens_for(RoutingSession, "after_commit")
+def pin_subject(session):
+    subject = session.info.get("subject")
+    if subject is not None and session.info.get("replicas") is not None:
+        replica_pins.pin(subject)
+
+def choose_replica(db, fn):
+    router = db.info.get("replicas")
+    if router is None or not getattr(fn, "read_only", False):
+        return None
+    subject = db.info.get("subject")
+    if subject is not None and replica_pins.pinned(subject):
+        return None
+    return router.choose()
@@ -1,19 +1,113 @@
+import asyncio
 import random
 import string
+import threading
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
 from datetime import datetime, timedelta, timezone
 from typing import Optional
 from jose import JWTError, jwt
 from passlib.context import CryptContext
-from app.core.config import SECRET_KEY, ALGORITHM, ACCESS_TOKEN_EXPIRE_MINUTES, REFRESH_TOKEN_EXPIRE_DAYS
+from sqlalchemy.util.concurrency import await_only, in_greenlet
+from app.core.config import SECRET_KEY, ALGORITHM, ACCESS_TOKEN_EXPIRE_MINUTES, REFRESH_TOKEN_EXPIRE_DAYS, PASSWORD_HASH_EXECUTOR, PASSWORD_HASH_WORKERS, PASSWORD_HASH_MAX_QUEUE, PASSWORD_HASH_SCHEME, PASSWORD_HASH_ROUNDS
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+def build_pwd_context(scheme: str = "bcrypt", rounds: Optional[int] = None) -> CryptContext:
+    # bcrypt stays verifiable after switching schemes; deprecated="auto" marks it for rehash.
+    schemes = [scheme] if scheme == "bcrypt" else [scheme, "bcrypt"]
+    settings = {}
+    if rounds is not None:
+        # Pinning min and max to the target cost makes needs_update flag both cheaper
+        # and more expensive hashes.
+        for key in ("default_rounds", "min_rounds", "max_rounds"):
+            settings[f"{scheme}__{key}"] = rounds
+    return CryptContext(schemes=schemes, deprecated="auto", **settings)
 
-def verify_password(plain_password, hashed_password):
+pwd_context = build_pwd_context(PASSWORD_HASH_SCHEME, PASSWORD_HASH_ROUNDS)
+
+_hash_executor: Optional[Executor] = None
+_hash_lock = threading.Lock()
+_hash_stats = {"in_flight": 0, "completed": 0, "rejected": 0, "wait_seconds_total": 0.0, "wait_seconds_max": 0.0}
+
+class PasswordHashingBusy(RuntimeError):
+    """Raised instead of queueing when PASSWORD_HASH_MAX_QUEUE hashes are already waiting."""
+
+def _verify(plain_password, hashed_password):
     return pwd_context.verify(plain_password, hashed_password)
 
-def get_password_hash(password):
+def _hash(password):
     return pwd_context.hash(password)
 
+def _timed(fn, submitted_at, *args):
+    return time.monotonic() - submitted_at, fn(*args)
+
+def get_hash_executor() -> Executor:
+    global _hash_executor
+    with _hash_lock:
+        if _hash_executor is None:
+            if PASSWORD_HASH_EXECUTOR == "process":
+                _hash_executor = ProcessPoolExecutor(max_workers=PASSWORD_HASH_WORKERS)
+            else:
+                _hash_executor = ThreadPoolExecutor(max_workers=PASSWORD_HASH_WORKERS, thread_name_prefix="password-hash")
+        return _hash_executor
+
+def shutdown_hash_executor() -> None:
+    global _hash_executor
+    with _hash_lock:
+        if _hash_executor is not None:
+            _hash_executor.shutdown(wait=True)
+            _hash_executor = None
+
+def _record_done(future) -> None:
+    with _hash_lock:
+        _hash_stats["in_flight"] -= 1
+        if not future.cancelled() and future.exception() is None:
+            wait = future.result()[0]
+            _hash_stats["completed"] += 1
+            _hash_stats["wait_seconds_total"] += wait
+            _hash_stats["wait_seconds_max"] = max(_hash_stats["wait_seconds_max"], wait)
+
+def _submit(fn, *args):
+    executor = get_hash_executor()
+    with _hash_lock:
+        # Admission control: past the queue limit, fail fast rather than tie up another
+        # request thread waiting for a worker.
+        if _hash_stats["in_flight"] - PASSWORD_HASH_WORKERS >= PASSWORD_HASH_MAX_QUEUE:
+            _hash_stats["rejected"] += 1
+            raise PasswordHashingBusy("Password hashing is overloaded")
+        _hash_stats["in_flight"] += 1
+    future = executor.submit(_timed, fn, time.monotonic(), *args)
+    future.add_done_callback(_record_done)
+    return future
+
+def _run_in_hash_executor(fn, *args):
+    future = _submit(fn, *args)
+    if in_greenlet():
+        # Called from AsyncSession.run_sync: yield to the event loop while bcrypt runs.
+        return await_only(asyncio.wrap_future(future))[1]
+    return future.result()[1]
+
+def hash_executor_stats() -> dict:
+    with _hash_lock:
+        stats = dict(_hash_stats)
+    stats["workers"] = PASSWORD_HASH_WORKERS
+    stats["queue_depth"] = max(0, stats["in_flight"] - PASSWORD_HASH_WORKERS)
+    return stats
+
+def verify_password(plain_password, hashed_password):
+    return _run_in_hash_executor(_verify, plain_password, hashed_password)
+
+def get_password_hash(password):
+    return _run_in_hash_executor(_hash, password)
+
+async def verify_password_async(plain_password, hashed_password):
+    return (await asyncio.wrap_future(_submit(_verify, plain_password, hashed_password)))[1]
+
+async def hash_password(password):
+    return (await asyncio.wrap_future(_submit(_hash, password)))[1]
+
+def password_needs_rehash(hashed_password) -> bool:
+    return pwd_context.needs_update(hashed_password)
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     to_encode = data.copy()
     if expires_delta:
@@ -0,0 +1,81 @@
+import asyncio
+import threading
+from sqlalchemy import event
+from sqlalchemy.util.concurrency import await_only, in_greenlet
+from app.core.config import SQLITE_BUSY_TIMEOUT_MS, SQLITE_CACHE_SIZE_KB, SQLITE_MMAP_SIZE
+
+WRITE_STATEMENTS = ("INSERT", "UPDATE", "DELETE", "REPLACE", "CREATE", "DROP", "ALTER")
+
+def sqlite_pragmas() -> list:
+    return [
+        "PRAGMA journal_mode=WAL",
+        # In WAL mode NORMAL only syncs at checkpoints, so commits do not wait on fsync.
+        "PRAGMA synchronous=NORMAL",
+        f"PRAGMA busy_timeout={SQLITE_BUSY_TIMEOUT_MS}",
+        f"PRAGMA cache_size=-{SQLITE_CACHE_SIZE_KB}",
+        f"PRAGMA mmap_size={SQLITE_MMAP_SIZE}",
+        "PRAGMA temp_store=MEMORY",
+    ]
+
+class WriterLock:
+    """One writer at a time per engine. The lock is taken before a transaction's first
+    write statement and released when it commits or rolls back, so writers in this process
+    queue here instead of spinning on SQLITE_BUSY. Async engines wait on an asyncio.Lock so
+    the event loop is never blocked."""
+
+    def __init__(self, is_async: bool = False):
+        self.is_async = is_async
+        self._lock = asyncio.Lock() if is_async else threading.Lock()
+
+    def acquire(self) -> None:
+        if self.is_async and in_greenlet():
+            await_only(self._lock.acquire())
+        else:
+            self._lock.acquire()
+
+    def release(self) -> None:
+        self._lock.release()
+
+    def locked(self) -> bool:
+        return self._lock.locked()
+
+def configure_sqlite(engine, is_async: bool = False) -> WriterLock:
+    """Apply the performance pragmas and the single-writer lock to an SQLite engine."""
+    sync_engine = engine.sync_engine if is_async else engine
+    writer = WriterLock(is_async)
+
+    @event.listens_for(sync_engine, "connect")
+    def set_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for pragma in sqlite_pragmas():
+            cursor.execute(pragma)
+        cursor.close()
+
+    @event.listens_for(sync_engine, "before_cursor_execute")
+    def take_writer(connection, cursor, statement, parameters, context, executemany):
+        if not connection.info.get("sqlite_writer") and statement.lstrip()[:7].upper().startswith(WRITE_STATEMENTS):
+            writer.acquire()
+            connection.info["sqlite_writer"] = True
+
+    def release_writer(connection_info) -> None:
+        if connection_info.pop("sqlite_writer", False):
+            writer.release()
+
+    @event.listens_for(sync_engine, "commit")
+    def on_commit(connection):
+        release_writer(connection.info)
+
+    @event.listens_for(sync_engine, "rollback")
+    def on_rollback(connection):
+        release_writer(connection.info)
+
+    @event.listens_for(sync_engine.pool, "reset")
+    def on_reset(dbapi_connection, connection_record, reset_state):
+        # Safety net for connections returned to the pool mid-transaction.
+        release_writer(connection_record.info)
+
+    @event.listens_for(sync_engine.pool, "invalidate")
+    def on_invalidate(dbapi_connection, connection_record, exception):
+        release_writer(connection_record.info)
+
+    return writer
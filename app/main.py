@@ -1,15 +1,58 @@
-from fastapi import FastAPI
+import asyncio
+import logging
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import JSONResponse
 from app.models import User, Todo
-from app.core.database import engine, Base
+from app.core.config import METRICS_ENABLED, TODO_TOMBSTONE_COMPACT_SECONDS
+from app.core.database import engine, Base, SessionLocal
+from app.core.metrics import MetricsMiddleware, multiprocess_store, request_metrics
+from app.core.notifications import outbox
+from app.core.security import PasswordHashingBusy, shutdown_hash_executor
+from app.api import internal, metrics
 from app.api.v1 import api_router
+from app.services import compact_tombstones
+
+logger = logging.getLogger(__name__)
 
 # Create database tables
 Base.metadata.create_all(bind=engine)
 
+def _compact_tombstones(session_factory) -> int:
+    with session_factory() as db:
+        return compact_tombstones(db)
+
+async def compact_tombstones_periodically(session_factory=SessionLocal, interval: float = TODO_TOMBSTONE_COMPACT_SECONDS) -> None:
+    # Deletes already compact their owner's tombstones; this sweep covers users who stopped deleting.
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            await run_in_threadpool(_compact_tombstones, session_factory)
+        except Exception:
+            logger.exception("Tombstone compaction failed")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await outbox.start()
+    flusher = asyncio.create_task(metrics.flush_metrics_periodically()) if multiprocess_store is not None else None
+    compactor = asyncio.create_task(compact_tombstones_periodically()) if TODO_TOMBSTONE_COMPACT_SECONDS > 0 else None
+    yield
+    if compactor is not None:
+        compactor.cancel()
+        await asyncio.gather(compactor, return_exceptions=True)
+    if flusher is not None:
+        flusher.cancel()
+        await asyncio.gather(flusher, return_exceptions=True)
+        await metrics.flush_metrics()
+    await outbox.stop()
+    shutdown_hash_executor()
+
 app = FastAPI(
     title="FastAPI Todo API",
     description="A well-structured FastAPI application with user authentication and todo management",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 from fastapi.middleware.cors import CORSMiddleware
@@ -25,10 +68,22 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["ETag", "X-Next-Cursor"],
 )
 
+if METRICS_ENABLED:
+    # Added last so it wraps every other middleware and times the whole request.
+    app.add_middleware(MetricsMiddleware, metrics=request_metrics)
+
 # Include API router
 app.include_router(api_router)
+app.include_router(internal.router)
+if METRICS_ENABLED:
+    app.include_router(metrics.router)
+
+@app.exception_handler(PasswordHashingBusy)
+async def password_hashing_busy_handler(request: Request, exc: PasswordHashingBusy):
+    return JSONResponse(status_code=503, content={"detail": str(exc)}, headers={"Retry-After": "1"})
 
 @app.get("/")
 def read_root():
@@ -1,4 +1,5 @@
 from app.models.user import User
-from app.models.todo import Todo
+from app.models.todo import Todo, TodoSyncState, TodoTombstone
+from app.models.otp import OTPCode
 
-__all__ = ["User", "Todo"]
\ No newline at end of file
+__all__ = ["User", "Todo", "TodoTombstone", "TodoSyncState", "OTPCode"]
\ No newline at end of file
@@ -0,0 +1,11 @@
+from sqlalchemy import Column, Integer, String, DateTime
+from app.core.database import Base
+
+class OTPCode(Base):
+    """Pending one-time code for an email, used by the "table" OTP store."""
+    __tablename__ = "otp_codes"
+
+    email = Column(String, primary_key=True)
+    code = Column(String, nullable=False)
+    expires_at = Column(DateTime, nullable=False, index=True)
+    attempts = Column(Integer, default=0, nullable=False)
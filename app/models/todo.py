@@ -1,10 +1,14 @@
-from sqlalchemy import Column, Integer, String, Boolean, DateTime, ForeignKey
+from sqlalchemy import Column, Integer, String, Boolean, DateTime, ForeignKey, Index, event, inspect, text
 from sqlalchemy.orm import relationship
 from app.core.database import Base
 import datetime
 
 class Todo(Base):
     __tablename__ = "todos"
+    __table_args__ = (
+        Index("ix_todos_user_id_is_archived_id", "user_id", "is_archived", "id"),
+        Index("ix_todos_user_id_change_seq", "user_id", "change_seq"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     title = Column(String, index=True)
@@ -14,5 +18,84 @@ class Todo(Base):
     user_id = Column(Integer, ForeignKey("users.id"))
     created_at = Column(DateTime, default=lambda: datetime.datetime.utcnow())
     updated_at = Column(DateTime, default=lambda: datetime.datetime.utcnow(), onupdate=lambda: datetime.datetime.utcnow())
+    change_seq = Column(Integer, default=0, nullable=False)
 
     owner = relationship("User", back_populates="todos")
+
+class TodoTombstone(Base):
+    """Marks a deleted todo so sync clients can drop it."""
+    __tablename__ = "todo_tombstones"
+    __table_args__ = (
+        Index("ix_todo_tombstones_user_id_seq", "user_id", "seq"),
+    )
+
+    id = Column(Integer, primary_key=True)
+    todo_id = Column(Integer, nullable=False)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    seq = Column(Integer, nullable=False)
+    deleted_at = Column(DateTime, default=lambda: datetime.datetime.utcnow())
+
+class TodoSyncState(Base):
+    """Per-user change sequence for todo sync, and the highest sequence whose tombstones
+    have been compacted away. Kept off the users row, which every todo write would
+    otherwise update."""
+    __tablename__ = "todo_sync_state"
+
+    user_id = Column(Integer, ForeignKey("users.id"), primary_key=True)
+    change_seq = Column(Integer, default=0, nullable=False)
+    tombstone_seq = Column(Integer, default=0, nullable=False)
+
+# Full-text index over title and description. It lives outside the ORM metadata:
+# SQLite keeps an FTS5 external-content table in sync through triggers, and
+# PostgreSQL uses a generated tsvector column with a GIN index.
+SQLITE_SEARCH_DDL = [
+    "CREATE VIRTUAL TABLE todos_fts USING fts5(title, description, content='todos', content_rowid='id')",
+    """CREATE TRIGGER todos_fts_ai AFTER INSERT ON todos BEGIN
+        INSERT INTO todos_fts(rowid, title, description) VALUES (new.id, new.title, new.description);
+    END""",
+    """CREATE TRIGGER todos_fts_ad AFTER DELETE ON todos BEGIN
+        INSERT INTO todos_fts(todos_fts, rowid, title, description) VALUES ('delete', old.id, old.title, old.description);
+    END""",
+    """CREATE TRIGGER todos_fts_au AFTER UPDATE OF title, description ON todos BEGIN
+        INSERT INTO todos_fts(todos_fts, rowid, title, description) VALUES ('delete', old.id, old.title, old.description);
+        INSERT INTO todos_fts(rowid, title, description) VALUES (new.id, new.title, new.description);
+    END""",
+    "INSERT INTO todos_fts(todos_fts) VALUES ('rebuild')",
+]
+
+POSTGRES_SEARCH_DDL = [
+    """ALTER TABLE todos ADD COLUMN search_vector tsvector GENERATED ALWAYS AS (
+        setweight(to_tsvector('english', coalesce(title, '')), 'A') ||
+        setweight(to_tsvector('english', coalesce(description, '')), 'B')
+    ) STORED""",
+    "CREATE INDEX ix_todos_search_vector ON todos USING GIN (search_vector)",
+]
+
+@event.listens_for(Base.metadata, "after_create")
+def create_search_index(target, connection, **kw):
+    # Runs on every create_all, so databases created before search existed get the
+    # index (and a one-off rebuild) on the next start.
+    if connection.dialect.name == "sqlite":
+        exists = connection.execute(text("SELECT 1 FROM sqlite_master WHERE name = 'todos_fts'")).first()
+        statements = [] if exists else SQLITE_SEARCH_DDL
+    elif connection.dialect.name == "postgresql":
+        columns = {column["name"] for column in inspect(connection).get_columns("todos")}
+        statements = [] if "search_vector" in columns else POSTGRES_SEARCH_DDL
+    else:
+        statements = []
+    for statement in statements:
+        connection.execute(text(statement))
+
+@event.listens_for(Base.metadata, "after_create")
+def add_change_seq_column(target, connection, **kw):
+    # create_all skips tables that already exist, so todos tables created before sync
+    # existed get the column and its index here.
+    columns = {column["name"] for column in inspect(connection).get_columns("todos")}
+    if "change_seq" not in columns:
+        connection.execute(text("ALTER TABLE todos ADD COLUMN change_seq INTEGER DEFAULT 0 NOT NULL"))
+        connection.execute(text("CREATE INDEX ix_todos_user_id_change_seq ON todos (user_id, change_seq)"))
+
+@event.listens_for(Todo.__table__, "after_drop")
+def drop_search_index(target, connection, **kw):
+    if connection.dialect.name == "sqlite":
+        connection.execute(text("DROP TABLE IF EXISTS todos_fts"))
@@ -13,8 +13,6 @@ class User(Base):
     hashed_password = Column(String)
     is_active = Column(Boolean, default=True)
     is_verified = Column(Boolean, default=False)
-    otp_code = Column(String, nullable=True)
-    otp_created_at = Column(DateTime, nullable=True)
     created_at = Column(DateTime, default=lambda: datetime.datetime.utcnow())
 
     todos = relationship("Todo", back_populates="owner")
@@ -1,9 +1,9 @@
 from app.schemas.user import User, UserBase, UserCreate, UserUpdate
-from app.schemas.todo import Todo, TodoBase, TodoCreate, TodoUpdate
+from app.schemas.todo import Todo, TodoBase, TodoCreate, TodoUpdate, TodoChanges, TodoBulkSelection, TodoBulkUpdate, TodoBulkResult, TodoImportError, TodoImportResult
 from app.schemas.auth import Token, TokenData, LoginRequest, UserVerify, PasswordChange, PasswordResetRequest, PasswordResetConfirm
 
 __all__ = [
     "User", "UserBase", "UserCreate", "UserUpdate",
-    "Todo", "TodoBase", "TodoCreate", "TodoUpdate",
+    "Todo", "TodoBase", "TodoCreate", "TodoUpdate", "TodoChanges", "TodoBulkSelection", "TodoBulkUpdate", "TodoBulkResult", "TodoImportError", "TodoImportResult",
     "Token", "TokenData", "LoginRequest", "UserVerify", "PasswordChange", "PasswordResetRequest", "PasswordResetConfirm"
 ]
\ No newline at end of file
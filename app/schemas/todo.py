@@ -1,6 +1,7 @@
-from pydantic import BaseModel
-from typing import Optional
+from pydantic import BaseModel, Field, model_validator
+from typing import List, Optional
 from datetime import datetime
+from app.core.config import TODO_BULK_MAX_ITEMS
 
 class TodoBase(BaseModel):
     title: str
@@ -25,3 +26,36 @@ class Todo(TodoBase):
 
     class Config:
         from_attributes = True
+
+class TodoChanges(BaseModel):
+    todos: List[Todo]
+    deleted: List[int]
+    cursor: str
+    has_more: bool = False
+
+class TodoBulkSelection(BaseModel):
+    ids: Optional[List[int]] = Field(None, max_length=TODO_BULK_MAX_ITEMS)
+    is_completed: Optional[bool] = None
+    is_archived: Optional[bool] = None
+
+    @model_validator(mode="after")
+    def require_selector(self):
+        if self.ids is None and self.is_completed is None and self.is_archived is None:
+            raise ValueError("Select todos by ids or by a filter")
+        return self
+
+class TodoBulkUpdate(TodoBulkSelection):
+    value: bool = True
+
+class TodoBulkResult(BaseModel):
+    ids: List[int]
+    count: int
+
+class TodoImportError(BaseModel):
+    line: int
+    error: str
+
+class TodoImportResult(BaseModel):
+    imported: int
+    failed: int
+    errors: List[TodoImportError]
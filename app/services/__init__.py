@@ -1,9 +1,11 @@
 from app.services.user_service import create_user, get_user_by_email, get_user_by_id, update_user
-from app.services.todo_service import create_todo, delete_todo, get_todo_by_id, get_todos_by_user, toggle_todo_archive, toggle_todo_complete, update_todo
-from app.services.auth_service import authenticate_user, change_password, create_tokens, regenerate_otp, reset_password, verify_otp
+from app.services.todo_service import TODO_FIELDS, ChangeCursorExpired, archive_todos, compact_tombstones, complete_todos, create_todo, create_todos, decode_change_cursor, decode_cursor, decode_search_cursor, delete_todo, delete_todos, encode_change_cursor, encode_cursor, encode_search_cursor, export_todos_query, format_csv, format_ndjson, get_todo_by_id, get_todo_changes, get_todo_fields_by_id, get_todo_fields_by_user, get_todo_for_update, get_todo_json_by_id, get_todo_version, get_todo_versions_by_user, get_todos_by_user, get_todos_by_user_cached, import_todos, parse_csv, parse_ndjson, search_todos, todos_etag, toggle_todo_archive, toggle_todo_complete, update_todo
+from app.services.notification_service import send_otp
+from app.services.auth_service import authenticate_user, change_password, check_reset_otp, create_tokens, regenerate_otp, reset_password, set_password_hash, verify_otp
 
 __all__ = [
     "create_user", "get_user_by_email", "get_user_by_id", "update_user",
-    "create_todo", "delete_todo", "get_todo_by_id", "get_todos_by_user", "toggle_todo_archive", "toggle_todo_complete", "update_todo",
-    "authenticate_user", "change_password", "create_tokens", "regenerate_otp", "reset_password", "verify_otp"
+    "TODO_FIELDS", "ChangeCursorExpired", "archive_todos", "compact_tombstones", "complete_todos", "create_todo", "create_todos", "decode_change_cursor", "decode_cursor", "decode_search_cursor", "delete_todo", "delete_todos", "encode_change_cursor", "encode_cursor", "encode_search_cursor", "export_todos_query", "format_csv", "format_ndjson", "get_todo_by_id", "get_todo_changes", "get_todo_fields_by_id", "get_todo_fields_by_user", "get_todo_for_update", "get_todo_json_by_id", "get_todo_version", "get_todo_versions_by_user", "get_todos_by_user", "get_todos_by_user_cached", "import_todos", "parse_csv", "parse_ndjson", "search_todos", "todos_etag", "toggle_todo_archive", "toggle_todo_complete", "update_todo",
+    "send_otp",
+    "authenticate_user", "change_password", "check_reset_otp", "create_tokens", "regenerate_otp", "reset_password", "set_password_hash", "verify_otp"
 ]
\ No newline at end of file
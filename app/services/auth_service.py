@@ -1,8 +1,10 @@
+from typing import Optional
 from sqlalchemy.orm import Session
 from app.models import User
 from app.schemas import Token
-from app.core.security import verify_password, create_access_token, create_refresh_token, generate_otp
-import datetime
+from app.core.cache import user_cache
+from app.core.otp import otp_store
+from app.core.security import PasswordHashingBusy, verify_password, get_password_hash, password_needs_rehash, create_access_token, create_refresh_token, generate_otp
 
 def authenticate_user(db: Session, email: str, password: str) -> User | None:
     user = db.query(User).filter(User.email == email).first()
@@ -10,8 +12,20 @@ def authenticate_user(db: Session, email: str, password: str) -> User | None:
         return None
     if not verify_password(password, user.hashed_password):
         return None
+    if password_needs_rehash(user.hashed_password):
+        try:
+            set_password_hash(db, user, get_password_hash(password))
+        except PasswordHashingBusy:
+            # The login already succeeded; the upgrade is retried on a later one.
+            pass
     return user
 
+def set_password_hash(db: Session, user: User, hashed_password: str) -> None:
+    email = user.email
+    user.hashed_password = hashed_password
+    db.commit()
+    user_cache.invalidate(email)
+
 def create_tokens(user: User) -> Token:
     access_token = create_access_token(data={"sub": user.email})
     refresh_token = create_refresh_token(data={"sub": user.email})
@@ -27,15 +41,14 @@ def verify_otp(db: Session, email: str, otp: str) -> bool:
     if not user:
         return False
     
-    if user.otp_code != otp:
-        return False
-    
-    if datetime.datetime.utcnow() > user.otp_created_at + datetime.timedelta(minutes=5):
+    if not otp_store.verify(db, email, otp):
+        # Keeps the failed attempt count when codes live in the database.
+        db.commit()
         return False
     
     user.is_verified = True
-    user.otp_code = None
     db.commit()
+    user_cache.invalidate(email)
     
     return True
 
@@ -45,8 +58,7 @@ def regenerate_otp(db: Session, email: str) -> str:
         raise ValueError("User not found")
     
     otp = generate_otp()
-    user.otp_code = otp
-    user.otp_created_at = datetime.datetime.utcnow()
+    otp_store.issue(db, email, otp)
     db.commit()
     
     return otp
@@ -55,22 +67,27 @@ def change_password(db: Session, user: User, old_password: str, new_password: st
     if not verify_password(old_password, user.hashed_password):
         raise ValueError("Incorrect old password")
     
-    from app.core.security import get_password_hash
-    user.hashed_password = get_password_hash(new_password)
-    db.commit()
+    set_password_hash(db, user, get_password_hash(new_password))
 
-def reset_password(db: Session, email: str, otp: str, new_password: str) -> None:
+def check_reset_otp(db: Session, email: str, otp: str) -> None:
+    """Raise ValueError unless email has a user and otp is its pending code. The code is
+    not consumed, so routes can hash the new password before calling reset_password."""
+    user = db.query(User).filter(User.email == email).first()
+    if not user:
+        raise ValueError("User not found")
+
+    if not otp_store.check(db, email, otp):
+        db.commit()
+        raise ValueError("Invalid or expired OTP")
+
+def reset_password(db: Session, email: str, otp: str, new_password: str, hashed_password: Optional[str] = None) -> None:
+    # Routes pass hashed_password, computed on the hash executor after check_reset_otp.
     user = db.query(User).filter(User.email == email).first()
     if not user:
         raise ValueError("User not found")
     
-    if user.otp_code != otp:
-        raise ValueError("Invalid OTP")
-    
-    if datetime.datetime.utcnow() > user.otp_created_at + datetime.timedelta(minutes=5):
-        raise ValueError("OTP expired")
+    if not otp_store.verify(db, email, otp):
+        db.commit()
+        raise ValueError("Invalid or expired OTP")
     
-    from app.core.security import get_password_hash
-    user.hashed_password = get_password_hash(new_password)
-    user.otp_code = None
-    db.commit()
+    set_password_hash(db, user, hashed_password or get_password_hash(new_password))
@@ -0,0 +1,12 @@
+from app.core.config import OTP_TTL_SECONDS
+from app.core.notifications import Notification, outbox
+
+OTP_SUBJECTS = {
+    "verify": "Verify your account",
+    "reset": "Reset your password",
+}
+
+def send_otp(email: str, otp: str, purpose: str = "verify") -> None:
+    minutes = max(1, int(OTP_TTL_SECONDS // 60))
+    body = f"Your code is {otp}. It expires in {minutes} minutes."
+    outbox.enqueue(Notification(to=email, subject=OTP_SUBJECTS[purpose], body=body))
@@ -1,45 +1,484 @@
-from sqlalchemy.orm import Session
-from typing import List, Optional
-from app.models import Todo
-from app.schemas import TodoCreate, TodoUpdate
+import base64
+import datetime
+import csv
+import hashlib
+import io
+import json
+from sqlalchemy import Select, column, delete, func, insert, literal_column, not_, select, table, tuple_, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.engine import Row
+from sqlalchemy.orm import Session, make_transient_to_detached
+from typing import IO, Iterable, Iterator, List, Optional, Tuple
+from pydantic import ValidationError
+from app.core.cache import todo_cache
+from app.core.events import todo_events
+from app.core.replicas import read_only
+from app.core.config import TODO_BULK_CHUNK_SIZE, TODO_CHANGES_PAGE_SIZE, TODO_IMPORT_BATCH_SIZE, TODO_IMPORT_MAX_ERRORS, TODO_TOMBSTONE_RETENTION_DAYS
+from app.models import Todo, TodoSyncState, TodoTombstone
+from app.schemas import Todo as TodoSchema, TodoBulkSelection, TodoChanges, TodoCreate, TodoImportError, TodoImportResult, TodoUpdate
 
-def get_todos_by_user(db: Session, user_id: int, skip: int = 0, limit: int = 100, archived: Optional[bool] = None) -> List[Todo]:
-    query = db.query(Todo).filter(Todo.user_id == user_id)
+def encode_cursor(todo_id: int) -> str:
+    return base64.urlsafe_b64encode(str(todo_id).encode()).decode().rstrip("=")
+
+def decode_cursor(cursor: str) -> int:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        return int(base64.urlsafe_b64decode(padded.encode()).decode())
+    except (ValueError, UnicodeDecodeError):
+        raise ValueError("Invalid cursor")
+
+def encode_change_cursor(seq: int, todo_id: Optional[int] = None) -> str:
+    # A caught-up cursor is the plain sequence number; a mid-page one also carries the id
+    # of the last change returned, since one sequence number can cover many todos.
+    if todo_id is None:
+        return encode_cursor(seq)
+    return base64.urlsafe_b64encode(json.dumps([seq, todo_id]).encode()).decode().rstrip("=")
+
+def decode_change_cursor(cursor: str) -> Tuple[int, Optional[int]]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        position = json.loads(base64.urlsafe_b64decode(padded.encode()).decode())
+        if isinstance(position, int):
+            return position, None
+        seq, todo_id = position
+        return int(seq), int(todo_id)
+    except (ValueError, TypeError, UnicodeDecodeError):
+        raise ValueError("Invalid cursor")
+
+def encode_search_cursor(score: float, todo_id: int) -> str:
+    return base64.urlsafe_b64encode(json.dumps([score, todo_id]).encode()).decode().rstrip("=")
+
+def decode_search_cursor(cursor: str) -> Tuple[float, int]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        score, todo_id = json.loads(base64.urlsafe_b64decode(padded.encode()).decode())
+        return float(score), int(todo_id)
+    except (ValueError, TypeError, UnicodeDecodeError):
+        raise ValueError("Invalid cursor")
+
+def _todos_by_user_query(db: Session, entities: tuple, user_id: int, skip: int, limit: int, archived: Optional[bool], after_id: Optional[int]):
+    query = db.query(*entities).filter(Todo.user_id == user_id)
     if archived is not None:
         query = query.filter(Todo.is_archived == archived)
-    return query.offset(skip).limit(limit).all()
+    query = query.order_by(Todo.id)
+    if after_id is not None:
+        # Keyset page: seek past the last id instead of scanning skipped rows.
+        return query.filter(Todo.id > after_id).limit(limit)
+    return query.offset(skip).limit(limit)
+
+@read_only
+def get_todos_by_user(db: Session, user_id: int, skip: int = 0, limit: int = 100, archived: Optional[bool] = None, after_id: Optional[int] = None) -> List[Todo]:
+    return _todos_by_user_query(db, (Todo,), user_id, skip, limit, archived, after_id).all()
+
+TODO_FIELDS = list(TodoSchema.model_fields)
+
+def _todo_columns(fields: List[str]) -> tuple:
+    # id and updated_at are always selected: they drive cursors and ETags.
+    names = dict.fromkeys(["id", "updated_at", *fields])
+    return tuple(getattr(Todo, name) for name in names)
 
+def _json_row(row: Row) -> dict:
+    return {key: value.isoformat() if isinstance(value, datetime.datetime) else value for key, value in row._mapping.items()}
+
+@read_only
+def get_todo_fields_by_user(db: Session, user_id: int, fields: List[str], skip: int = 0, limit: int = 100, archived: Optional[bool] = None, after_id: Optional[int] = None) -> List[Row]:
+    return _todos_by_user_query(db, _todo_columns(fields), user_id, skip, limit, archived, after_id).all()
+
+def _todo_list_key(user_id: int, skip: int, limit: int, archived: Optional[bool], after_id: Optional[int], fields: Optional[List[str]]) -> str:
+    version = todo_cache.get_version(str(user_id))
+    return f"{user_id}:v{version}:{skip}:{limit}:{archived}:{after_id}:{','.join(fields or [])}"
+
+@read_only
+def get_todos_by_user_cached(db: Session, user_id: int, skip: int = 0, limit: int = 100, archived: Optional[bool] = None, after_id: Optional[int] = None, fields: Optional[List[str]] = None) -> List[dict]:
+    key = None
+    if todo_cache is not None:
+        key = _todo_list_key(user_id, skip, limit, archived, after_id, fields)
+        cached = todo_cache.get(key)
+        if cached is not None:
+            return json.loads(cached)
+
+    # Plain column rows are converted straight to JSON-ready dicts; building ORM objects
+    # and validating them through the schema costs more than the query itself.
+    rows = get_todo_fields_by_user(db, user_id, fields or TODO_FIELDS, skip, limit, archived, after_id)
+    page = [_json_row(row) for row in rows]
+    # Only primary reads fill the cache: a lagging replica could store a page that predates
+    # a write under the version that write just bumped.
+    if key is not None and db.info.get("replica") is None:
+        todo_cache.set(key, json.dumps(page))
+    return page
+
+def _todos_changed(user_id: int, event: str, ids: List[int], seq: int) -> None:
+    # Called after every committed write. Bumping the version moves the user's cached
+    # list pages to a new key namespace, so stale pages are never read again.
+    if todo_cache is not None:
+        todo_cache.bump_version(str(user_id))
+    todo_events.publish(str(user_id), {"type": event, "ids": ids, "seq": seq})
+
+@read_only
+def get_todo_versions_by_user(db: Session, user_id: int, skip: int = 0, limit: int = 100, archived: Optional[bool] = None, after_id: Optional[int] = None) -> List[Row]:
+    return _todos_by_user_query(db, (Todo.id, Todo.updated_at), user_id, skip, limit, archived, after_id).all()
+
+@read_only
 def get_todo_by_id(db: Session, todo_id: int, user_id: int) -> Todo | None:
     return db.query(Todo).filter(Todo.id == todo_id, Todo.user_id == user_id).first()
 
+# Not read_only: update and delete write the row this returns, so a lagging replica could
+# hand back a todo the primary has already deleted, or miss one it just created.
+def get_todo_for_update(db: Session, todo_id: int, user_id: int) -> Todo | None:
+    return db.query(Todo).filter(Todo.id == todo_id, Todo.user_id == user_id).first()
+
+@read_only
+def get_todo_fields_by_id(db: Session, todo_id: int, user_id: int, fields: List[str]) -> Row | None:
+    return db.query(*_todo_columns(fields)).filter(Todo.id == todo_id, Todo.user_id == user_id).first()
+
+@read_only
+def get_todo_json_by_id(db: Session, todo_id: int, user_id: int, fields: Optional[List[str]] = None) -> dict | None:
+    row = get_todo_fields_by_id(db, todo_id, user_id, fields or TODO_FIELDS)
+    return _json_row(row) if row is not None else None
+
+def _fts5_query(q: str) -> str:
+    # Each word is matched as a quoted phrase, so FTS5 operators in user input are
+    # treated as text.
+    return " ".join('"' + term.replace('"', '""') + '"' for term in q.split())
+
+@read_only
+def search_todos(db: Session, user_id: int, q: str, limit: int = 20, archived: Optional[bool] = None, after: Optional[Tuple[float, int]] = None) -> List[Row]:
+    """Return (Todo, score) rows matching q, best match first. Lower scores rank higher.
+
+    SQLite's bm25 weighs terms by corpus-wide statistics, so a write between two pages can
+    shift scores and the (score, id) cursor may then skip or repeat a row."""
+    if not q.split():
+        # A blank query matches nothing; FTS5 would reject it as a syntax error.
+        return []
+    dialect = db.get_bind().dialect.name
+    if dialect == "sqlite":
+        fts = table("todos_fts", column("rowid"))
+        score = func.bm25(literal_column("todos_fts"))
+        stmt = select(Todo, score).join(fts, fts.c.rowid == Todo.id).where(literal_column("todos_fts").op("MATCH")(_fts5_query(q)))
+    elif dialect == "postgresql":
+        query = func.websearch_to_tsquery("english", q)
+        vector = literal_column("todos.search_vector")
+        score = -func.ts_rank(vector, query)
+        stmt = select(Todo, score).where(vector.op("@@")(query))
+    else:
+        score = literal_column("0.0")
+        # Escape LIKE wildcards so that % and _ in the query only match themselves.
+        escaped = q.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+        pattern = f"%{escaped}%"
+        stmt = select(Todo, score).where(Todo.title.ilike(pattern, escape="\\") | Todo.description.ilike(pattern, escape="\\"))
+
+    stmt = stmt.where(Todo.user_id == user_id)
+    if archived is not None:
+        stmt = stmt.where(Todo.is_archived == archived)
+    if after is not None:
+        stmt = stmt.where(tuple_(score, Todo.id) > tuple_(*after))
+    return db.execute(stmt.order_by(score, Todo.id).limit(limit)).all()
+
+@read_only
+def get_todo_version(db: Session, todo_id: int, user_id: int) -> Row | None:
+    return db.query(Todo.id, Todo.updated_at).filter(Todo.id == todo_id, Todo.user_id == user_id).first()
+
+def todos_etag(versions: Iterable, fields: Optional[List[str]] = None) -> str:
+    # Weak validator over (id, updated_at) pairs: any insert, update or delete that
+    # touches the rows in a response changes it. A sparse field set is a different
+    # representation of the same rows, so it gets its own validator.
+    digest = hashlib.md5(usedforsecurity=False)
+    if fields:
+        digest.update(f"fields={','.join(sorted(fields))};".encode())
+    for todo_id, updated_at in versions:
+        if isinstance(updated_at, datetime.datetime):
+            updated_at = updated_at.isoformat()
+        digest.update(f"{todo_id}:{updated_at or ''};".encode())
+    return f'W/"{digest.hexdigest()}"'
+
+class ChangeCursorExpired(ValueError):
+    pass
+
+def _next_change_seq(db: Session, user_id: int) -> int:
+    # The counter lives in the owner's sync state row. Bumping it locks that row until
+    # commit, so sequence numbers become visible in the order they were handed out.
+    dialect = db.get_bind().dialect
+    state = TodoSyncState.__table__
+    insert_for = {"postgresql": postgresql.insert, "sqlite": sqlite.insert}.get(dialect.name)
+    if insert_for is None:
+        bumped = db.execute(update(state).where(state.c.user_id == user_id).values(change_seq=state.c.change_seq + 1))
+        if not bumped.rowcount:
+            db.execute(insert(state).values(user_id=user_id, change_seq=1))
+    else:
+        stmt = (
+            insert_for(state)
+            .values(user_id=user_id, change_seq=1)
+            .on_conflict_do_update(index_elements=[state.c.user_id], set_={"change_seq": state.c.change_seq + 1})
+        )
+        if dialect.insert_returning:
+            return db.execute(stmt.returning(state.c.change_seq)).scalar_one()
+        db.execute(stmt)
+    return db.execute(select(state.c.change_seq).where(state.c.user_id == user_id)).scalar_one()
+
+def _add_tombstones(db: Session, user_id: int, todo_ids: List[int]) -> Optional[int]:
+    seq = None
+    if todo_ids:
+        seq = _next_change_seq(db, user_id)
+        db.execute(insert(TodoTombstone), [{"todo_id": todo_id, "user_id": user_id, "seq": seq} for todo_id in todo_ids])
+    _compact_tombstones(db, [TodoTombstone.user_id == user_id])
+    return seq
+
+def _compact_tombstones(db: Session, criteria: list, older_than: Optional[datetime.datetime] = None) -> int:
+    if older_than is None:
+        older_than = datetime.datetime.utcnow() - datetime.timedelta(days=TODO_TOMBSTONE_RETENTION_DAYS)
+    criteria = [*criteria, TodoTombstone.deleted_at < older_than]
+    watermarks = db.execute(select(TodoTombstone.user_id, func.max(TodoTombstone.seq)).where(*criteria).group_by(TodoTombstone.user_id)).all()
+    for user_id, seq in watermarks:
+        # Cursors older than this can no longer see every delete and must resync.
+        db.execute(update(TodoSyncState).where(TodoSyncState.user_id == user_id).values(tombstone_seq=seq).execution_options(synchronize_session=False))
+    if not watermarks:
+        return 0
+    return db.execute(delete(TodoTombstone).where(*criteria)).rowcount
+
+def compact_tombstones(db: Session, older_than: Optional[datetime.datetime] = None) -> int:
+    """Drop tombstones older than the retention window for all users."""
+    removed = _compact_tombstones(db, [], older_than)
+    db.commit()
+    return removed
+
+def _after(key: tuple, seq: int, todo_id: Optional[int]):
+    return key[0] > seq if todo_id is None else tuple_(*key) > tuple_(seq, todo_id)
+
+def get_todo_changes(db: Session, user_id: int, since: Optional[int] = None, since_id: Optional[int] = None, limit: int = TODO_CHANGES_PAGE_SIZE) -> TodoChanges:
+    """Todos created, updated or deleted after the since position, or all todos when since
+    is None, in (sequence, id) order. At most limit changes are returned; when has_more is
+    set, the returned cursor continues from the last of them."""
+    state = db.execute(select(TodoSyncState.change_seq, TodoSyncState.tombstone_seq).where(TodoSyncState.user_id == user_id)).one_or_none()
+    seq, compacted = state or (0, 0)
+    if since is not None and since < compacted:
+        raise ChangeCursorExpired("Sync cursor has expired; start a full sync")
+
+    query = select(Todo).where(Todo.user_id == user_id, Todo.change_seq <= seq)
+    if since is not None:
+        query = query.where(_after((Todo.change_seq, Todo.id), since, since_id))
+    # One extra row from each source tells whether another page follows.
+    todos = db.scalars(query.order_by(Todo.change_seq, Todo.id).limit(limit + 1)).all()
+    changes = [(todo.change_seq, todo.id, todo) for todo in todos]
+
+    if since is not None:
+        tombstones = db.execute(
+            select(TodoTombstone.seq, TodoTombstone.todo_id)
+            .where(TodoTombstone.user_id == user_id, TodoTombstone.seq <= seq, _after((TodoTombstone.seq, TodoTombstone.todo_id), since, since_id))
+            .order_by(TodoTombstone.seq, TodoTombstone.todo_id)
+            .limit(limit + 1)
+        ).all()
+        changes += [(tombstone_seq, todo_id, None) for tombstone_seq, todo_id in tombstones]
+        changes.sort(key=lambda change: change[:2])
+
+    has_more = len(changes) > limit
+    changes = changes[:limit]
+    live = [todo for _, _, todo in changes if todo is not None]
+    # SQLite can reuse the id of a deleted row; a live todo wins over its old tombstone.
+    live_ids = {todo.id for todo in live}
+    deleted = sorted({todo_id for _, todo_id, todo in changes if todo is None} - live_ids)
+    cursor = encode_change_cursor(*changes[-1][:2]) if has_more else encode_cursor(seq)
+    return TodoChanges(todos=[TodoSchema.model_validate(todo) for todo in live], deleted=deleted, cursor=cursor, has_more=has_more)
+
 def create_todo(db: Session, todo: TodoCreate, user_id: int) -> Todo:
-    new_todo = Todo(**todo.model_dump(), user_id=user_id)
+    seq = _next_change_seq(db, user_id)
+    new_todo = Todo(**todo.model_dump(), user_id=user_id, change_seq=seq)
     db.add(new_todo)
     db.commit()
     db.refresh(new_todo)
+    _todos_changed(user_id, "created", [new_todo.id], seq)
     return new_todo
 
+def create_todos(db: Session, todos: List[TodoCreate], user_id: int) -> List[Todo]:
+    if not todos:
+        return []
+    seq = _next_change_seq(db, user_id)
+    rows = [{**todo.model_dump(), "user_id": user_id, "change_seq": seq} for todo in todos]
+    created = []
+    for start in range(0, len(rows), TODO_BULK_CHUNK_SIZE):
+        chunk = rows[start:start + TODO_BULK_CHUNK_SIZE]
+        created.extend(db.scalars(insert(Todo).returning(Todo, sort_by_parameter_order=True), chunk).all())
+    ids = [todo.id for todo in created]
+    db.commit()
+    _todos_changed(user_id, "created", ids, seq)
+    return created
+
 def update_todo(db: Session, todo: Todo, todo_update: TodoUpdate) -> Todo:
     update_data = todo_update.model_dump(exclude_unset=True)
     for key, value in update_data.items():
         setattr(todo, key, value)
-    
-    db.commit()
-    db.refresh(todo)
-    return todo
+    seq = todo.change_seq = _next_change_seq(db, todo.user_id)
 
-def toggle_todo_complete(db: Session, todo: Todo) -> Todo:
-    todo.is_completed = not todo.is_completed
     db.commit()
     db.refresh(todo)
+    _todos_changed(todo.user_id, "updated", [todo.id], seq)
     return todo
 
-def toggle_todo_archive(db: Session, todo: Todo) -> Todo:
-    todo.is_archived = not todo.is_archived
+def _toggle(db: Session, todo_id: int, user_id: int, column) -> Todo | None:
+    if not db.get_bind().dialect.update_returning:
+        todo = get_todo_by_id(db, todo_id, user_id)
+        if todo is None:
+            return None
+        setattr(todo, column.key, not getattr(todo, column.key))
+        seq = todo.change_seq = _next_change_seq(db, user_id)
+        db.commit()
+        _todos_changed(user_id, "updated", [todo_id], seq)
+        db.refresh(todo)
+        return todo
+
+    # Flip the flag in the database and read the row back in the same statement, so
+    # concurrent toggles cannot lose an update.
+    stmt = (
+        update(Todo)
+        .where(Todo.id == todo_id, Todo.user_id == user_id)
+        .values({column: not_(column), Todo.change_seq: _next_change_seq(db, user_id)})
+        .returning(*Todo.__table__.columns)
+    )
+    row = db.execute(stmt).first()
+    if row is None:
+        # Nothing matched: roll back so the sequence is not bumped for a missing todo.
+        db.rollback()
+        return None
     db.commit()
-    db.refresh(todo)
+    _todos_changed(user_id, "updated", [todo_id], row.change_seq)
+    # Built from the returned columns, so both paths return a Todo without another SELECT.
+    todo = Todo(**row._mapping)
+    make_transient_to_detached(todo)
     return todo
 
+def toggle_todo_complete(db: Session, todo_id: int, user_id: int) -> Todo | None:
+    return _toggle(db, todo_id, user_id, Todo.is_completed)
+
+def toggle_todo_archive(db: Session, todo_id: int, user_id: int) -> Todo | None:
+    return _toggle(db, todo_id, user_id, Todo.is_archived)
+
 def delete_todo(db: Session, todo: Todo) -> None:
+    user_id, todo_id = todo.user_id, todo.id
+    seq = _add_tombstones(db, user_id, [todo_id])
     db.delete(todo)
     db.commit()
+    _todos_changed(user_id, "deleted", [todo_id], seq)
+
+def _bulk_filter(user_id: int, selection: TodoBulkSelection) -> list:
+    criteria = [Todo.user_id == user_id]
+    if selection.ids is not None:
+        criteria.append(Todo.id.in_(selection.ids))
+    if selection.is_completed is not None:
+        criteria.append(Todo.is_completed == selection.is_completed)
+    if selection.is_archived is not None:
+        criteria.append(Todo.is_archived == selection.is_archived)
+    return criteria
+
+def _bulk_set(db: Session, user_id: int, selection: TodoBulkSelection, values: dict) -> List[int]:
+    values = {**values, "change_seq": _next_change_seq(db, user_id)}
+    ids = list(db.scalars(update(Todo).where(*_bulk_filter(user_id, selection)).values(**values).returning(Todo.id)).all())
+    if not ids:
+        # Nothing matched: roll back so the sequence is not bumped for an empty selection.
+        db.rollback()
+        return ids
+    db.commit()
+    _todos_changed(user_id, "updated", ids, values["change_seq"])
+    return ids
+
+def complete_todos(db: Session, user_id: int, selection: TodoBulkSelection, value: bool = True) -> List[int]:
+    return _bulk_set(db, user_id, selection, {"is_completed": value})
+
+def archive_todos(db: Session, user_id: int, selection: TodoBulkSelection, value: bool = True) -> List[int]:
+    return _bulk_set(db, user_id, selection, {"is_archived": value})
+
+def delete_todos(db: Session, user_id: int, selection: TodoBulkSelection) -> List[int]:
+    ids = list(db.scalars(delete(Todo).where(*_bulk_filter(user_id, selection)).returning(Todo.id)).all())
+    seq = _add_tombstones(db, user_id, ids)
+    db.commit()
+    if ids:
+        _todos_changed(user_id, "deleted", ids, seq)
+    return ids
+
+EXPORT_FIELDS = ["id", "title", "description", "is_completed", "is_archived", "created_at", "updated_at"]
+
+def export_todos_query(user_id: int) -> Select:
+    return select(*[getattr(Todo, field) for field in EXPORT_FIELDS]).where(Todo.user_id == user_id).order_by(Todo.id)
+
+def format_ndjson(rows) -> str:
+    return "".join(json.dumps(dict(row._mapping), default=lambda value: value.isoformat()) + "\n" for row in rows)
+
+def format_csv(rows, header: bool = False) -> str:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    if header:
+        writer.writerow(EXPORT_FIELDS)
+    writer.writerows(rows)
+    return buffer.getvalue()
+
+UNDECODABLE_LINE = "Line is not valid UTF-8"
+
+def _decode_lines(file: IO[bytes], undecodable: List[int]) -> Iterator[str]:
+    # Lines are decoded one at a time, so a bad byte fails only its own line. An undecodable
+    # line is replaced by a blank one, which keeps later line numbers right.
+    for line_number, line in enumerate(file, start=1):
+        try:
+            yield line.decode("utf-8")
+        except UnicodeDecodeError:
+            undecodable.append(line_number)
+            yield "\n"
+
+def parse_ndjson(file: IO[bytes]) -> Iterator[Tuple[int, dict | str]]:
+    undecodable: List[int] = []
+    for line_number, line in enumerate(_decode_lines(file, undecodable), start=1):
+        if undecodable and undecodable[-1] == line_number:
+            yield line_number, UNDECODABLE_LINE
+            continue
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError:
+            yield line_number, "Invalid JSON"
+            continue
+        yield line_number, row if isinstance(row, dict) else "Expected a JSON object"
+
+def parse_csv(file: IO[bytes]) -> Iterator[Tuple[int, dict | str]]:
+    undecodable: List[int] = []
+    reader = csv.DictReader(_decode_lines(file, undecodable))
+    for row in reader:
+        # Blank stand-ins are skipped by the reader; report them before the row that follows.
+        while undecodable:
+            yield undecodable.pop(0), UNDECODABLE_LINE
+        # Empty cells mean "not set", so optional fields fall back to their defaults.
+        yield reader.line_num, {key: value for key, value in row.items() if key and value != ""}
+    for line_number in undecodable:
+        yield line_number, UNDECODABLE_LINE
+
+def _validation_message(error: ValidationError) -> str:
+    return "; ".join(f"{'.'.join(str(part) for part in err['loc'])}: {err['msg']}" for err in error.errors())
+
+def import_todos(db: Session, user_id: int, rows: Iterable[Tuple[int, dict | str]]) -> TodoImportResult:
+    imported = 0
+    failed = 0
+    errors = []
+    batch = []
+
+    def flush():
+        nonlocal imported
+        if batch:
+            seq = _next_change_seq(db, user_id)
+            ids = list(db.scalars(insert(Todo).returning(Todo.id, sort_by_parameter_order=True), [{**row, "change_seq": seq} for row in batch]).all())
+            db.commit()
+            _todos_changed(user_id, "created", ids, seq)
+            imported += len(batch)
+            batch.clear()
+
+    for line, row in rows:
+        try:
+            if isinstance(row, str):
+                raise ValueError(row)
+            batch.append({**TodoCreate.model_validate(row).model_dump(), "user_id": user_id})
+        except (ValidationError, ValueError) as e:
+            failed += 1
+            if len(errors) < TODO_IMPORT_MAX_ERRORS:
+                message = _validation_message(e) if isinstance(e, ValidationError) else str(e)
+                errors.append(TodoImportError(line=line, error=message))
+            continue
+        if len(batch) >= TODO_IMPORT_BATCH_SIZE:
+            flush()
+    flush()
+    return TodoImportResult(imported=imported, failed=failed, errors=errors)
@@ -1,46 +1,55 @@
+from typing import Optional
 from sqlalchemy.orm import Session
 from app.models import User
 from app.schemas import UserCreate, UserUpdate
+from app.core.cache import user_cache
+from app.core.otp import otp_store
+from app.core.replicas import read_only
 from app.core.security import get_password_hash, generate_otp
-import datetime
 
+# Not read_only: authentication fills user_cache from this lookup, and registration and
+# OTP checks run without a pinned subject, so a lagging replica could serve a stale user.
 def get_user_by_email(db: Session, email: str) -> User | None:
     return db.query(User).filter(User.email == email).first()
 
+@read_only
 def get_user_by_id(db: Session, user_id: int) -> User | None:
     return db.query(User).filter(User.id == user_id).first()
 
-def create_user(db: Session, user: UserCreate) -> User:
+def create_user(db: Session, user: UserCreate, hashed_password: Optional[str] = None) -> User:
     db_user = get_user_by_email(db, email=user.email)
     if db_user:
         raise ValueError("Email already registered")
     
-    hashed_password = get_password_hash(user.password)
+    # Routes hash on the executor beforehand, so no request thread waits on bcrypt.
+    hashed_password = hashed_password or get_password_hash(user.password)
     otp = generate_otp()
     
     new_user = User(
         email=user.email,
         hashed_password=hashed_password,
         first_name=user.first_name,
-        last_name=user.last_name,
-        otp_code=otp,
-        otp_created_at=datetime.datetime.utcnow()
+        last_name=user.last_name
     )
     
     db.add(new_user)
+    otp_store.issue(db, user.email, otp)
     db.commit()
     db.refresh(new_user)
+    # Handed back for delivery only; the code is not stored on the user row.
+    new_user.otp_code = otp
     
     return new_user
 
-def update_user(db: Session, user: User, user_update: UserUpdate) -> User:
+def update_user(db: Session, user: User, user_update: UserUpdate, hashed_password: Optional[str] = None) -> User:
     update_data = user_update.model_dump(exclude_unset=True)
     for key, value in update_data.items():
         if key == "password":
-            setattr(user, "hashed_password", get_password_hash(value))
+            setattr(user, "hashed_password", hashed_password or get_password_hash(value))
         else:
             setattr(user, key, value)
     
     db.commit()
     db.refresh(user)
+    user_cache.invalidate(user.email)
     return user
@@ -0,0 +1,33 @@
+"""Report password verify latency per cost setting on this host.
+
+Usage: python -m benchmarks.password_hashing --scheme bcrypt --rounds 10 11 12 13
+"""
+import argparse
+import statistics
+import time
+from app.core.security import build_pwd_context
+
+def benchmark(scheme: str, rounds: int, iterations: int) -> list[float]:
+    context = build_pwd_context(scheme, rounds)
+    hashed = context.hash("benchmark-password")
+    timings = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        context.verify("benchmark-password", hashed)
+        timings.append(time.perf_counter() - start)
+    return timings
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--scheme", default="bcrypt")
+    parser.add_argument("--rounds", type=int, nargs="+", default=[10, 11, 12, 13])
+    parser.add_argument("--iterations", type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"{'scheme':<16}{'rounds':>8}{'median ms':>12}{'max ms':>10}")
+    for rounds in args.rounds:
+        timings = benchmark(args.scheme, rounds, args.iterations)
+        print(f"{args.scheme:<16}{rounds:>8}{statistics.median(timings) * 1000:>12.1f}{max(timings) * 1000:>10.1f}")
+
+if __name__ == "__main__":
+    main()
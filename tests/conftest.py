@@ -1,9 +1,14 @@
+import asyncio
 import pytest
 from fastapi.testclient import TestClient
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.pool import NullPool
 from app.main import app
+from app.core.cache import todo_cache, user_cache
 from app.core.database import Base, get_db
+from app.core.rate_limit import rate_limit_backend
 from app.models import User, Todo
 
 SQLALCHEMY_DATABASE_URL = "sqlite:///./test.db"
@@ -13,6 +18,9 @@ engine = create_engine(
 )
 TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+async_engine = create_async_engine("sqlite+aiosqlite:///./test.db", poolclass=NullPool)
+TestingAsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
 @pytest.fixture(scope="function")
 def db():
     Base.metadata.create_all(bind=engine)
@@ -22,6 +30,10 @@ def db():
     finally:
         db.close()
         Base.metadata.drop_all(bind=engine)
+        user_cache.clear()
+        todo_cache.clear()
+        if rate_limit_backend is not None:
+            asyncio.run(rate_limit_backend.clear())
 
 @pytest.fixture(scope="function")
 def client(db):
@@ -36,19 +48,27 @@ def client(db):
         yield test_client
     app.dependency_overrides.clear()
 
+@pytest.fixture(scope="function")
+def async_client(db):
+    async def override_get_db():
+        async with TestingAsyncSessionLocal() as session:
+            yield session
+
+    app.dependency_overrides[get_db] = override_get_db
+    with TestClient(app) as test_client:
+        yield test_client
+    app.dependency_overrides.clear()
+
 @pytest.fixture
 def test_user(db):
-    from app.core.security import get_password_hash, generate_otp
-    import datetime
+    from app.core.security import get_password_hash
     
     user = User(
         email="test@example.com",
         hashed_password=get_password_hash("testpass123"),
         first_name="Test",
         last_name="User",
-        is_verified=True,
-        otp_code=generate_otp(),
-        otp_created_at=datetime.datetime.utcnow()
+        is_verified=True
     )
     db.add(user)
     db.commit()
@@ -61,16 +61,13 @@ def test_login_wrong_email(client):
 
 def test_login_unverified_user(db, client):
     from app.models import User
-    from app.core.security import get_password_hash, generate_otp
-    import datetime
+    from app.core.security import get_password_hash
     
     user = User(
         email="unverified@example.com",
         hashed_password=get_password_hash("testpass123"),
         first_name="Unverified",
-        last_name="User",
-        otp_code=generate_otp(),
-        otp_created_at=datetime.datetime.utcnow()
+        last_name="User"
     )
     db.add(user)
     db.commit()
@@ -145,12 +142,11 @@ def test_forgot_password_nonexistent_user(client):
     assert "OTP has been sent" in response.json()["message"]
 
 def test_reset_password_success(db, client, test_user):
+    from app.core.otp import otp_store
     from app.core.security import generate_otp
-    import datetime
     
     otp = generate_otp()
-    test_user.otp_code = otp
-    test_user.otp_created_at = datetime.datetime.utcnow()
+    otp_store.issue(db, test_user.email, otp)
     db.commit()
     
     response = client.post(
@@ -174,4 +170,131 @@ def test_reset_password_invalid_otp(client, test_user):
         }
     )
     assert response.status_code == 400
-    assert "Invalid OTP" in response.json()["detail"]
+    assert "Invalid or expired OTP" in response.json()["detail"]
+
+def test_reset_password_checks_otp_before_hashing(client, test_user, monkeypatch):
+    async def hash_password(password):
+        raise AssertionError("hashed before the OTP was checked")
+
+    monkeypatch.setattr("app.api.v1.auth.hash_password", hash_password)
+    for email in (test_user.email, "unknown@example.com"):
+        response = client.post(
+            "/api/v1/reset-password",
+            json={"email": email, "otp": "000000", "new_password": "newpassword123"}
+        )
+        assert response.status_code == 400
+
+def test_login_with_async_session(async_client, test_user):
+    response = async_client.post(
+        "/api/v1/login",
+        json={"email": test_user.email, "password": "testpass123"}
+    )
+    assert response.status_code == 200
+    assert "access_token" in response.json()
+
+def test_login_rate_limited_by_email(client, test_user, monkeypatch):
+    from app.api import deps
+
+    monkeypatch.setattr(deps, "AUTH_RATE_LIMIT_EMAIL_CAPACITY", 2)
+    for _ in range(2):
+        response = client.post("/api/v1/login", json={"email": test_user.email, "password": "wrong"})
+        assert response.status_code == 401
+
+    def fail(*args, **kwargs):
+        raise AssertionError("rate-limited request reached the service")
+
+    monkeypatch.setattr("app.api.v1.auth.get_user_by_email", fail)
+    response = client.post("/api/v1/login", json={"email": test_user.email.upper(), "password": "wrong"})
+    assert response.status_code == 429
+    assert int(response.headers["Retry-After"]) > 0
+
+def test_forgot_password_rate_limited_by_ip(client, monkeypatch):
+    from app.api import deps
+
+    monkeypatch.setattr(deps, "AUTH_RATE_LIMIT_IP_CAPACITY", 1)
+    assert client.post("/api/v1/forgot-password", json={"email": "a@example.com"}).status_code == 200
+    assert client.post("/api/v1/forgot-password", json={"email": "b@example.com"}).status_code == 429
+
+def test_register_enqueues_otp_email(client, monkeypatch):
+    import time
+    from app.core.notifications import outbox
+
+    delivered = []
+
+    class Sink:
+        def send(self, messages):
+            delivered.extend(messages)
+
+    monkeypatch.setattr(outbox, "sink", Sink())
+    response = client.post(
+        "/api/v1/register",
+        json={"email": "mail@example.com", "password": "password123", "first_name": "Mail", "last_name": "User"}
+    )
+    assert response.status_code == 200
+    for _ in range(200):
+        if delivered:
+            break
+        time.sleep(0.01)
+    assert [message.to for message in delivered] == ["mail@example.com"]
+    assert delivered[0].subject == "Verify your account"
+
+def test_login_returns_503_when_hashing_is_overloaded(client, test_user, monkeypatch):
+    from app.core import security
+
+    monkeypatch.setattr(security, "PASSWORD_HASH_MAX_QUEUE", 0)
+    monkeypatch.setitem(security._hash_stats, "in_flight", security.PASSWORD_HASH_WORKERS)
+    response = client.post("/api/v1/login", json={"email": test_user.email, "password": "testpass123"})
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "1"
+
+def test_login_flood_does_not_starve_crud_routes(db, test_user, test_todo, auth_headers, monkeypatch):
+    import asyncio
+    import time
+    import httpx
+    from app.api import deps
+    from app.core import security
+    from app.core.database import get_db
+    from app.main import app
+    from tests.conftest import TestingSessionLocal
+
+    monkeypatch.setattr(deps, "AUTH_RATE_LIMIT_IP_CAPACITY", 1000)
+    monkeypatch.setattr(deps, "AUTH_RATE_LIMIT_EMAIL_CAPACITY", 1000)
+    def slow_verify(plain_password, hashed_password):
+        time.sleep(0.1)
+        return True
+
+    monkeypatch.setattr(security, "_verify", slow_verify)
+
+    def session_per_request():
+        session = TestingSessionLocal()
+        try:
+            yield session
+        finally:
+            session.close()
+
+    async def scenario():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            # More logins than the threadpool has threads or the pool has connections.
+            logins = [
+                asyncio.create_task(client.post("/api/v1/login", json={"email": test_user.email, "password": "testpass123"}))
+                for _ in range(60)
+            ]
+            await asyncio.sleep(0.1)
+            started = time.monotonic()
+            response = await client.get("/api/v1/todos/", headers=auth_headers)
+            elapsed = time.monotonic() - started
+            in_flight = security.hash_executor_stats()["in_flight"]
+            statuses = {login.status_code for login in await asyncio.gather(*logins)}
+        return response.status_code, elapsed, in_flight, statuses
+
+    app.dependency_overrides[get_db] = session_per_request
+    try:
+        status, elapsed, in_flight, statuses = asyncio.run(scenario())
+    finally:
+        app.dependency_overrides.clear()
+    assert status == 200
+    # The todo list was served promptly, while the login hashes were still queued.
+    assert elapsed < 2
+    assert in_flight > 0
+    assert statuses <= {200, 503}
@@ -194,3 +194,382 @@ def test_delete_todo_not_found(client, test_user, auth_headers):
 def test_delete_todo_unauthorized(client, test_todo):
     response = client.delete(f"/api/v1/todos/{test_todo.id}")
     assert response.status_code == 401
+
+def test_todo_crud_with_async_session(async_client, test_user, auth_headers):
+    response = async_client.post("/api/v1/todos/", json={"title": "Async Todo"}, headers=auth_headers)
+    assert response.status_code == 200
+    todo_id = response.json()["id"]
+
+    response = async_client.patch(f"/api/v1/todos/{todo_id}/complete", headers=auth_headers)
+    assert response.status_code == 200
+    assert response.json()["is_completed"] is True
+
+    response = async_client.get("/api/v1/todos/", headers=auth_headers)
+    assert [todo["id"] for todo in response.json()] == [todo_id]
+
+    response = async_client.delete(f"/api/v1/todos/{todo_id}", headers=auth_headers)
+    assert response.status_code == 200
+    assert async_client.get(f"/api/v1/todos/{todo_id}", headers=auth_headers).status_code == 404
+
+def test_get_todos_with_cursor(client, test_user, auth_headers):
+    for i in range(5):
+        client.post("/api/v1/todos/", json={"title": f"Todo {i}"}, headers=auth_headers)
+
+    seen = []
+    response = client.get("/api/v1/todos/?limit=2", headers=auth_headers)
+    seen.extend(todo["title"] for todo in response.json())
+    while "X-Next-Cursor" in response.headers:
+        cursor = response.headers["X-Next-Cursor"]
+        response = client.get(f"/api/v1/todos/?limit=2&cursor={cursor}", headers=auth_headers)
+        assert response.status_code == 200
+        seen.extend(todo["title"] for todo in response.json())
+
+    assert seen == [f"Todo {i}" for i in range(5)]
+
+def test_get_todos_invalid_cursor(client, test_user, auth_headers):
+    response = client.get("/api/v1/todos/?cursor=%%%", headers=auth_headers)
+    assert response.status_code == 400
+
+def test_create_todos_bulk(client, test_user, auth_headers):
+    response = client.post(
+        "/api/v1/todos/bulk",
+        json=[{"title": "Bulk 1"}, {"title": "Bulk 2", "description": "Second"}],
+        headers=auth_headers
+    )
+    assert response.status_code == 200
+    data = response.json()
+    assert [todo["title"] for todo in data] == ["Bulk 1", "Bulk 2"]
+    assert data[1]["description"] == "Second"
+    assert all(todo["user_id"] == test_user.id for todo in data)
+
+def test_create_todos_bulk_over_limit(client, test_user, auth_headers):
+    from app.core.config import TODO_BULK_MAX_ITEMS
+
+    response = client.post(
+        "/api/v1/todos/bulk",
+        json=[{"title": f"Bulk {i}"} for i in range(TODO_BULK_MAX_ITEMS + 1)],
+        headers=auth_headers
+    )
+    assert response.status_code == 422
+    assert client.get("/api/v1/todos/", headers=auth_headers).json() == []
+
+def test_create_todos_bulk_empty(client, test_user, auth_headers, db, monkeypatch):
+    from app.core.events import todo_events
+    from app.models import TodoSyncState
+
+    published = []
+    monkeypatch.setattr(todo_events, "publish", lambda channel, event: published.append(event))
+    response = client.post("/api/v1/todos/bulk", json=[], headers=auth_headers)
+    assert response.status_code == 200
+    assert response.json() == []
+    assert published == []
+    assert db.get(TodoSyncState, test_user.id) is None
+
+def test_create_todos_bulk_invalid_item(client, test_user, auth_headers):
+    response = client.post(
+        "/api/v1/todos/bulk",
+        json=[{"title": "Bulk 1"}, {"description": "Missing title"}],
+        headers=auth_headers
+    )
+    assert response.status_code == 422
+
+def test_bulk_complete_archive_and_delete(client, test_user, auth_headers):
+    ids = [
+        client.post("/api/v1/todos/", json={"title": f"Todo {i}"}, headers=auth_headers).json()["id"]
+        for i in range(3)
+    ]
+
+    response = client.patch("/api/v1/todos/bulk/complete", json={"ids": ids[:2]}, headers=auth_headers)
+    assert response.status_code == 200
+    assert response.json()["count"] == 2
+
+    response = client.patch("/api/v1/todos/bulk/archive", json={"ids": [ids[2]], "value": True}, headers=auth_headers)
+    assert response.json()["ids"] == [ids[2]]
+
+    response = client.post("/api/v1/todos/bulk/delete", json={"is_completed": True}, headers=auth_headers)
+    assert response.status_code == 200
+    assert sorted(response.json()["ids"]) == ids[:2]
+
+    remaining = client.get("/api/v1/todos/", headers=auth_headers).json()
+    assert [todo["id"] for todo in remaining] == [ids[2]]
+    assert remaining[0]["is_archived"] is True
+
+def test_bulk_delete_requires_selector(client, test_user, auth_headers):
+    response = client.post("/api/v1/todos/bulk/delete", json={}, headers=auth_headers)
+    assert response.status_code == 422
+
+def test_bulk_selection_ids_are_capped(client, test_user, auth_headers):
+    from app.core.config import TODO_BULK_MAX_ITEMS
+
+    ids = list(range(1, TODO_BULK_MAX_ITEMS + 2))
+    response = client.post("/api/v1/todos/bulk/delete", json={"ids": ids}, headers=auth_headers)
+    assert response.status_code == 422
+
+def test_export_todos_ndjson(client, test_user, auth_headers, test_todo):
+    import json
+
+    client.post("/api/v1/todos/", json={"title": "Second"}, headers=auth_headers)
+    response = client.get("/api/v1/todos/export?format=ndjson", headers=auth_headers)
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    rows = [json.loads(line) for line in response.text.splitlines()]
+    assert [row["title"] for row in rows] == ["Test Todo", "Second"]
+    assert rows[0]["id"] == test_todo.id
+
+def test_export_todos_csv(client, test_user, auth_headers, test_todo):
+    import csv
+
+    response = client.get("/api/v1/todos/export?format=csv", headers=auth_headers)
+    assert response.status_code == 200
+    rows = list(csv.DictReader(response.text.splitlines()))
+    assert len(rows) == 1
+    assert rows[0]["title"] == "Test Todo"
+
+def test_export_todos_csv_empty(client, test_user, auth_headers):
+    response = client.get("/api/v1/todos/export?format=csv", headers=auth_headers)
+    assert response.text.strip() == "id,title,description,is_completed,is_archived,created_at,updated_at"
+
+def test_export_todos_with_async_session(async_client, test_user, auth_headers, test_todo):
+    response = async_client.get("/api/v1/todos/export", headers=auth_headers)
+    assert response.status_code == 200
+    assert len(response.text.splitlines()) == 1
+
+def test_export_todos_invalid_format(client, test_user, auth_headers):
+    response = client.get("/api/v1/todos/export?format=xml", headers=auth_headers)
+    assert response.status_code == 422
+
+def test_import_todos_csv(client, test_user, auth_headers):
+    response = client.post(
+        "/api/v1/todos/import",
+        files={"file": ("todos.csv", b"title,description\nImported,From CSV\n,Missing title\n", "text/csv")},
+        headers=auth_headers
+    )
+    assert response.status_code == 200
+    data = response.json()
+    assert data["imported"] == 1
+    assert data["failed"] == 1
+    assert data["errors"][0]["line"] == 3
+
+    todos = client.get("/api/v1/todos/", headers=auth_headers).json()
+    assert [todo["title"] for todo in todos] == ["Imported"]
+
+def test_import_todos_ndjson_round_trip(client, test_user, auth_headers, test_todo):
+    exported = client.get("/api/v1/todos/export", headers=auth_headers).content
+    response = client.post(
+        "/api/v1/todos/import",
+        files={"file": ("todos.ndjson", exported, "application/x-ndjson")},
+        headers=auth_headers
+    )
+    assert response.json() == {"imported": 1, "failed": 0, "errors": []}
+    assert len(client.get("/api/v1/todos/", headers=auth_headers).json()) == 2
+
+def test_import_todos_rejects_non_utf8(client, test_user, auth_headers):
+    response = client.post(
+        "/api/v1/todos/import?format=csv",
+        files={"file": ("todos.txt", b"title,description\nx,y\n,z\n\xff\xfe", "text/csv")},
+        headers=auth_headers
+    )
+    assert response.status_code == 200
+    assert response.json() == {"imported": 1, "failed": 2, "errors": [
+        {"line": 3, "error": "title: Field required"},
+        {"line": 4, "error": "Line is not valid UTF-8"},
+    ]}
+
+def test_import_todos_non_utf8_midway_keeps_other_rows(client, test_user, auth_headers, monkeypatch):
+    from app.services import todo_service
+
+    monkeypatch.setattr(todo_service, "TODO_IMPORT_BATCH_SIZE", 100)
+    rows = [b'{"title": "Todo %04d"}\n' % n for n in range(1000)]
+    body = b"".join(rows[:500]) + b'{"title": "\xff"}\n' + b"".join(rows[500:])
+    response = client.post(
+        "/api/v1/todos/import",
+        files={"file": ("todos.ndjson", body, "application/x-ndjson")},
+        headers=auth_headers
+    )
+    assert response.status_code == 200
+    data = response.json()
+    assert (data["imported"], data["failed"]) == (1000, 1)
+    assert data["errors"] == [{"line": 501, "error": "Line is not valid UTF-8"}]
+    todos = client.get("/api/v1/todos/?limit=1000", headers=auth_headers).json()
+    assert len(todos) == 1000
+
+def test_get_todo_conditional(client, test_user, auth_headers, test_todo):
+    response = client.get(f"/api/v1/todos/{test_todo.id}", headers=auth_headers)
+    etag = response.headers["ETag"]
+    assert etag.startswith('W/"')
+
+    response = client.get(f"/api/v1/todos/{test_todo.id}", headers={**auth_headers, "If-None-Match": etag})
+    assert response.status_code == 304
+    assert response.content == b""
+
+    client.put(f"/api/v1/todos/{test_todo.id}", json={"title": "Changed"}, headers=auth_headers)
+    response = client.get(f"/api/v1/todos/{test_todo.id}", headers={**auth_headers, "If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.headers["ETag"] != etag
+
+def test_get_todo_conditional_not_found(client, test_user, auth_headers):
+    response = client.get("/api/v1/todos/99999", headers={**auth_headers, "If-None-Match": 'W/"x"'})
+    assert response.status_code == 404
+
+def test_get_todos_conditional(client, test_user, auth_headers, test_todo):
+    etag = client.get("/api/v1/todos/", headers=auth_headers).headers["ETag"]
+
+    response = client.get("/api/v1/todos/", headers={**auth_headers, "If-None-Match": etag})
+    assert response.status_code == 304
+
+    client.patch(f"/api/v1/todos/{test_todo.id}/complete", headers=auth_headers)
+    response = client.get("/api/v1/todos/", headers={**auth_headers, "If-None-Match": etag})
+    assert response.status_code == 200
+
+    etag = response.headers["ETag"]
+    client.delete(f"/api/v1/todos/{test_todo.id}", headers=auth_headers)
+    response = client.get("/api/v1/todos/", headers={**auth_headers, "If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.json() == []
+
+def test_get_todos_sparse_fields(client, test_user, auth_headers, test_todo):
+    response = client.get("/api/v1/todos/?fields=title,is_completed", headers=auth_headers)
+    assert response.status_code == 200
+    assert response.json() == [{"title": "Test Todo", "is_completed": False}]
+    assert "ETag" in response.headers
+
+    etag = response.headers["ETag"]
+    response = client.get("/api/v1/todos/?fields=title,is_completed", headers={**auth_headers, "If-None-Match": etag})
+    assert response.status_code == 304
+
+def test_sparse_fields_have_their_own_etag(client, test_user, auth_headers, test_todo):
+    for path in ("/api/v1/todos/", f"/api/v1/todos/{test_todo.id}"):
+        full = client.get(path, headers=auth_headers).headers["ETag"]
+        sparse = client.get(f"{path}?fields=title", headers=auth_headers).headers["ETag"]
+        assert sparse != full
+
+        # A validator for one field set never revalidates another.
+        response = client.get(f"{path}?fields=title", headers={**auth_headers, "If-None-Match": full})
+        assert response.status_code == 200
+        response = client.get(path, headers={**auth_headers, "If-None-Match": sparse})
+        assert response.status_code == 200
+        response = client.get(f"{path}?fields=id", headers={**auth_headers, "If-None-Match": sparse})
+        assert response.status_code == 200
+        response = client.get(f"{path}?fields=title", headers={**auth_headers, "If-None-Match": sparse})
+        assert response.status_code == 304
+
+def test_get_todo_sparse_fields(client, test_user, auth_headers, test_todo):
+    response = client.get(f"/api/v1/todos/{test_todo.id}?fields=id,title,created_at", headers=auth_headers)
+    assert response.status_code == 200
+    data = response.json()
+    assert set(data) == {"id", "title", "created_at"}
+    assert data["id"] == test_todo.id
+
+    response = client.get("/api/v1/todos/99999?fields=title", headers=auth_headers)
+    assert response.status_code == 404
+
+def test_get_todos_unknown_field(client, test_user, auth_headers):
+    response = client.get("/api/v1/todos/?fields=title,secret", headers=auth_headers)
+    assert response.status_code == 400
+    assert "secret" in response.json()["detail"]
+
+def test_fast_serialization_matches_default(client, test_user, auth_headers, test_todo, monkeypatch):
+    from app.api.v1 import todos
+    from app.core.cache import todo_cache
+
+    default_list = client.get("/api/v1/todos/", headers=auth_headers)
+    default_item = client.get(f"/api/v1/todos/{test_todo.id}", headers=auth_headers)
+
+    monkeypatch.setattr(todos, "TODO_FAST_SERIALIZATION", True)
+    todo_cache.clear()
+    fast_list = client.get("/api/v1/todos/", headers=auth_headers)
+    fast_item = client.get(f"/api/v1/todos/{test_todo.id}", headers=auth_headers)
+
+    assert fast_list.json() == default_list.json()
+    assert fast_list.headers["ETag"] == default_list.headers["ETag"]
+    assert fast_item.json() == default_item.json()
+    assert fast_item.headers["ETag"] == default_item.headers["ETag"]
+
+def test_search_todos(client, test_user, auth_headers, test_todo):
+    client.post("/api/v1/todos/bulk", json=[{"title": f"Groceries {i}"} for i in range(3)], headers=auth_headers)
+
+    response = client.get("/api/v1/todos/search?q=groceries&limit=2", headers=auth_headers)
+    assert response.status_code == 200
+    assert len(response.json()) == 2
+    cursor = response.headers["X-Next-Cursor"]
+
+    response = client.get(f"/api/v1/todos/search?q=groceries&limit=2&cursor={cursor}", headers=auth_headers)
+    assert [todo["title"] for todo in response.json()] == ["Groceries 2"]
+    assert "X-Next-Cursor" not in response.headers
+
+    response = client.get("/api/v1/todos/search?q=test", headers=auth_headers)
+    assert [todo["id"] for todo in response.json()] == [test_todo.id]
+
+def test_search_todos_is_user_scoped(client, test_user, auth_headers, test_todo, db):
+    from app.models import User
+    from app.services import create_todo
+    from app.schemas import TodoCreate
+
+    other = User(email="other@example.com", first_name="Other", last_name="User", is_verified=True)
+    db.add(other)
+    db.commit()
+    create_todo(db, TodoCreate(title="Test secret"), other.id)
+
+    response = client.get("/api/v1/todos/search?q=test", headers=auth_headers)
+    assert [todo["id"] for todo in response.json()] == [test_todo.id]
+
+def test_search_todos_invalid_input(client, test_user, auth_headers):
+    assert client.get("/api/v1/todos/search", headers=auth_headers).status_code == 422
+    assert client.get("/api/v1/todos/search?q=x&cursor=bogus", headers=auth_headers).status_code == 400
+
+def test_search_todos_blank_query(client, test_user, auth_headers, test_todo):
+    response = client.get("/api/v1/todos/search?q=%20%20", headers=auth_headers)
+    assert response.status_code == 200
+    assert response.json() == []
+
+def test_todo_changes_sync(client, test_user, auth_headers, test_todo):
+    response = client.get("/api/v1/todos/changes", headers=auth_headers)
+    assert response.status_code == 200
+    assert [todo["id"] for todo in response.json()["todos"]] == [test_todo.id]
+    cursor = response.json()["cursor"]
+
+    created = client.post("/api/v1/todos/", json={"title": "Synced"}, headers=auth_headers).json()
+    client.delete(f"/api/v1/todos/{test_todo.id}", headers=auth_headers)
+
+    response = client.get(f"/api/v1/todos/changes?since={cursor}", headers=auth_headers)
+    data = response.json()
+    assert [todo["id"] for todo in data["todos"]] == [created["id"]]
+    assert data["deleted"] == [test_todo.id]
+
+def test_todo_changes_pages(client, test_user, auth_headers):
+    ids = [client.post("/api/v1/todos/", json={"title": f"Todo {i}"}, headers=auth_headers).json()["id"] for i in range(3)]
+    response = client.get("/api/v1/todos/changes?limit=2", headers=auth_headers)
+    data = response.json()
+    assert ([todo["id"] for todo in data["todos"]], data["has_more"]) == (ids[:2], True)
+
+    data = client.get(f"/api/v1/todos/changes?limit=2&since={data['cursor']}", headers=auth_headers).json()
+    assert ([todo["id"] for todo in data["todos"]], data["has_more"]) == (ids[2:], False)
+    assert client.get("/api/v1/todos/changes?limit=100000", headers=auth_headers).status_code == 422
+
+def test_todo_changes_expired_and_invalid_cursor(client, test_user, auth_headers, db):
+    from app.models import TodoSyncState
+
+    db.add(TodoSyncState(user_id=test_user.id, change_seq=5, tombstone_seq=5))
+    db.commit()
+    assert client.get("/api/v1/todos/changes?since=MQ", headers=auth_headers).status_code == 410
+    assert client.get("/api/v1/todos/changes?since=bogus", headers=auth_headers).status_code == 400
+
+def test_todo_events_stream(db, test_user):
+    import asyncio
+    from app.api.v1.todos import todo_events_stream
+    from app.schemas import TodoCreate
+    from app.services import create_todo
+
+    async def scenario():
+        response = await todo_events_stream(db=db, current_user=test_user)
+        assert response.media_type == "text/event-stream"
+        body = response.body_iterator
+        assert await anext(body) == "retry: 3000\n\n"
+        todo = await asyncio.to_thread(create_todo, db, TodoCreate(title="Pushed"), test_user.id)
+        event = await asyncio.wait_for(anext(body), 5)
+        await body.aclose()
+        return todo, event
+
+    todo, event = asyncio.run(scenario())
+    assert event.startswith("event: created\n")
+    assert f'"ids": [{todo.id}]' in event
@@ -44,3 +44,32 @@ def test_update_current_user_unauthorized(client):
         json={"first_name": "Updated"}
     )
     assert response.status_code == 401
+
+def test_current_user_is_cached(client, test_user, auth_headers):
+    from app.core.cache import user_cache
+
+    client.get("/api/v1/users/me", headers=auth_headers)
+    hits = user_cache.stats()["hits"]
+    response = client.get("/api/v1/users/me", headers=auth_headers)
+    assert response.status_code == 200
+    assert response.json()["email"] == test_user.email
+    assert user_cache.stats()["hits"] == hits + 1
+
+def test_update_current_user_invalidates_cache(client, test_user, auth_headers):
+    from app.core.cache import user_cache
+
+    client.get("/api/v1/users/me", headers=auth_headers)
+    client.put("/api/v1/users/me", json={"first_name": "Cached"}, headers=auth_headers)
+    assert user_cache.get(test_user.email) is None
+
+    response = client.get("/api/v1/users/me", headers=auth_headers)
+    assert response.json()["first_name"] == "Cached"
+
+def test_get_current_user_sparse_fields(client, test_user, auth_headers):
+    response = client.get("/api/v1/users/me?fields=email,first_name", headers=auth_headers)
+    assert response.status_code == 200
+    assert response.json() == {"email": test_user.email, "first_name": test_user.first_name}
+
+def test_get_current_user_unknown_field(client, test_user, auth_headers):
+    response = client.get("/api/v1/users/me?fields=hashed_password", headers=auth_headers)
+    assert response.status_code == 400
@@ -4,18 +4,17 @@ from fastapi.testclient import TestClient
 def test_verify_otp_success(db, client):
     from app.models import User
     from app.core.security import get_password_hash, generate_otp
-    import datetime
+    from app.core.otp import otp_store
     
     otp = generate_otp()
     user = User(
         email="test@example.com",
         hashed_password=get_password_hash("testpass123"),
         first_name="Test",
-        last_name="User",
-        otp_code=otp,
-        otp_created_at=datetime.datetime.utcnow()
+        last_name="User"
     )
     db.add(user)
+    otp_store.issue(db, user.email, otp)
     db.commit()
     db.refresh(user)
     
@@ -28,7 +27,7 @@ def test_verify_otp_success(db, client):
     
     db.refresh(user)
     assert user.is_verified is True
-    assert user.otp_code is None
+    assert otp_store.verify(db, user.email, otp) is False
 
 def test_verify_otp_already_verified(client, test_user):
     response = client.post(
@@ -41,18 +40,17 @@ def test_verify_otp_already_verified(client, test_user):
 def test_verify_otp_invalid_code(db, client):
     from app.models import User
     from app.core.security import get_password_hash, generate_otp
-    import datetime
+    from app.core.otp import otp_store
     
     otp = generate_otp()
     user = User(
         email="test@example.com",
         hashed_password=get_password_hash("testpass123"),
         first_name="Test",
-        last_name="User",
-        otp_code=otp,
-        otp_created_at=datetime.datetime.utcnow()
+        last_name="User"
     )
     db.add(user)
+    otp_store.issue(db, user.email, otp)
     db.commit()
     db.refresh(user)
     
@@ -66,19 +64,17 @@ def test_verify_otp_invalid_code(db, client):
 def test_verify_otp_expired(db, client):
     from app.models import User
     from app.core.security import get_password_hash, generate_otp
-    import datetime
+    from app.core.otp import otp_store
     
     otp = generate_otp()
-    expired_time = datetime.datetime.utcnow() - datetime.timedelta(minutes=10)
     user = User(
         email="test@example.com",
         hashed_password=get_password_hash("testpass123"),
         first_name="Test",
-        last_name="User",
-        otp_code=otp,
-        otp_created_at=expired_time
+        last_name="User"
     )
     db.add(user)
+    otp_store.issue(db, user.email, otp, ttl=-600)
     db.commit()
     db.refresh(user)
     
@@ -99,23 +95,20 @@ def test_verify_otp_user_not_found(client):
 
 def test_resend_otp_success(db, client):
     from app.models import User
-    from app.core.security import get_password_hash, generate_otp
-    import datetime
+    from app.core.security import get_password_hash
+    from app.core.otp import otp_store
     
-    otp = generate_otp()
     user = User(
         email="test@example.com",
         hashed_password=get_password_hash("testpass123"),
         first_name="Test",
-        last_name="User",
-        otp_code=otp,
-        otp_created_at=datetime.datetime.now(datetime.timezone.utc)
+        last_name="User"
     )
     db.add(user)
+    otp_store.issue(db, user.email, "old-code")
     db.commit()
     db.refresh(user)
     
-    old_otp = user.otp_code
     response = client.post(
         "/api/v1/resend-otp",
         params={"email": user.email}
@@ -123,8 +116,7 @@ def test_resend_otp_success(db, client):
     assert response.status_code == 200
     assert "OTP resent successfully" in response.json()["message"]
     
-    db.refresh(user)
-    assert user.otp_code != old_otp
+    assert otp_store.verify(db, user.email, "old-code") is False
 
 def test_resend_otp_already_verified(client, test_user):
     response = client.post(
@@ -0,0 +1,97 @@
+import time
+from app.core.cache import TTLCache
+
+def test_cache_get_set():
+    cache = TTLCache(maxsize=10, ttl=60)
+    assert cache.get("a") is None
+    cache.set("a", 1)
+    assert cache.get("a") == 1
+    assert cache.stats()["hits"] == 1
+    assert cache.stats()["misses"] == 1
+
+def test_cache_evicts_least_recently_used():
+    cache = TTLCache(maxsize=2, ttl=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+
+def test_cache_expires_entries():
+    cache = TTLCache(maxsize=10, ttl=0.01)
+    cache.set("a", 1)
+    time.sleep(0.02)
+    assert cache.get("a") is None
+    assert cache.stats()["size"] == 0
+
+def test_cache_invalidate_and_clear():
+    cache = TTLCache(maxsize=10, ttl=60)
+    cache.set("a", 1)
+    cache.invalidate("a")
+    assert cache.get("a") is None
+    cache.set("b", 2)
+    cache.clear()
+    assert cache.stats() == {"size": 0, "maxsize": 10, "hits": 0, "misses": 0}
+
+def test_cache_disabled_with_zero_size():
+    cache = TTLCache(maxsize=0, ttl=60)
+    cache.set("a", 1)
+    assert cache.get("a") is None
+
+def test_memory_backend_versions():
+    from app.core.cache import MemoryCacheBackend
+
+    backend = MemoryCacheBackend(maxsize=10, ttl=60)
+    assert backend.get_version("1") == 0
+    assert backend.bump_version("1") == 1
+    assert backend.get_version("1") == 1
+    assert backend.get_version("2") == 0
+    backend.set("key", "value")
+    assert backend.get("key") == "value"
+    backend.clear()
+    assert backend.get("key") is None
+    assert backend.get_version("1") == 0
+
+def test_redis_backend():
+    import fakeredis
+    from app.core.cache import RedisCacheBackend
+
+    backend = RedisCacheBackend(fakeredis.FakeRedis(), ttl=60, prefix="test:")
+    assert backend.get("key") is None
+    backend.set("key", "value")
+    assert backend.get("key") == b"value"
+    assert backend.get_version("1") == 0
+    assert backend.bump_version("1") == 1
+    assert backend.get_version("1") == 1
+    assert backend.stats() == {"hits": 1, "misses": 1, "errors": 0}
+    backend.clear()
+    assert backend.get("key") is None
+
+def test_redis_backend_bypasses_cache_on_errors():
+    import fakeredis
+    from app.core.cache import RedisCacheBackend
+
+    server = fakeredis.FakeServer()
+    backend = RedisCacheBackend(fakeredis.FakeRedis(server=server), ttl=60, prefix="test:")
+    backend.set("key", "value")
+    server.connected = False
+    assert backend.bump_version("1") is None
+    assert backend.get_version("1") == 0
+    assert backend.get("key") is None
+
+    # Once a call has failed, the cache stays bypassed for a TTL even after Redis recovers,
+    # so pages cached before a missed version bump are not served.
+    server.connected = True
+    assert backend.get("key") is None
+    backend.set("other", "value")
+    assert backend.stats()["errors"] == 2
+    assert fakeredis.FakeRedis(server=server).get("test:other") is None
+
+def test_create_cache_backend():
+    from app.core.cache import MemoryCacheBackend, create_cache_backend
+
+    assert create_cache_backend("none", 10, 60) is None
+    assert isinstance(create_cache_backend("memory", 10, 60), MemoryCacheBackend)
+    assert create_cache_backend("memory", 10, 60, workers=4) is None
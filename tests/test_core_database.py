@@ -17,3 +17,72 @@ def test_get_db_generator():
         next(db_gen)
     except StopIteration:
         pass
+
+def test_get_session_defaults_to_sync():
+    from app.core.database import get_session
+    assert get_session is get_db
+
+def test_run_db_with_sync_session(db, test_user):
+    import asyncio
+    from app.core.database import run_db
+    from app.services import get_user_by_email
+
+    user = asyncio.run(run_db(db, get_user_by_email, test_user.email))
+    assert user.id == test_user.id
+
+def test_run_db_with_async_session(db, test_user):
+    import asyncio
+    from app.core.database import run_db
+    from app.services import get_user_by_email
+    from tests.conftest import TestingAsyncSessionLocal
+
+    async def lookup():
+        async with TestingAsyncSessionLocal() as session:
+            return await run_db(session, get_user_by_email, email=test_user.email)
+
+    user = asyncio.run(lookup())
+    assert user.id == test_user.id
+    assert user.email == test_user.email
+
+def test_pool_options_per_dialect(monkeypatch):
+    from app.core import database
+    from app.core.database import TimedQueuePool, pool_options
+
+    assert pool_options("sqlite://", TimedQueuePool) == {}
+    assert pool_options("sqlite:///./app.db", TimedQueuePool)["pool_pre_ping"] is False
+    postgres = pool_options("postgresql://db/app", TimedQueuePool)
+    assert postgres["poolclass"] is TimedQueuePool
+    assert postgres["pool_pre_ping"] is True and postgres["pool_recycle"] == 1800
+
+    monkeypatch.setattr(database, "DB_POOL_SIZE", 3)
+    assert pool_options("postgresql://db/app", TimedQueuePool)["pool_size"] == 3
+
+def test_pool_stats_track_checkouts_and_timeouts(tmp_path):
+    import pytest
+    from sqlalchemy import create_engine
+    from sqlalchemy.exc import TimeoutError
+    from app.core.database import TimedQueuePool, pool_stats
+
+    test_engine = create_engine(f"sqlite:///{tmp_path}/pool.db", poolclass=TimedQueuePool, pool_size=1, max_overflow=0, pool_timeout=0.05)
+    before = pool_stats(test_engine)
+    with test_engine.connect():
+        stats = pool_stats(test_engine)
+        assert stats["checked_out"] == 1
+        with pytest.raises(TimeoutError):
+            test_engine.connect()
+    stats = pool_stats(test_engine)
+    assert stats["checked_out"] == 0
+    assert stats["checkouts"] == before["checkouts"] + 1
+    assert stats["timeouts"] == before["timeouts"] + 1
+    assert stats["wait_seconds_max"] >= 0.05
+    test_engine.dispose()
+
+def test_pool_stats_endpoint(client, monkeypatch):
+    assert client.get("/internal/db-pool").status_code == 404
+
+    monkeypatch.setattr("app.api.deps.INTERNAL_API_TOKEN", "internal-secret")
+    assert client.get("/internal/db-pool").status_code == 401
+    assert client.get("/internal/db-pool", headers={"Authorization": "Bearer wrong"}).status_code == 401
+    response = client.get("/internal/db-pool", headers={"Authorization": "Bearer internal-secret"})
+    assert response.status_code == 200
+    assert "checked_out" in response.json()["sync"]
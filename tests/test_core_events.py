@@ -0,0 +1,57 @@
+import asyncio
+from app.core.events import HEARTBEAT, EventBus, RedisEventBackend
+
+def test_event_bus_delivers_to_channel_subscribers():
+    bus = EventBus(queue_size=10)
+
+    async def scenario():
+        with bus.subscribe("1") as first, bus.subscribe("2") as second:
+            bus.publish("1", {"type": "created"})
+            assert await anext(first.events()) == {"type": "created"}
+            assert await anext(second.events(heartbeat=0.01)) is HEARTBEAT
+            assert bus.stats()["subscribers"] == 2
+        assert bus.stats()["subscribers"] == 0
+
+    asyncio.run(scenario())
+
+def test_event_bus_drops_slow_consumers():
+    bus = EventBus(queue_size=2)
+
+    async def scenario():
+        subscription = bus.subscribe("1")
+        for i in range(3):
+            bus.publish("1", i)
+        await asyncio.sleep(0)
+        assert [event async for event in subscription.events()] == []
+        assert subscription.dropped
+        assert bus.stats() == {"subscribers": 0, "dropped": 1}
+
+    asyncio.run(scenario())
+
+def test_event_bus_publishes_from_other_threads():
+    bus = EventBus(queue_size=10)
+
+    async def scenario():
+        with bus.subscribe("1") as subscription:
+            await asyncio.to_thread(bus.publish, "1", "from thread")
+            assert await anext(subscription.events()) == "from thread"
+
+    asyncio.run(scenario())
+
+def test_redis_event_backend_relays_between_buses():
+    import fakeredis
+
+    server = fakeredis.FakeServer()
+    publisher = EventBus(10, RedisEventBackend(fakeredis.FakeRedis(server=server)))
+    backend = RedisEventBackend(fakeredis.FakeRedis(server=server))
+    subscriber = EventBus(10, backend)
+
+    async def scenario():
+        with subscriber.subscribe("7") as subscription:
+            publisher.publish("7", {"type": "deleted", "ids": [1]})
+            return await asyncio.wait_for(anext(subscription.events()), 5)
+
+    try:
+        assert asyncio.run(scenario()) == {"type": "deleted", "ids": [1]}
+    finally:
+        backend.stop()
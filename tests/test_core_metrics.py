@@ -0,0 +1,95 @@
+import json
+import os
+import time
+from app.core.metrics import MetricsMiddleware, MultiprocessStore, RequestMetrics, merge_requests, render_gauges, render_requests, request_metrics, stat_samples
+
+def test_request_metrics_render_cumulative_histogram():
+    metrics = RequestMetrics(buckets=(0.1, 1.0))
+    metrics.observe("GET", "/items/{item_id}", 200, 0.05)
+    metrics.observe("GET", "/items/{item_id}", 200, 0.5)
+    metrics.observe("GET", "/items/{item_id}", 200, 3.0)
+    lines = render_requests(merge_requests([metrics.snapshot()]), buckets=(0.1, 1.0))
+    labels = 'method="GET",route="/items/{item_id}",status="200"'
+    assert f'http_request_duration_seconds_bucket{{{labels},le="0.1"}} 1' in lines
+    assert f'http_request_duration_seconds_bucket{{{labels},le="1.0"}} 2' in lines
+    assert f'http_request_duration_seconds_bucket{{{labels},le="+Inf"}} 3' in lines
+    assert f"http_request_duration_seconds_count{{{labels}}} 3" in lines
+    assert f"http_request_duration_seconds_sum{{{labels}}} 3.55" in lines
+
+def test_render_gauges_skips_non_numeric_stats():
+    lines = render_gauges(stat_samples("db_pool", {"pool": "QueuePool", "size": 5, "wait": 0.5}, {"engine": "sync"}))
+    assert lines == [
+        "# TYPE app_db_pool_size gauge",
+        'app_db_pool_size{engine="sync"} 5',
+        "# TYPE app_db_pool_wait gauge",
+        'app_db_pool_wait{engine="sync"} 0.5',
+    ]
+
+def test_multiprocess_store_merges_workers(tmp_path):
+    store = MultiprocessStore(str(tmp_path), flush_seconds=5)
+    metrics = RequestMetrics()
+    metrics.observe("GET", "/", 200, 0.01)
+    store.write(metrics.snapshot(), stat_samples("outbox", {"sent": 2}))
+    # A second live worker; a dead one whose pid has exited; and an earlier worker whose
+    # pid the current process reused.
+    workers = (("101-a", time.time()), (f"{2 ** 30}-b", time.time() - 60), (f"{os.getpid()}-c", time.time() - 60))
+    for name, modified in workers:
+        path = tmp_path / f"worker-{name}.json"
+        path.write_text(json.dumps({"requests": metrics.snapshot(), "samples": stat_samples("outbox", {"sent": 1})}))
+        os.utime(path, (modified, modified))
+
+    requests, samples = store.read()
+    assert sum(requests[("GET", "/", "200")][:-1]) == 4
+    assert sorted(labels["pid"] for _, labels, _ in samples) == sorted([str(os.getpid()), "101"])
+    # Dead workers' counts moved into the archive; the totals stay the same.
+    assert sorted(path.name for path in tmp_path.glob("worker-*.json")) == ["worker-101-a.json", os.path.basename(store._path())]
+    assert (tmp_path / "archive.json").exists()
+    requests, _ = store.read()
+    assert sum(requests[("GET", "/", "200")][:-1]) == 4
+
+def test_metrics_middleware_times_streams_to_response_start():
+    import asyncio
+    from starlette.responses import StreamingResponse
+
+    async def body():
+        yield "first\n"
+        await asyncio.sleep(0.3)
+        yield "second\n"
+
+    async def receive():
+        # The client never disconnects.
+        await asyncio.Event().wait()
+
+    async def send(message):
+        pass
+
+    metrics = RequestMetrics()
+    middleware = MetricsMiddleware(StreamingResponse(body()), metrics)
+    asyncio.run(middleware({"type": "http", "method": "GET", "path": "/stream", "headers": []}, receive, send))
+    [(_, _, status, series)] = metrics.snapshot()
+    assert status == "200"
+    assert series[-1] < 0.3
+
+def test_metrics_endpoint_requires_internal_token(client, monkeypatch):
+    assert client.get("/metrics").status_code == 404
+    monkeypatch.setattr("app.api.deps.INTERNAL_API_TOKEN", "internal-secret")
+    assert client.get("/metrics").status_code == 401
+
+def test_metrics_endpoint_labels_route_templates(client, auth_headers, test_todo, monkeypatch):
+    monkeypatch.setattr("app.api.deps.INTERNAL_API_TOKEN", "internal-secret")
+    request_metrics.clear()
+    client.get(f"/api/v1/todos/{test_todo.id}", headers=auth_headers)
+    client.get("/api/v1/todos/999999", headers=auth_headers)
+    client.get("/no-such-path")
+
+    response = client.get("/metrics", headers={"Authorization": "Bearer internal-secret"})
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+    body = response.text
+    assert 'http_request_duration_seconds_count{method="GET",route="/api/v1/todos/{todo_id}",status="200"} 1' in body
+    assert 'http_request_duration_seconds_count{method="GET",route="/api/v1/todos/{todo_id}",status="404"} 1' in body
+    assert 'route="<unmatched>",status="404"' in body
+    assert f"/api/v1/todos/{test_todo.id}" not in body
+    assert 'app_db_pool_checked_out{engine="sync"}' in body
+    assert "app_hash_executor_workers" in body
+    assert "app_outbox_sent" in body
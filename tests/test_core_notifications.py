@@ -0,0 +1,151 @@
+import asyncio
+import json
+import logging
+import smtplib
+from app.core.notifications import ConsoleSink, FileSink, Notification, NotificationOutbox, SMTPSink
+
+class ListSink:
+    def __init__(self, failures: int = 0):
+        self.batches = []
+        self.failures = failures
+
+    def send(self, messages):
+        if self.failures:
+            self.failures -= 1
+            raise ConnectionError("sink unavailable")
+        self.batches.append([message.to for message in messages])
+        return []
+
+class RejectingSink(ListSink):
+    """Delivers everything except messages to rejected addresses."""
+
+    def __init__(self, rejected):
+        super().__init__()
+        self.rejected = set(rejected)
+
+    def send(self, messages):
+        self.batches.append([message.to for message in messages])
+        return [message for message in messages if message.to in self.rejected]
+
+async def _drain(outbox: NotificationOutbox, timeout: float = 5) -> None:
+    for _ in range(int(timeout / 0.01)):
+        stats = outbox.stats()
+        if not stats["queue_depth"] and not stats["in_flight"] and stats["sent"] + stats["failed"]:
+            return
+        await asyncio.sleep(0.01)
+
+def test_outbox_delivers_in_batches():
+    sink = ListSink()
+    outbox = NotificationOutbox(sink, workers=1, batch_size=2, max_attempts=3, retry_delay=0.01)
+
+    async def scenario():
+        # Messages queued before start are delivered once the workers run.
+        for i in range(3):
+            outbox.enqueue(Notification(to=f"{i}@example.com", subject="s", body="b"))
+        await outbox.start()
+        await _drain(outbox)
+        await outbox.stop()
+
+    asyncio.run(scenario())
+    assert sink.batches == [["0@example.com", "1@example.com"], ["2@example.com"]]
+    stats = outbox.stats()
+    assert stats["sent"] == 3 and stats["queue_depth"] == 0
+    assert stats["latency_seconds_max"] >= 0
+
+def test_outbox_retries_then_gives_up():
+    sink = ListSink(failures=2)
+    outbox = NotificationOutbox(sink, workers=1, batch_size=10, max_attempts=3, retry_delay=0.01)
+
+    async def scenario():
+        await outbox.start()
+        outbox.enqueue(Notification(to="a@example.com", subject="s", body="b"))
+        await _drain(outbox)
+        sink.failures = 3
+        outbox.enqueue(Notification(to="b@example.com", subject="s", body="b"))
+        for _ in range(500):
+            if outbox.stats()["failed"]:
+                break
+            await asyncio.sleep(0.01)
+        await outbox.stop()
+
+    asyncio.run(scenario())
+    assert sink.batches == [["a@example.com"]]
+    stats = outbox.stats()
+    assert stats["sent"] == 1 and stats["failed"] == 1 and stats["retries"] == 4
+
+def test_file_sink_appends_json_lines(tmp_path):
+    path = tmp_path / "outbox.log"
+    FileSink(str(path)).send([Notification(to="a@example.com", subject="Hi", body="Code 1")])
+    FileSink(str(path)).send([Notification(to="b@example.com", subject="Hi", body="Code 2")])
+    lines = [json.loads(line) for line in path.read_text().splitlines()]
+    assert [line["to"] for line in lines] == ["a@example.com", "b@example.com"]
+
+def test_outbox_retries_only_undelivered_messages():
+    sink = RejectingSink(["b@example.com"])
+    outbox = NotificationOutbox(sink, workers=1, batch_size=10, max_attempts=2, retry_delay=0.01)
+
+    async def scenario():
+        for to in ("a@example.com", "b@example.com", "c@example.com"):
+            outbox.enqueue(Notification(to=to, subject="s", body="b"))
+        await outbox.start()
+        for _ in range(500):
+            if outbox.stats()["failed"]:
+                break
+            await asyncio.sleep(0.01)
+        await outbox.stop()
+
+    asyncio.run(scenario())
+    assert sink.batches == [["a@example.com", "b@example.com", "c@example.com"], ["b@example.com"]]
+    stats = outbox.stats()
+    assert (stats["sent"], stats["failed"], stats["retries"]) == (2, 1, 1)
+
+def test_outbox_stop_sends_scheduled_retries():
+    sink = ListSink(failures=1)
+    # The backoff is far longer than the test; stop() must not wait for it or drop the retry.
+    outbox = NotificationOutbox(sink, workers=1, batch_size=10, max_attempts=3, retry_delay=60)
+
+    async def scenario():
+        await outbox.start()
+        outbox.enqueue(Notification(to="a@example.com", subject="s", body="b"))
+        for _ in range(500):
+            if outbox.stats()["scheduled_retries"]:
+                break
+            await asyncio.sleep(0.01)
+        await outbox.stop(timeout=2)
+
+    asyncio.run(scenario())
+    assert sink.batches == [["a@example.com"]]
+    assert outbox.stats()["sent"] == 1 and outbox.stats()["scheduled_retries"] == 0
+
+def test_console_sink_does_not_log_bodies(capsys, caplog):
+    with caplog.at_level(logging.INFO, logger="app.core.notifications"):
+        ConsoleSink().send([Notification(to="a@example.com", subject="Your code", body="Code 123456")])
+    assert "a@example.com" in caplog.text
+    assert "123456" not in caplog.text
+    assert "123456" not in capsys.readouterr().out
+
+def test_smtp_sink_returns_only_undelivered(monkeypatch):
+    sent = []
+
+    class FakeSMTP:
+        def __init__(self, host, port, timeout):
+            pass
+
+        def __enter__(self):
+            return self
+
+        def __exit__(self, *exc):
+            return False
+
+        def send_message(self, email):
+            if email["To"] == "rejected@example.com":
+                raise smtplib.SMTPRecipientsRefused({email["To"]: (550, b"no such user")})
+            if email["To"] == "dropped@example.com":
+                raise smtplib.SMTPServerDisconnected("connection lost")
+            sent.append(email["To"])
+
+    monkeypatch.setattr(smtplib, "SMTP", FakeSMTP)
+    messages = [Notification(to=to, subject="s", body="b") for to in ("a@example.com", "rejected@example.com", "dropped@example.com", "b@example.com")]
+    undelivered = SMTPSink("localhost", 25, "noreply@example.com").send(messages)
+    assert sent == ["a@example.com"]
+    assert [message.to for message in undelivered] == ["rejected@example.com", "dropped@example.com", "b@example.com"]
@@ -0,0 +1,66 @@
+import pytest
+from app.core.otp import MemoryOTPStore, RedisOTPStore, TableOTPStore
+
+def _stores():
+    import fakeredis
+    return [
+        MemoryOTPStore(ttl=60, max_attempts=2),
+        TableOTPStore(ttl=60, max_attempts=2),
+        RedisOTPStore(fakeredis.FakeRedis(), ttl=60, max_attempts=2),
+    ]
+
+@pytest.mark.parametrize("index", range(3))
+def test_otp_store_consumes_code(db, index):
+    store = _stores()[index]
+    store.issue(db, "a@example.com", "123456")
+    assert store.verify(db, "a@example.com", "123456") is True
+    assert store.verify(db, "a@example.com", "123456") is False
+
+@pytest.mark.parametrize("index", range(3))
+def test_otp_store_limits_attempts(db, index):
+    store = _stores()[index]
+    store.issue(db, "a@example.com", "123456")
+    assert store.verify(db, "a@example.com", "000000") is False
+    assert store.verify(db, "a@example.com", "111111") is False
+    assert store.verify(db, "a@example.com", "123456") is False
+
+@pytest.mark.parametrize("index", range(3))
+def test_otp_store_expires_and_replaces_codes(db, index):
+    store = _stores()[index]
+    store.issue(db, "a@example.com", "123456", ttl=-1)
+    assert store.verify(db, "a@example.com", "123456") is False
+
+    store.issue(db, "a@example.com", "123456")
+    store.issue(db, "a@example.com", "654321")
+    assert store.verify(db, "a@example.com", "123456") is False
+    assert store.verify(db, "a@example.com", "654321") is True
+
+@pytest.mark.parametrize("index", range(3))
+def test_otp_store_check_does_not_consume(db, index):
+    store = _stores()[index]
+    store.issue(db, "a@example.com", "123456")
+    assert store.check(db, "a@example.com", "123456") is True
+    assert store.check(db, "a@example.com", "000000") is False
+    assert store.verify(db, "a@example.com", "123456") is True
+    assert store.check(db, "a@example.com", "123456") is False
+
+def test_table_otp_store_sweeps_expired_codes(db):
+    from app.models import OTPCode
+
+    store = TableOTPStore(ttl=60, max_attempts=5)
+    store.issue(db, "old@example.com", "123456", ttl=-1)
+    db.commit()
+    store.issue(db, "new@example.com", "123456")
+    db.commit()
+    assert [entry.email for entry in db.query(OTPCode)] == ["new@example.com"]
+
+def test_memory_otp_store_sweeps_codes_with_shorter_ttls(db):
+    import time
+
+    store = MemoryOTPStore(ttl=60, max_attempts=5)
+    store.issue(db, "long@example.com", "123456")
+    # Issued later but expiring sooner, so not at the front of insertion order.
+    store.issue(db, "short@example.com", "123456", ttl=0.01)
+    time.sleep(0.02)
+    store.issue(db, "new@example.com", "123456")
+    assert sorted(store._codes) == ["long@example.com", "new@example.com"]
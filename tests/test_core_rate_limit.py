@@ -0,0 +1,40 @@
+import asyncio
+from app.core.rate_limit import MemoryRateLimitBackend, RedisRateLimitBackend
+
+def test_memory_backend_token_bucket(monkeypatch):
+    from app.core import rate_limit
+
+    now = [100.0]
+    monkeypatch.setattr(rate_limit.time, "monotonic", lambda: now[0])
+    backend = MemoryRateLimitBackend(maxsize=10)
+
+    async def scenario():
+        assert [await backend.acquire("k", 2, 1.0) for _ in range(2)] == [0, 0]
+        assert await backend.acquire("k", 2, 1.0) == 1.0
+        now[0] += 1.5
+        assert await backend.acquire("k", 2, 1.0) == 0
+
+    asyncio.run(scenario())
+
+def test_memory_backend_is_bounded():
+    backend = MemoryRateLimitBackend(maxsize=2)
+
+    async def scenario():
+        for key in ("a", "b", "c"):
+            await backend.acquire(key, 1, 1.0)
+        assert list(backend._buckets) == ["b", "c"]
+
+    asyncio.run(scenario())
+
+def test_redis_backend_token_bucket():
+    import fakeredis
+
+    backend = RedisRateLimitBackend(fakeredis.FakeAsyncRedis())
+
+    async def scenario():
+        assert await backend.acquire("k", 1, 0.5) == 0
+        assert await backend.acquire("k", 1, 0.5) > 0
+        await backend.clear()
+        assert await backend.acquire("k", 1, 0.5) == 0
+
+    asyncio.run(scenario())
@@ -0,0 +1,132 @@
+import asyncio
+import time
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import sessionmaker
+from app.core.database import Base, run_db
+from app.core.replicas import MemoryReplicaPins, ReplicaRouter, RoutingSession, replica_pins
+from app.core.cache import todo_cache
+from app.models import Todo, User
+from app.services import get_todos_by_user_cached, get_user_by_email, get_user_by_id
+
+@pytest.fixture
+def primary_and_replica(tmp_path):
+    primary = create_engine(f"sqlite:///{tmp_path}/primary.db")
+    replica = create_engine(f"sqlite:///{tmp_path}/replica.db")
+    for engine, name in ((primary, "Primary"), (replica, "Replica")):
+        Base.metadata.create_all(bind=engine)
+        with sessionmaker(bind=engine)() as session:
+            session.add(User(email="user@example.com", hashed_password="x", first_name=name, last_name="User"))
+            session.commit()
+    yield primary, replica
+    replica_pins.clear()
+    primary.dispose()
+    replica.dispose()
+
+def _first_name(db, email):
+    return db.query(User.first_name).filter(User.email == email).scalar()
+
+def test_router_round_robin_and_least_connections(tmp_path):
+    engines = [create_engine(f"sqlite:///{tmp_path}/{n}.db") for n in range(2)]
+    router = ReplicaRouter(engines)
+    assert [router.choose() for _ in range(4)] == engines * 2
+
+    router = ReplicaRouter(engines, "least_connections")
+    with engines[0].connect():
+        assert router.choose() is engines[1]
+    for engine in engines:
+        engine.dispose()
+
+def test_read_only_calls_go_to_replica(primary_and_replica):
+    primary, replica = primary_and_replica
+    Session = sessionmaker(class_=RoutingSession, bind=primary, info={"replicas": ReplicaRouter([replica])})
+    with Session() as db:
+        user = asyncio.run(run_db(db, get_user_by_id, 1))
+        assert user.first_name == "Replica"
+        # Unmarked calls, and flushes of replica-loaded objects, use the primary.
+        assert asyncio.run(run_db(db, _first_name, "user@example.com")) == "Primary"
+        user.last_name = "Renamed"
+        db.commit()
+    with sessionmaker(bind=primary)() as check:
+        assert check.query(User).filter_by(email="user@example.com").one().last_name == "Renamed"
+
+def test_subject_is_pinned_to_primary_after_write(primary_and_replica):
+    primary, replica = primary_and_replica
+    Session = sessionmaker(class_=RoutingSession, bind=primary, info={"replicas": ReplicaRouter([replica])})
+    with Session() as db:
+        db.info["subject"] = "user@example.com"
+        assert asyncio.run(run_db(db, get_user_by_id, 1)).first_name == "Replica"
+        db.commit()
+    with Session() as db:
+        db.info["subject"] = "user@example.com"
+        assert asyncio.run(run_db(db, get_user_by_id, 1)).first_name == "Primary"
+    with Session() as db:
+        db.info["subject"] = "other@example.com"
+        assert asyncio.run(run_db(db, get_user_by_id, 1)).first_name == "Replica"
+
+def test_async_read_only_calls_go_to_replica(primary_and_replica, tmp_path):
+    async def lookup():
+        primary = create_async_engine(f"sqlite+aiosqlite:///{tmp_path}/primary.db")
+        replica = create_async_engine(f"sqlite+aiosqlite:///{tmp_path}/replica.db")
+        Session = async_sessionmaker(primary, sync_session_class=RoutingSession, info={"replicas": ReplicaRouter([replica.sync_engine])})
+        async with Session() as db:
+            names = (
+                (await run_db(db, get_user_by_id, 1)).first_name,
+                await run_db(db, _first_name, "user@example.com"),
+            )
+        await primary.dispose()
+        await replica.dispose()
+        return names
+
+    assert asyncio.run(lookup()) == ("Replica", "Primary")
+
+def test_user_lookup_by_email_stays_on_primary(primary_and_replica):
+    primary, replica = primary_and_replica
+    Session = sessionmaker(class_=RoutingSession, bind=primary, info={"replicas": ReplicaRouter([replica])})
+    with Session() as db:
+        assert asyncio.run(run_db(db, get_user_by_email, "user@example.com")).first_name == "Primary"
+
+def test_replica_reads_do_not_fill_todo_cache(primary_and_replica):
+    primary, replica = primary_and_replica
+    # The replica holds a todo the primary no longer has.
+    with sessionmaker(bind=replica)() as session:
+        session.add(Todo(title="Deleted on primary", user_id=1))
+        session.commit()
+    todo_cache.clear()
+    Session = sessionmaker(class_=RoutingSession, bind=primary, info={"replicas": ReplicaRouter([replica])})
+    try:
+        with Session() as db:
+            assert len(asyncio.run(run_db(db, get_todos_by_user_cached, 1))) == 1
+        with sessionmaker(class_=RoutingSession, bind=primary)() as db:
+            assert asyncio.run(run_db(db, get_todos_by_user_cached, 1)) == []
+    finally:
+        todo_cache.clear()
+
+def test_update_and_delete_look_up_todos_on_primary(primary_and_replica):
+    from fastapi import HTTPException
+    from app.api.v1.todos import delete_todo_endpoint, update_todo_endpoint
+    from app.schemas import TodoUpdate
+
+    primary, replica = primary_and_replica
+    # The replica still has a todo the primary has already deleted.
+    with sessionmaker(bind=replica)() as session:
+        session.add(Todo(title="Deleted on primary", user_id=1))
+        session.commit()
+    Session = sessionmaker(class_=RoutingSession, bind=primary, info={"replicas": ReplicaRouter([replica])})
+    with Session() as db:
+        user = db.get(User, 1)
+        for call in (update_todo_endpoint(1, TodoUpdate(title="Renamed"), db=db, current_user=user), delete_todo_endpoint(1, db=db, current_user=user)):
+            with pytest.raises(HTTPException) as error:
+                asyncio.run(call)
+            assert error.value.status_code == 404
+
+def test_memory_pins_expire():
+    pins = MemoryReplicaPins(seconds=0.05, maxsize=2)
+    pins.pin("a@example.com")
+    assert pins.pinned("a@example.com")
+    pins.pin("b@example.com")
+    pins.pin("c@example.com")
+    assert not pins.pinned("a@example.com")
+    time.sleep(0.06)
+    assert not pins.pinned("c@example.com")
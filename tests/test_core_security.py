@@ -1,4 +1,5 @@
 import datetime
+import time
 from app.core.security import (
     verify_password,
     get_password_hash,
@@ -58,3 +59,78 @@ def test_token_decoding():
     refresh_payload = jwt.decode(refresh_token, SECRET_KEY, algorithms=[ALGORITHM])
     assert refresh_payload["sub"] == "test@example.com"
     assert refresh_payload["type"] == "refresh"
+
+def test_hash_executor_stats():
+    from app.core.security import hash_executor_stats
+
+    before = hash_executor_stats()
+    get_password_hash("stats_password")
+    # The counters are updated by a done callback, which may run just after the result
+    # is handed back.
+    deadline = time.monotonic() + 1
+    while hash_executor_stats()["completed"] == before["completed"] and time.monotonic() < deadline:
+        time.sleep(0.01)
+    stats = hash_executor_stats()
+    assert stats["workers"] >= 1
+    assert stats["completed"] == before["completed"] + 1
+    assert stats["in_flight"] == before["in_flight"]
+    assert stats["queue_depth"] == before["queue_depth"]
+    assert stats["wait_seconds_max"] >= 0
+
+def test_hash_executor_in_process_pool(monkeypatch):
+    from concurrent.futures import ProcessPoolExecutor
+    from app.core import security
+
+    executor = ProcessPoolExecutor(max_workers=1)
+    monkeypatch.setattr(security, "_hash_executor", executor)
+    try:
+        hashed = get_password_hash("process_password")
+        assert verify_password("process_password", hashed) is True
+    finally:
+        executor.shutdown(wait=True)
+
+def test_verify_password_inside_greenlet():
+    import asyncio
+    from sqlalchemy.util.concurrency import greenlet_spawn
+
+    hashed = get_password_hash("greenlet_password")
+    assert asyncio.run(greenlet_spawn(verify_password, "greenlet_password", hashed)) is True
+
+def test_build_pwd_context_flags_cost_changes():
+    from app.core.security import build_pwd_context
+
+    low = build_pwd_context("bcrypt", 4).hash("password")
+    high = build_pwd_context("bcrypt", 6).hash("password")
+    context = build_pwd_context("bcrypt", 5)
+    assert context.needs_update(low) is True
+    assert context.needs_update(high) is True
+    assert context.needs_update(context.hash("password")) is False
+
+def test_build_pwd_context_keeps_bcrypt_verifiable():
+    from app.core.security import build_pwd_context
+
+    legacy = build_pwd_context("bcrypt", 4).hash("password")
+    context = build_pwd_context("pbkdf2_sha256", 1000)
+    assert context.verify("password", legacy) is True
+    assert context.needs_update(legacy) is True
+
+def test_async_hash_wrappers():
+    import asyncio
+    from app.core.security import hash_password, verify_password_async
+
+    async def scenario():
+        hashed = await hash_password("async_password")
+        return await verify_password_async("async_password", hashed), await verify_password_async("wrong", hashed)
+
+    assert asyncio.run(scenario()) == (True, False)
+
+def test_hash_executor_admission_control(monkeypatch):
+    import pytest
+    from app.core import security
+
+    monkeypatch.setattr(security, "PASSWORD_HASH_MAX_QUEUE", 0)
+    monkeypatch.setitem(security._hash_stats, "in_flight", security.PASSWORD_HASH_WORKERS)
+    rejected = security.hash_executor_stats()["rejected"]
+    with pytest.raises(security.PasswordHashingBusy):
+        get_password_hash("busy_password")
+    assert security.hash_executor_stats()["rejected"] == rejected + 1
@@ -0,0 +1,84 @@
+import asyncio
+import threading
+from sqlalchemy import create_engine, text
+from sqlalchemy.ext.asyncio import create_async_engine
+from app.core.config import SQLITE_BUSY_TIMEOUT_MS
+from app.core.sqlite import configure_sqlite
+
+def test_configure_sqlite_sets_pragmas(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path}/tuned.db")
+    configure_sqlite(engine)
+    with engine.connect() as connection:
+        assert connection.execute(text("PRAGMA journal_mode")).scalar() == "wal"
+        assert connection.execute(text("PRAGMA synchronous")).scalar() == 1
+        assert connection.execute(text("PRAGMA busy_timeout")).scalar() == SQLITE_BUSY_TIMEOUT_MS
+    engine.dispose()
+
+def test_writer_lock_held_until_commit_or_rollback(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path}/tuned.db")
+    writer = configure_sqlite(engine)
+    with engine.begin() as connection:
+        connection.execute(text("CREATE TABLE items (id INTEGER PRIMARY KEY, name TEXT)"))
+    assert not writer.locked()
+
+    with engine.connect() as connection:
+        connection.execute(text("SELECT 1"))
+        assert not writer.locked()
+        connection.execute(text("INSERT INTO items (name) VALUES ('a')"))
+        assert writer.locked()
+        connection.rollback()
+        assert not writer.locked()
+
+    connection = engine.connect()
+    connection.execute(text("INSERT INTO items (name) VALUES ('b')"))
+    connection.close()
+    assert not writer.locked()
+    engine.dispose()
+
+def test_concurrent_writers_are_serialized(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path}/tuned.db", pool_size=8, connect_args={"check_same_thread": False})
+    configure_sqlite(engine)
+    with engine.begin() as connection:
+        connection.execute(text("CREATE TABLE items (id INTEGER PRIMARY KEY, name TEXT)"))
+    errors = []
+
+    def write(n):
+        try:
+            for i in range(25):
+                with engine.begin() as connection:
+                    connection.execute(text("SELECT count(*) FROM items")).scalar()
+                    connection.execute(text("INSERT INTO items (name) VALUES (:name)"), {"name": f"{n}-{i}"})
+        except Exception as exc:
+            errors.append(exc)
+
+    threads = [threading.Thread(target=write, args=(n,)) for n in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert errors == []
+    with engine.connect() as connection:
+        assert connection.execute(text("SELECT count(*) FROM items")).scalar() == 200
+    engine.dispose()
+
+def test_async_writers_are_serialized(tmp_path):
+    async def run():
+        engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path}/tuned.db")
+        writer = configure_sqlite(engine, is_async=True)
+        async with engine.begin() as connection:
+            await connection.execute(text("CREATE TABLE items (id INTEGER PRIMARY KEY, name TEXT)"))
+
+        async def write(n):
+            for i in range(10):
+                async with engine.begin() as connection:
+                    await connection.execute(text("INSERT INTO items (name) VALUES (:name)"), {"name": f"{n}-{i}"})
+                    await asyncio.sleep(0)
+
+        await asyncio.gather(*(write(n) for n in range(5)))
+        assert not writer.locked()
+        async with engine.connect() as connection:
+            count = (await connection.execute(text("SELECT count(*) FROM items"))).scalar()
+        await engine.dispose()
+        return count
+
+    assert asyncio.run(run()) == 50
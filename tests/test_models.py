@@ -22,24 +22,23 @@ def test_user_model_creation(db):
     assert user.is_verified is False
     assert user.created_at is not None
 
-def test_user_model_otp_fields(db):
-    from app.core.security import get_password_hash, generate_otp
+def test_otp_code_model(db):
+    from app.models import OTPCode
+    from app.core.security import generate_otp
+    import datetime
     
     otp = generate_otp()
-    user = User(
+    entry = OTPCode(
         email="test@example.com",
-        hashed_password=get_password_hash("testpass"),
-        first_name="Test",
-        last_name="User",
-        otp_code=otp,
-        otp_created_at=datetime.datetime.utcnow()
+        code=otp,
+        expires_at=datetime.datetime.utcnow() + datetime.timedelta(minutes=5)
     )
-    db.add(user)
+    db.add(entry)
     db.commit()
-    db.refresh(user)
+    db.refresh(entry)
     
-    assert user.otp_code == otp
-    assert user.otp_created_at is not None
+    assert entry.code == otp
+    assert entry.attempts == 0
 
 def test_user_model_relationship(db):
     from app.core.security import get_password_hash
@@ -158,3 +157,26 @@ def test_todo_model_update(db):
     assert todo.is_completed is True
     assert todo.is_archived is True
     assert todo.updated_at >= original_updated_at
+
+def test_create_all_upgrades_todos_table_without_change_seq(tmp_path):
+    from sqlalchemy import create_engine, inspect, text
+    from sqlalchemy.orm import sessionmaker
+    from app.core.database import Base
+    from app.schemas import TodoCreate
+    from app.services import create_todo
+
+    engine = create_engine(f"sqlite:///{tmp_path}/old.db")
+    with engine.begin() as connection:
+        connection.execute(text("CREATE TABLE users (id INTEGER PRIMARY KEY, first_name VARCHAR, last_name VARCHAR, email VARCHAR UNIQUE, hashed_password VARCHAR, is_active BOOLEAN, is_verified BOOLEAN, otp_code VARCHAR, otp_created_at DATETIME, created_at DATETIME)"))
+        connection.execute(text("CREATE TABLE todos (id INTEGER PRIMARY KEY, title VARCHAR, description VARCHAR, is_completed BOOLEAN, is_archived BOOLEAN, user_id INTEGER REFERENCES users(id), created_at DATETIME, updated_at DATETIME)"))
+        connection.execute(text("INSERT INTO users (id, email, hashed_password) VALUES (1, 'old@example.com', 'x')"))
+        connection.execute(text("INSERT INTO todos (id, title, user_id) VALUES (1, 'Old', 1)"))
+
+    Base.metadata.create_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    assert "change_seq" in {column["name"] for column in inspect(engine).get_columns("todos")}
+    with sessionmaker(bind=engine)() as session:
+        assert session.get(User, 1).email == "old@example.com"
+        assert session.get(Todo, 1).change_seq == 0
+        assert create_todo(session, TodoCreate(title="New"), 1).change_seq == 1
+    engine.dispose()
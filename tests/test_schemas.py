@@ -162,3 +162,11 @@ def test_password_reset_confirm_schema():
     assert confirm.email == "test@example.com"
     assert confirm.otp == "123456"
     assert confirm.new_password == "newpass123"
+
+def test_todo_bulk_selection_requires_selector():
+    from app.schemas import TodoBulkSelection, TodoBulkUpdate
+
+    assert TodoBulkSelection(ids=[1, 2]).ids == [1, 2]
+    assert TodoBulkUpdate(is_completed=True).value is True
+    with pytest.raises(ValidationError):
+        TodoBulkSelection()
@@ -33,18 +33,17 @@ def test_create_tokens(db, test_user):
 def test_verify_otp_success(db):
     from app.models import User
     from app.core.security import get_password_hash, generate_otp
-    import datetime
+    from app.core.otp import otp_store
     
     otp = generate_otp()
     user = User(
         email="test@example.com",
         hashed_password=get_password_hash("testpass"),
         first_name="Test",
-        last_name="User",
-        otp_code=otp,
-        otp_created_at=datetime.datetime.utcnow()
+        last_name="User"
     )
     db.add(user)
+    otp_store.issue(db, user.email, otp)
     db.commit()
     db.refresh(user)
     
@@ -53,23 +52,22 @@ def test_verify_otp_success(db):
     
     db.refresh(user)
     assert user.is_verified is True
-    assert user.otp_code is None
+    assert otp_store.verify(db, user.email, otp) is False
 
 def test_verify_otp_wrong_code(db):
     from app.models import User
     from app.core.security import get_password_hash, generate_otp
-    import datetime
+    from app.core.otp import otp_store
     
     otp = generate_otp()
     user = User(
         email="test@example.com",
         hashed_password=get_password_hash("testpass"),
         first_name="Test",
-        last_name="User",
-        otp_code=otp,
-        otp_created_at=datetime.datetime.utcnow()
+        last_name="User"
     )
     db.add(user)
+    otp_store.issue(db, user.email, otp)
     db.commit()
     db.refresh(user)
     
@@ -79,19 +77,17 @@ def test_verify_otp_wrong_code(db):
 def test_verify_otp_expired(db):
     from app.models import User
     from app.core.security import get_password_hash, generate_otp
-    import datetime
+    from app.core.otp import otp_store
     
     otp = generate_otp()
-    expired_time = datetime.datetime.utcnow() - datetime.timedelta(minutes=10)
     user = User(
         email="test@example.com",
         hashed_password=get_password_hash("testpass"),
         first_name="Test",
-        last_name="User",
-        otp_code=otp,
-        otp_created_at=expired_time
+        last_name="User"
     )
     db.add(user)
+    otp_store.issue(db, user.email, otp, ttl=-600)
     db.commit()
     db.refresh(user)
     
@@ -103,15 +99,16 @@ def test_verify_otp_user_not_found(db):
     assert result is False
 
 def test_regenerate_otp(db, test_user):
-    old_otp = test_user.otp_code
+    from app.core.otp import otp_store
+    
+    old_otp = regenerate_otp(db, email=test_user.email)
     new_otp = regenerate_otp(db, email=test_user.email)
     
     assert new_otp is not None
     assert len(new_otp) == 6
-    assert new_otp != old_otp
-    
-    db.refresh(test_user)
-    assert test_user.otp_code == new_otp
+    if old_otp != new_otp:
+        assert otp_store.verify(db, test_user.email, old_otp) is False
+    assert otp_store.verify(db, test_user.email, new_otp) is True
 
 def test_regenerate_otp_user_not_found(db):
     with pytest.raises(ValueError, match="User not found"):
@@ -135,18 +132,17 @@ def test_change_password_wrong_old_password(db, test_user):
 def test_reset_password_success(db):
     from app.models import User
     from app.core.security import get_password_hash, generate_otp, verify_password
-    import datetime
+    from app.core.otp import otp_store
     
     otp = generate_otp()
     user = User(
         email="test@example.com",
         hashed_password=get_password_hash("oldpassword"),
         first_name="Test",
-        last_name="User",
-        otp_code=otp,
-        otp_created_at=datetime.datetime.utcnow()
+        last_name="User"
     )
     db.add(user)
+    otp_store.issue(db, user.email, otp)
     db.commit()
     db.refresh(user)
     
@@ -155,52 +151,74 @@ def test_reset_password_success(db):
     
     db.refresh(user)
     assert user.hashed_password != old_hashed
-    assert user.otp_code is None
+    assert otp_store.verify(db, user.email, otp) is False
     assert verify_password("newpassword123", user.hashed_password) is True
 
 def test_reset_password_wrong_otp(db):
     from app.models import User
     from app.core.security import get_password_hash, generate_otp
-    import datetime
+    from app.core.otp import otp_store
     
     otp = generate_otp()
     user = User(
         email="test@example.com",
         hashed_password=get_password_hash("oldpassword"),
         first_name="Test",
-        last_name="User",
-        otp_code=otp,
-        otp_created_at=datetime.datetime.utcnow()
+        last_name="User"
     )
     db.add(user)
+    otp_store.issue(db, user.email, otp)
     db.commit()
     db.refresh(user)
     
-    with pytest.raises(ValueError, match="Invalid OTP"):
+    with pytest.raises(ValueError, match="Invalid or expired OTP"):
         reset_password(db, email=user.email, otp="000000", new_password="newpassword123")
 
 def test_reset_password_expired_otp(db):
     from app.models import User
     from app.core.security import get_password_hash, generate_otp
-    import datetime
+    from app.core.otp import otp_store
     
     otp = generate_otp()
-    expired_time = datetime.datetime.utcnow() - datetime.timedelta(minutes=10)
     user = User(
         email="test@example.com",
         hashed_password=get_password_hash("oldpassword"),
         first_name="Test",
-        last_name="User",
-        otp_code=otp,
-        otp_created_at=expired_time
+        last_name="User"
     )
     db.add(user)
+    otp_store.issue(db, user.email, otp, ttl=-600)
     db.commit()
     db.refresh(user)
     
-    with pytest.raises(ValueError, match="OTP expired"):
+    with pytest.raises(ValueError, match="Invalid or expired OTP"):
         reset_password(db, email=user.email, otp=otp, new_password="newpassword123")
 
 def test_reset_password_user_not_found(db):
     with pytest.raises(ValueError, match="User not found"):
         reset_password(db, email="nonexistent@example.com", otp="123456", new_password="newpassword123")
+
+def test_authenticate_user_rehashes_outdated_hash(db, test_user, monkeypatch):
+    from app.core import security
+
+    monkeypatch.setattr(security, "pwd_context", security.build_pwd_context("bcrypt", 5))
+    user = authenticate_user(db, email=test_user.email, password="testpass123")
+    assert user is not None
+
+    db.refresh(test_user)
+    assert test_user.hashed_password.startswith("$2b$05$")
+    assert authenticate_user(db, email=test_user.email, password="testpass123") is not None
+
+def test_authenticate_user_skips_rehash_when_hashing_busy(db, test_user, monkeypatch):
+    from app.core import security
+
+    monkeypatch.setattr(security, "pwd_context", security.build_pwd_context("bcrypt", 5))
+    original = test_user.hashed_password
+
+    def busy(password):
+        raise security.PasswordHashingBusy("Password hashing is overloaded")
+
+    monkeypatch.setattr("app.services.auth_service.get_password_hash", busy)
+    assert authenticate_user(db, email=test_user.email, password="testpass123") is not None
+    db.refresh(test_user)
+    assert test_user.hashed_password == original
@@ -1,4 +1,5 @@
 import pytest
+from app.models import Todo
 from app.schemas import TodoCreate, TodoUpdate
 from app.services.todo_service import (
     get_todos_by_user,
@@ -37,7 +38,7 @@ def test_get_todos_by_user_with_pagination(db, test_user):
 def test_get_todos_by_user_archived_filter(db, test_user):
     todo1 = create_todo(db, TodoCreate(title="Active Todo"), test_user.id)
     todo2 = create_todo(db, TodoCreate(title="Archived Todo"), test_user.id)
-    toggle_todo_archive(db, todo2)
+    toggle_todo_archive(db, todo2.id, test_user.id)
     
     active_todos = get_todos_by_user(db, test_user.id, archived=False)
     archived_todos = get_todos_by_user(db, test_user.id, archived=True)
@@ -118,19 +119,19 @@ def test_update_todo_partial(db, test_user, test_todo):
 def test_toggle_todo_complete(db, test_user, test_todo):
     assert test_todo.is_completed is False
     
-    toggled = toggle_todo_complete(db, test_todo)
+    toggled = toggle_todo_complete(db, test_todo.id, test_user.id)
     assert toggled.is_completed is True
     
-    toggled_again = toggle_todo_complete(db, toggled)
+    toggled_again = toggle_todo_complete(db, test_todo.id, test_user.id)
     assert toggled_again.is_completed is False
 
 def test_toggle_todo_archive(db, test_user, test_todo):
     assert test_todo.is_archived is False
     
-    toggled = toggle_todo_archive(db, test_todo)
+    toggled = toggle_todo_archive(db, test_todo.id, test_user.id)
     assert toggled.is_archived is True
     
-    toggled_again = toggle_todo_archive(db, toggled)
+    toggled_again = toggle_todo_archive(db, test_todo.id, test_user.id)
     assert toggled_again.is_archived is False
 
 def test_delete_todo(db, test_user, test_todo):
@@ -139,3 +140,310 @@ def test_delete_todo(db, test_user, test_todo):
     
     deleted_todo = get_todo_by_id(db, todo_id, test_user.id)
     assert deleted_todo is None
+
+def test_get_todos_by_user_keyset(db, test_user):
+    created = [create_todo(db, TodoCreate(title=f"Todo {i}"), test_user.id) for i in range(5)]
+
+    first_page = get_todos_by_user(db, test_user.id, limit=2)
+    assert [todo.id for todo in first_page] == [created[0].id, created[1].id]
+
+    next_page = get_todos_by_user(db, test_user.id, limit=2, after_id=first_page[-1].id)
+    assert [todo.id for todo in next_page] == [created[2].id, created[3].id]
+
+    last_page = get_todos_by_user(db, test_user.id, limit=2, after_id=next_page[-1].id)
+    assert [todo.id for todo in last_page] == [created[4].id]
+
+def test_cursor_round_trip():
+    from app.services.todo_service import encode_cursor, decode_cursor
+
+    assert decode_cursor(encode_cursor(12345)) == 12345
+    with pytest.raises(ValueError):
+        decode_cursor("not-a-cursor")
+
+def test_create_todos(db, test_user, monkeypatch):
+    from app.services import todo_service
+
+    monkeypatch.setattr(todo_service, "TODO_BULK_CHUNK_SIZE", 2)
+    todos = todo_service.create_todos(db, [TodoCreate(title=f"Bulk {i}") for i in range(5)], test_user.id)
+    assert [todo.title for todo in todos] == [f"Bulk {i}" for i in range(5)]
+    assert all(todo.id is not None and todo.user_id == test_user.id for todo in todos)
+    assert all(todo.created_at is not None and todo.is_completed is False for todo in todos)
+    assert len(get_todos_by_user(db, test_user.id)) == 5
+
+def test_complete_and_archive_todos(db, test_user):
+    from app.schemas import TodoBulkSelection
+    from app.services.todo_service import complete_todos, archive_todos
+
+    todos = [create_todo(db, TodoCreate(title=f"Todo {i}"), test_user.id) for i in range(3)]
+    ids = complete_todos(db, test_user.id, TodoBulkSelection(ids=[todos[0].id, todos[1].id]))
+    assert sorted(ids) == [todos[0].id, todos[1].id]
+
+    archived = archive_todos(db, test_user.id, TodoBulkSelection(is_completed=True))
+    assert sorted(archived) == sorted(ids)
+    assert len(get_todos_by_user(db, test_user.id, archived=False)) == 1
+
+def test_delete_todos_is_scoped_to_user(db, test_user):
+    from app.models import User
+    from app.schemas import TodoBulkSelection
+    from app.services.todo_service import delete_todos
+
+    other_user = User(email="other@example.com", hashed_password="x", first_name="Other", last_name="User")
+    db.add(other_user)
+    db.commit()
+    mine = create_todo(db, TodoCreate(title="Mine"), test_user.id)
+    theirs = create_todo(db, TodoCreate(title="Theirs"), other_user.id)
+
+    deleted = delete_todos(db, test_user.id, TodoBulkSelection(ids=[mine.id, theirs.id]))
+    assert deleted == [mine.id]
+    assert get_todo_by_id(db, theirs.id, other_user.id) is not None
+
+def _change_seq(db, user_id):
+    from app.models import TodoSyncState
+    return db.query(TodoSyncState.change_seq).filter(TodoSyncState.user_id == user_id).scalar()
+
+def test_bulk_update_without_matches_keeps_change_seq(db, test_user):
+    from app.schemas import TodoBulkSelection
+    from app.services import complete_todos
+
+    create_todo(db, TodoCreate(title="Todo"), test_user.id)
+    seq = _change_seq(db, test_user.id)
+    assert complete_todos(db, test_user.id, TodoBulkSelection(ids=[99999])) == []
+    assert _change_seq(db, test_user.id) == seq
+
+def test_toggle_todo_not_found(db, test_user):
+    create_todo(db, TodoCreate(title="Todo"), test_user.id)
+    seq = _change_seq(db, test_user.id)
+    assert toggle_todo_complete(db, 99999, test_user.id) is None
+    assert toggle_todo_archive(db, 99999, test_user.id) is None
+    assert _change_seq(db, test_user.id) == seq
+
+def test_change_seq_counts_writes_per_user(db, test_user):
+    create_todo(db, TodoCreate(title="First"), test_user.id)
+    create_todo(db, TodoCreate(title="Second"), test_user.id)
+    assert _change_seq(db, test_user.id) == 2
+
+def test_toggle_todo_without_update_returning(db, test_user, test_todo, monkeypatch):
+    monkeypatch.setattr(db.get_bind().dialect, "update_returning", False)
+    toggled = toggle_todo_complete(db, test_todo.id, test_user.id)
+    assert isinstance(toggled, Todo)
+    assert toggled.is_completed is True
+    assert toggle_todo_complete(db, 99999, test_user.id) is None
+
+def test_toggle_todo_returns_todo(db, test_user, test_todo):
+    toggled = toggle_todo_complete(db, test_todo.id, test_user.id)
+    assert isinstance(toggled, Todo)
+    assert (toggled.id, toggled.is_completed, toggled.title) == (test_todo.id, True, "Test Todo")
+
+def test_import_todos_batches_and_reports_errors(db, test_user, monkeypatch):
+    import io
+    from app.services import todo_service
+
+    monkeypatch.setattr(todo_service, "TODO_IMPORT_BATCH_SIZE", 2)
+    data = io.BytesIO(
+        b'{"title": "One"}\n'
+        b'not json\n'
+        b'{"description": "no title"}\n'
+        b'\n'
+        b'{"title": "Two", "description": "Second"}\n'
+        b'{"title": "Three"}\n'
+    )
+    result = todo_service.import_todos(db, test_user.id, todo_service.parse_ndjson(data))
+    assert result.imported == 3
+    assert result.failed == 2
+    assert [error.line for error in result.errors] == [2, 3]
+    assert result.errors[0].error == "Invalid JSON"
+    assert "title" in result.errors[1].error
+    assert [todo.title for todo in get_todos_by_user(db, test_user.id)] == ["One", "Two", "Three"]
+
+def test_parse_csv_skips_empty_cells():
+    import io
+    from app.services.todo_service import parse_csv
+
+    rows = list(parse_csv(io.BytesIO(b"title,description\nOne,\nTwo,Desc\n")))
+    assert rows == [(2, {"title": "One"}), (3, {"title": "Two", "description": "Desc"})]
+
+def test_parse_csv_reports_undecodable_lines_and_continues():
+    import io
+    from app.services.todo_service import UNDECODABLE_LINE, parse_csv
+
+    rows = list(parse_csv(io.BytesIO(b"title,description\nx,y\n\xff\xfe\nz,\n\xff\n")))
+    assert rows == [(2, {"title": "x", "description": "y"}), (3, UNDECODABLE_LINE), (4, {"title": "z"}), (5, UNDECODABLE_LINE)]
+
+def test_get_todos_by_user_cached_invalidated_by_writes(db, test_user, test_todo):
+    from app.core.cache import todo_cache
+    from app.services.todo_service import get_todos_by_user_cached
+
+    first = get_todos_by_user_cached(db, test_user.id)
+    hits = todo_cache.stats()["hits"]
+    assert get_todos_by_user_cached(db, test_user.id) == first
+    assert todo_cache.stats()["hits"] == hits + 1
+
+    toggle_todo_complete(db, test_todo.id, test_user.id)
+    refreshed = get_todos_by_user_cached(db, test_user.id)
+    assert refreshed[0]["is_completed"] is True
+
+    create_todo(db, TodoCreate(title="Another"), test_user.id)
+    assert len(get_todos_by_user_cached(db, test_user.id)) == 2
+
+def test_get_todos_by_user_cached_with_redis_backend(db, test_user, test_todo, monkeypatch):
+    import fakeredis
+    from app.core.cache import RedisCacheBackend
+    from app.services import todo_service
+
+    backend = RedisCacheBackend(fakeredis.FakeRedis(), ttl=60)
+    monkeypatch.setattr(todo_service, "todo_cache", backend)
+    assert todo_service.get_todos_by_user_cached(db, test_user.id)[0]["title"] == "Test Todo"
+    assert todo_service.get_todos_by_user_cached(db, test_user.id)[0]["title"] == "Test Todo"
+    assert backend.stats()["hits"] == 1
+
+    todo_service.delete_todo(db, test_todo)
+    assert todo_service.get_todos_by_user_cached(db, test_user.id) == []
+
+def test_todo_writes_survive_redis_cache_outage(db, test_user, test_todo, monkeypatch):
+    import fakeredis
+    from app.core.cache import RedisCacheBackend
+    from app.services import todo_service
+
+    server = fakeredis.FakeServer()
+    monkeypatch.setattr(todo_service, "todo_cache", RedisCacheBackend(fakeredis.FakeRedis(server=server), ttl=60))
+    assert len(todo_service.get_todos_by_user_cached(db, test_user.id)) == 1
+    server.connected = False
+    todo_service.create_todo(db, TodoCreate(title="Written during outage"), test_user.id)
+    server.connected = True
+    assert len(todo_service.get_todos_by_user_cached(db, test_user.id)) == 2
+
+def test_get_todos_by_user_cached_without_backend(db, test_user, test_todo, monkeypatch):
+    from app.services import todo_service
+
+    monkeypatch.setattr(todo_service, "todo_cache", None)
+    assert [todo["id"] for todo in todo_service.get_todos_by_user_cached(db, test_user.id)] == [test_todo.id]
+    todo_service.create_todo(db, TodoCreate(title="Uncached"), test_user.id)
+
+def test_get_todo_fields_selects_requested_columns(db, test_user, test_todo):
+    from app.services.todo_service import get_todo_fields_by_id, get_todo_fields_by_user
+
+    rows = get_todo_fields_by_user(db, test_user.id, ["title"])
+    assert list(rows[0]._mapping) == ["id", "updated_at", "title"]
+
+    row = get_todo_fields_by_id(db, test_todo.id, test_user.id, ["description", "id"])
+    assert list(row._mapping) == ["id", "updated_at", "description"]
+    assert row.description == "Test Description"
+
+def test_search_todos_ranks_and_tracks_writes(db, test_user):
+    from app.services.todo_service import create_todos, delete_todos, search_todos
+    from app.schemas import TodoBulkSelection
+
+    milk, bread, other = create_todos(db, [
+        TodoCreate(title="Buy milk", description="and milk for the cat"),
+        TodoCreate(title="Bread", description="whole grain, no milk"),
+        TodoCreate(title="Call mom"),
+    ], test_user.id)
+
+    assert [todo.id for todo, _ in search_todos(db, test_user.id, "milk")] == [milk.id, bread.id]
+    assert search_todos(db, test_user.id, 'milk" OR "mom') == []
+
+    update_todo(db, other, TodoUpdate(title="Call mom about milk"))
+    assert other.id in [todo.id for todo, _ in search_todos(db, test_user.id, "milk")]
+
+    delete_todos(db, test_user.id, TodoBulkSelection(ids=[milk.id]))
+    assert milk.id not in [todo.id for todo, _ in search_todos(db, test_user.id, "milk")]
+
+def test_search_todos_fallback_escapes_wildcards(db, test_user, monkeypatch):
+    from app.services.todo_service import create_todos, search_todos
+
+    percent, plain, underscore = create_todos(db, [TodoCreate(title=title) for title in ("100% done", "100 done", "a_b")], test_user.id)
+    monkeypatch.setattr(db.get_bind().dialect, "name", "other")
+    assert [todo.id for todo, _ in search_todos(db, test_user.id, "100%")] == [percent.id]
+    assert [todo.id for todo, _ in search_todos(db, test_user.id, "a_b")] == [underscore.id]
+    assert search_todos(db, test_user.id, "_") == [(underscore, 0.0)]
+
+def test_search_todos_keyset_pages(db, test_user):
+    from app.services.todo_service import create_todos, search_todos
+
+    create_todos(db, [TodoCreate(title=f"Report {i}") for i in range(5)], test_user.id)
+    first = search_todos(db, test_user.id, "report", limit=3)
+    todo, score = first[-1]
+    rest = search_todos(db, test_user.id, "report", limit=3, after=(score, todo.id))
+    ids = [todo.id for todo, _ in first + rest]
+    assert len(ids) == 5 and len(set(ids)) == 5
+
+def test_get_todo_changes_tracks_writes_and_deletes(db, test_user):
+    from app.services.todo_service import create_todos, decode_cursor, get_todo_changes
+
+    first, second, third = create_todos(db, [TodoCreate(title=f"Sync {i}") for i in range(3)], test_user.id)
+    full = get_todo_changes(db, test_user.id)
+    assert [todo.id for todo in full.todos] == [first.id, second.id, third.id]
+    assert full.deleted == []
+
+    since = decode_cursor(full.cursor)
+    update_todo(db, first, TodoUpdate(title="Sync 0 renamed"))
+    toggle_todo_complete(db, second.id, test_user.id)
+    delete_todo(db, third)
+
+    changes = get_todo_changes(db, test_user.id, since)
+    assert [todo.id for todo in changes.todos] == [first.id, second.id]
+    assert changes.deleted == [third.id]
+
+    caught_up = get_todo_changes(db, test_user.id, decode_cursor(changes.cursor))
+    assert caught_up.todos == [] and caught_up.deleted == []
+
+def test_get_todo_changes_pages_by_seq_and_id(db, test_user):
+    from app.services.todo_service import create_todos, decode_change_cursor, delete_todos, get_todo_changes
+    from app.schemas import TodoBulkSelection
+
+    todos = create_todos(db, [TodoCreate(title=f"Page {i}") for i in range(5)], test_user.id)
+    since = get_todo_changes(db, test_user.id).cursor
+    # One sequence number covers all five creates; paging must split it by id.
+    full = get_todo_changes(db, test_user.id, limit=2)
+    assert [todo.id for todo in full.todos] == [todos[0].id, todos[1].id]
+    assert full.has_more
+
+    seen = [todo.id for todo in full.todos]
+    page = full
+    while page.has_more:
+        page = get_todo_changes(db, test_user.id, *decode_change_cursor(page.cursor), limit=2)
+        seen += [todo.id for todo in page.todos]
+    assert seen == [todo.id for todo in todos]
+    assert page.cursor == since
+
+    delete_todos(db, test_user.id, TodoBulkSelection(ids=[todo.id for todo in todos[:3]]))
+    update_todo(db, todos[4], TodoUpdate(title="Renamed"))
+    first = get_todo_changes(db, test_user.id, *decode_change_cursor(since), limit=2)
+    assert (first.todos, first.deleted, first.has_more) == ([], [todos[0].id, todos[1].id], True)
+    second = get_todo_changes(db, test_user.id, *decode_change_cursor(first.cursor), limit=2)
+    assert ([todo.id for todo in second.todos], second.deleted, second.has_more) == ([todos[4].id], [todos[2].id], False)
+
+def test_compact_tombstones_periodically(db, test_user, test_todo, monkeypatch):
+    import asyncio
+    from app.main import compact_tombstones_periodically
+    from app.models import TodoTombstone
+    from app.services import todo_service
+    from tests.conftest import TestingSessionLocal
+
+    delete_todo(db, test_todo)
+    monkeypatch.setattr(todo_service, "TODO_TOMBSTONE_RETENTION_DAYS", -1)
+
+    async def run_once():
+        task = asyncio.create_task(compact_tombstones_periodically(TestingSessionLocal, interval=0.01))
+        await asyncio.sleep(0.2)
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+
+    asyncio.run(run_once())
+    assert db.query(TodoTombstone).count() == 0
+
+def test_compact_tombstones_expires_old_cursors(db, test_user, test_todo):
+    import datetime
+    from app.models import TodoTombstone
+    from app.services.todo_service import ChangeCursorExpired, compact_tombstones, create_todo, get_todo_changes
+
+    delete_todo(db, test_todo)
+    assert compact_tombstones(db) == 0
+
+    assert compact_tombstones(db, older_than=datetime.datetime.utcnow() + datetime.timedelta(seconds=1)) == 1
+    assert db.query(TodoTombstone).count() == 0
+    with pytest.raises(ChangeCursorExpired):
+        get_todo_changes(db, test_user.id, 0)
+
+    create_todo(db, TodoCreate(title="After compaction"), test_user.id)
+    assert [todo.title for todo in get_todo_changes(db, test_user.id).todos] == ["After compaction"]
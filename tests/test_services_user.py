@@ -43,6 +43,9 @@ def test_create_user(db):
     assert user.is_verified is False
     assert user.otp_code is not None
     assert len(user.otp_code) == 6
+    
+    from app.core.otp import otp_store
+    assert otp_store.verify(db, user.email, user.otp_code) is True
 
 def test_create_user_duplicate_email(db, test_user):
     user_data = UserCreate(